@@ -1,9 +1,41 @@
+import datetime
+import json
+import sys
+import typing as t
+
 import click
 
+from over_provisioning.comparison import compare_reports, load_reports
+from over_provisioning.history import TREND_COLUMNS, RunsHistory
 from over_provisioning.main import main
+from over_provisioning.profiling import create_profiler
+from over_provisioning.test.open_loop import (
+    CONSTANT_ARRIVALS,
+    POISSON_ARRIVALS,
+)
+from over_provisioning.tracing import (
+    CHROME_TRACE_FORMAT,
+    OTLP_JSON_FORMAT,
+    tracing,
+)
+
+
+@click.group()
+def cli():
+    pass
 
 
-@click.command()
+def _check_single_test_mode(modes: t.Dict[str, t.Any]):
+    """otherwise only the first mode of main would run"""
+    given = [option for option, value in modes.items() if value]
+    if len(given) > 1:
+        raise click.UsageError(
+            f"Options {', '.join(given)} select different test modes"
+            f" and can not be used together."
+        )
+
+
+@cli.command()
 @click.argument(
     "kubernetes_conf_path",
     envvar="KUBERNETES_CONF_PATH",
@@ -76,6 +108,272 @@ from over_provisioning.main import main
     type=click.INT,
     help="Define max to wait on over provisioning pods will be assigned to new nodes",
 )
+@click.option(
+    "--pod-spec-file",
+    envvar="POD_SPEC_FILE",
+    type=click.Path(exists=True),
+    default=None,
+    help="YAML file with pod spec(or whole Pod manifest) for test pods."
+    " Overrides pod spec chosen by running mode",
+)
+@click.option(
+    "--bulk-fill/--no-bulk-fill",
+    default=False,
+    help="Predict how many pods fit into free nodes capacity and create them"
+    " in one concurrent batch, then continue creating pods one by one."
+    " By default false",
+)
+@click.option(
+    "--dry-run/--no-dry-run",
+    default=False,
+    help="Do not create pods, simulate scheduling of test pods on the cluster"
+    " snapshot and predict test result. By default false",
+)
+@click.option(
+    "--cluster-snapshot-file",
+    envvar="CLUSTER_SNAPSHOT_FILE",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="File with cluster snapshot for dry run. Loaded if exists,"
+    " otherwise snapshot is taken from the cluster and saved to it",
+)
+@click.option(
+    "--checkpoint-file",
+    envvar="CHECKPOINT_FILE",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="File where state of running test is periodically saved."
+    " Removed after test is finished. By default test is not checkpointed",
+)
+@click.option(
+    "--resume/--no-resume",
+    default=False,
+    help="Resume interrupted test from checkpoint file. Namespace is reused,"
+    " test pods are rediscovered by label. By default false",
+)
+@click.option(
+    "--max-namespace-termination-time",
+    envvar="MAX_NAMESPACE_TERMINATION_TIME",
+    type=click.FLOAT,
+    default=None,
+    help="Wait until created namespace is fully deleted, but not longer"
+    " than provided time in seconds. By default deletion is not awaited",
+)
+@click.option(
+    "--namespace-pool-size",
+    envvar="NAMESPACE_POOL_SIZE",
+    type=click.INT,
+    default=None,
+    help="Lease namespace from pool of ready namespaces instead of creating"
+    " new one. Kubernetes namespace option is used as pool name."
+    " Missing pool namespaces are created",
+)
+@click.option(
+    "--matrix-profile",
+    "matrix_profiles",
+    envvar="MATRIX_PROFILES",
+    multiple=True,
+    help="Run tests for several pod spec profiles concurrently, each in its"
+    " own namespace. Built-in profile name(small, medium, large) or"
+    " name with YAML pod spec file: name=path/to/spec.yaml."
+    " Can be repeated",
+)
+@click.option(
+    "--profile/--no-profile",
+    default=False,
+    help="Profile the run with cProfile and tracemalloc, separate time"
+    " blocked in API I/O from CPU time of the test. By default false",
+)
+@click.option(
+    "--profile-output",
+    envvar="PROFILE_OUTPUT",
+    type=click.STRING,
+    default="profile",
+    help="Path prefix of profiling results: {prefix}.pstats"
+    " and {prefix}_summary.json",
+)
+@click.option(
+    "--trace-file",
+    envvar="TRACE_FILE",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Record spans of the run phases(pod creation, waiting on running"
+    " status, nodes assigning, cleanup) into the file",
+)
+@click.option(
+    "--trace-format",
+    envvar="TRACE_FORMAT",
+    type=click.Choice([CHROME_TRACE_FORMAT, OTLP_JSON_FORMAT]),
+    default=CHROME_TRACE_FORMAT,
+    help="Format of trace file: chrome(chrome://tracing, Perfetto) or"
+    " otlp(OpenTelemetry JSON). By default chrome",
+)
+@click.option(
+    "--over-provisioning-pool",
+    "over_provisioning_pools",
+    multiple=True,
+    type=click.STRING,
+    help="Over provisioning pool in format namespace:label_selector."
+    " Can be repeated to watch several pools(one per node group)"
+    " with one cluster-wide watch",
+)
+@click.option(
+    "--burst-size",
+    "burst_sizes",
+    multiple=True,
+    type=click.IntRange(min=1),
+    help="Run burst absorption test instead of one by one filling: create"
+    " so many pods at once. Can be repeated to sweep burst sizes",
+)
+@click.option(
+    "--arrival-rate",
+    "arrival_rates",
+    multiple=True,
+    type=click.FloatRange(min=0.1),
+    help="Run open loop load test: create pods with so many arrivals per"
+    " minute independently of their completion. Can be repeated to find"
+    " rate at which headroom stops keeping up",
+)
+@click.option(
+    "--arrival-process",
+    type=click.Choice([POISSON_ARRIVALS, CONSTANT_ARRIVALS]),
+    default=POISSON_ARRIVALS,
+    help="Intervals between open loop arrivals: poisson(exponentially"
+    " distributed) or constant. By default poisson",
+)
+@click.option(
+    "--open-loop-step-duration",
+    type=click.FLOAT,
+    default=300,
+    help="Seconds of arrivals for every arrival rate. By default 300",
+)
+@click.option(
+    "--history-file",
+    envvar="HISTORY_FILE",
+    type=click.Path(dir_okay=False, writable=True),
+    default="history.db",
+    help="SQLite database where report of the run is appended."
+    " Pass empty value to disable",
+)
+@click.option(
+    "--arrival-trace-file",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Replay production arrivals: CSV(offset,profile columns) or"
+    " NDJSON(.ndjson, .jsonl) file with seconds from the trace start and"
+    " optional pod size profile(small, medium, large) of every arrival",
+)
+@click.option(
+    "--time-compression",
+    type=click.FloatRange(min=0.01),
+    default=1,
+    help="Replay arrival trace so many times faster. By default 1",
+)
+@click.option(
+    "--record-file",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Record every kubernetes API call with its response and timing"
+    " to cassette file(gzip compressed when name ends with .gz)",
+)
+@click.option(
+    "--replay-file",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Serve kubernetes API calls from recorded cassette file"
+    " instead of cluster",
+)
+@click.option(
+    "--replay-realtime/--replay-fast",
+    default=True,
+    help="Replay every API call as long as recorded one or"
+    " as fast as possible. By default realtime",
+)
+@click.option(
+    "--churn-rate",
+    type=click.FloatRange(min=0.1),
+    help="Run churn test: create or delete one test pod so many times per"
+    " minute keeping amount of test pods around the capacity boundary",
+)
+@click.option(
+    "--churn-duration",
+    type=click.FLOAT,
+    default=1800,
+    help="Seconds of churn. By default 1800",
+)
+@click.option(
+    "--churn-amplitude",
+    type=click.IntRange(min=0),
+    default=2,
+    help="Amount of test pods below and above the capacity boundary"
+    " between which churn swings. By default 2",
+)
+@click.option(
+    "--max-return-to-baseline-time",
+    type=click.FLOAT,
+    help="After test pods are deleted wait so many seconds until cluster"
+    " returns to initial amount of nodes and over provisioning pods are"
+    " scheduled again, report scale-down latency and node-minutes",
+)
+@click.option(
+    "--daemon-interval",
+    type=click.FloatRange(min=1),
+    help="Run test as long-running daemon every so many seconds reusing"
+    " kubernetes client and caches, results are served over HTTP",
+)
+@click.option(
+    "--daemon-jitter",
+    type=click.FloatRange(min=0, max=1),
+    default=0.1,
+    help="Random fraction of interval added to or subtracted from every"
+    " interval between daemon runs. By default 0.1",
+)
+@click.option(
+    "--daemon-history-size",
+    type=click.IntRange(min=1),
+    default=100,
+    help="Amount of the last daemon runs results kept in memory."
+    " By default 100",
+)
+@click.option(
+    "--daemon-port",
+    type=click.IntRange(min=0, max=65535),
+    default=8080,
+    help="Port on 127.0.0.1 where daemon serves results. By default 8080",
+)
+@click.option(
+    "--watch-nodes/--no-watch-nodes",
+    default=False,
+    help="Keep nodes in memory with one watch instead of listing them"
+    " on every nodes check. By default nodes are listed",
+)
+@click.option(
+    "--pre-pull-images/--no-pre-pull-images",
+    default=False,
+    help="Pull images of test pod onto nodes with short-lived DaemonSet"
+    " during environment setup, so image pulling on already existent nodes"
+    " is not measured. By default images are not pre-pulled",
+)
+@click.option(
+    "--calibration-pods",
+    type=click.IntRange(min=0),
+    default=0,
+    help="Before the test measure API round trip time and time until pod"
+    " is running on idle node with so many pods, report results also net"
+    " of this baseline. By default calibration is skipped",
+)
+@click.option(
+    "--credentials-cache-file",
+    type=click.Path(dir_okay=False),
+    help="Keep bearer tokens of exec based authentication(EKS) in this file"
+    " until they expire, so concurrent and next runs do not call token"
+    " helper again. By default token helper is called on every run",
+)
+@click.option(
+    "--waves",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Keep creating test pods until over provisioning pods are preempted"
+    " and recreated on new nodes so many times, every wave is reported"
+    " separately. By default test stops after the first wave",
+)
 def run(
     kubernetes_conf_path: str,
     kubernetes_namespace: str,
@@ -88,21 +386,263 @@ def run(
     local_development: bool,
     max_amount_of_nodes: int,
     max_nodes_assigning_time: int,
+    pod_spec_file: str,
+    bulk_fill: bool,
+    dry_run: bool,
+    cluster_snapshot_file: str,
+    checkpoint_file: str,
+    resume: bool,
+    max_namespace_termination_time: float,
+    namespace_pool_size: int,
+    matrix_profiles: t.Tuple[str, ...],
+    profile: bool,
+    profile_output: str,
+    trace_file: t.Optional[str],
+    trace_format: str,
+    history_file: str,
+    over_provisioning_pools: t.Tuple[str, ...],
+    burst_sizes: t.Tuple[int, ...],
+    arrival_rates: t.Tuple[float, ...],
+    arrival_process: str,
+    open_loop_step_duration: float,
+    arrival_trace_file: t.Optional[str],
+    time_compression: float,
+    record_file: t.Optional[str],
+    replay_file: t.Optional[str],
+    replay_realtime: bool,
+    churn_rate: t.Optional[float],
+    churn_duration: float,
+    churn_amplitude: int,
+    max_return_to_baseline_time: t.Optional[float],
+    daemon_interval: t.Optional[float],
+    daemon_jitter: float,
+    daemon_history_size: int,
+    daemon_port: int,
+    watch_nodes: bool,
+    pre_pull_images: bool,
+    calibration_pods: int,
+    credentials_cache_file: t.Optional[str],
+    waves: int,
+):
+    """Run over provisioning test"""
+    _check_single_test_mode(
+        {
+            "--matrix-profile": matrix_profiles,
+            "--daemon-interval": daemon_interval,
+            "--arrival-trace-file": arrival_trace_file,
+            "--arrival-rate": arrival_rates,
+            "--churn-rate": churn_rate,
+            "--burst-size": burst_sizes,
+        }
+    )
+    if resume and not checkpoint_file:
+        raise click.UsageError("Option --resume requires --checkpoint-file.")
+    with create_profiler(profile_output if profile else None), tracing(
+        trace_file, trace_format
+    ):
+        main(
+            kubernetes_conf_path,
+            kubernetes_namespace,
+            max_pod_creation_time,
+            over_provisioning_pods_label_selector,
+            over_provisioning_pods_namespace,
+            nodes_label_selector,
+            create_new_namespace,
+            pods_to_create_quantity,
+            local_development,
+            max_amount_of_nodes,
+            max_nodes_assigning_time,
+            pod_spec_file,
+            bulk_fill,
+            dry_run,
+            cluster_snapshot_file,
+            checkpoint_file,
+            resume,
+            max_namespace_termination_time,
+            namespace_pool_size,
+            matrix_profiles,
+            history_file,
+            over_provisioning_pools,
+            burst_sizes,
+            arrival_rates,
+            arrival_process,
+            open_loop_step_duration,
+            arrival_trace_file,
+            time_compression,
+            record_file,
+            replay_file,
+            replay_realtime,
+            churn_rate,
+            churn_duration,
+            churn_amplitude,
+            max_return_to_baseline_time,
+            daemon_interval,
+            daemon_jitter,
+            daemon_history_size,
+            daemon_port,
+            watch_nodes,
+            pre_pull_images,
+            calibration_pods,
+            credentials_cache_file,
+            waves,
+        )
+
+
+def _format_history_value(column: str, value: t.Any) -> str:
+    if value is None:
+        return "-"
+    if column == "started_at":
+        return datetime.datetime.fromtimestamp(value).isoformat(
+            sep=" ", timespec="seconds"
+        )
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+@cli.command()
+@click.option(
+    "--history-file",
+    envvar="HISTORY_FILE",
+    type=click.Path(exists=True, dir_okay=False),
+    default="history.db",
+    help="SQLite database with reports of previous runs",
+)
+@click.option("--cluster", type=click.STRING, help="Filter runs by cluster")
+@click.option(
+    "--profile",
+    type=click.STRING,
+    help="Filter runs by profile(default or test matrix profile)",
+)
+@click.option(
+    "--since",
+    type=click.DateTime(),
+    help="Show runs started after the date",
+)
+@click.option(
+    "--limit",
+    type=click.INT,
+    default=50,
+    help="Max amount of latest runs to show. By default 50",
+)
+@click.option(
+    "--json/--no-json",
+    "as_json",
+    default=False,
+    help="Print runs as JSON lines instead of table",
+)
+def history(
+    history_file: str,
+    cluster: t.Optional[str],
+    profile: t.Optional[str],
+    since: t.Optional[datetime.datetime],
+    limit: int,
+    as_json: bool,
+):
+    """Show latency trend of previous runs, latest first"""
+    runs = RunsHistory(history_file).query_trend(
+        cluster, profile, since.timestamp() if since else None, limit
+    )
+    if as_json:
+        for run_row in runs:
+            click.echo(json.dumps(run_row))
+        return
+
+    rows = [list(TREND_COLUMNS)] + [
+        [_format_history_value(key, value) for key, value in run_row.items()]
+        for run_row in runs
+    ]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        click.echo(
+            "  ".join(value.rjust(width) for value, width in zip(row, widths))
+        )
+
+
+@cli.command()
+@click.option(
+    "-b",
+    "--baseline",
+    "baseline_files",
+    multiple=True,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Report file of baseline run. Can be repeated",
+)
+@click.option(
+    "-c",
+    "--candidate",
+    "candidate_files",
+    multiple=True,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Report file of compared run. Can be repeated",
+)
+@click.option(
+    "--threshold",
+    type=click.FLOAT,
+    default=0.1,
+    help="Relative increase of mean latency treated as regression."
+    " By default 0.1",
+)
+@click.option(
+    "--confidence",
+    type=click.FLOAT,
+    default=0.95,
+    help="Confidence level of bootstrap intervals. By default 0.95",
+)
+@click.option(
+    "--resamples",
+    type=click.INT,
+    default=2000,
+    help="Amount of bootstrap resamples. By default 2000",
+)
+@click.option(
+    "--seed", type=click.INT, help="Random seed to get reproducible intervals"
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    default="compare_report.json",
+    help="Path of comparison report. By default compare_report.json",
+)
+def compare(
+    baseline_files: t.Tuple[str, ...],
+    candidate_files: t.Tuple[str, ...],
+    threshold: float,
+    confidence: float,
+    resamples: int,
+    seed: t.Optional[int],
+    output: str,
 ):
-    main(
-        kubernetes_conf_path,
-        kubernetes_namespace,
-        max_pod_creation_time,
-        over_provisioning_pods_label_selector,
-        over_provisioning_pods_namespace,
-        nodes_label_selector,
-        create_new_namespace,
-        pods_to_create_quantity,
-        local_development,
-        max_amount_of_nodes,
-        max_nodes_assigning_time,
+    """Compare latency of runs with baseline runs, exit 1 on regression"""
+    regressed, report = compare_reports(
+        load_reports(baseline_files),
+        load_reports(candidate_files),
+        threshold,
+        resamples,
+        confidence,
+        seed,
     )
+    with open(output, "w") as f:
+        json.dump(report, f)
+
+    for metric, comparison in report["metrics"].items():
+        low, high = comparison["difference_ci"]
+        effect_size = comparison["effect_size"]
+        click.echo(
+            f"{metric}: {comparison['baseline_mean']:.2f}s ->"
+            f" {comparison['candidate_mean']:.2f}s"
+            f" ({comparison['relative_change']:+.1%}),"
+            f" difference CI [{low:+.2f}s, {high:+.2f}s],"
+            f" effect size"
+            f" {'-' if effect_size is None else f'{effect_size:.2f}'}"
+            f"{' REGRESSED' if comparison['regressed'] else ''}"
+        )
+    for metric in report["skipped_metrics"]:
+        click.echo(f"{metric}: not enough data")
+    sys.exit(1 if regressed else 0)
 
 
 if __name__ == "__main__":
-    run()
+    cli()
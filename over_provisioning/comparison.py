@@ -0,0 +1,249 @@
+import json
+import math
+import random
+import statistics
+import typing as t
+
+POD_CREATION_TIME_METRIC = "pod_creation_time"
+EXTRA_POD_CREATION_TIME_METRIC = "extra_pod_creation_time"
+TIME_TO_ASSIGN_NODE_METRIC = "time_to_assign_node"
+
+
+def _iter_test_reports(report: dict) -> t.Iterator[dict]:
+    """test matrix report contains report for every profile"""
+    if "profiles" in report:
+        yield from report["profiles"].values()
+    else:
+        yield report
+
+
+def extract_samples(reports: t.Iterable[dict]) -> t.Dict[str, t.List[float]]:
+    """
+    pod creation times are averaged by run(only average is reported),
+    node assigning times of all over provisioning pods are pooled
+    """
+    samples: t.Dict[str, t.List[float]] = {
+        POD_CREATION_TIME_METRIC: [],
+        EXTRA_POD_CREATION_TIME_METRIC: [],
+        TIME_TO_ASSIGN_NODE_METRIC: [],
+    }
+    for report in reports:
+        for test_report in _iter_test_reports(report):
+            if test_report.get("amount_of_created_pods"):
+                samples[POD_CREATION_TIME_METRIC].append(
+                    test_report["average_pod_creation_time"]
+                )
+            if test_report.get("extra_pod_creation_time"):
+                samples[EXTRA_POD_CREATION_TIME_METRIC].append(
+                    test_report["extra_pod_creation_time"]
+                )
+            op_pods = test_report.get("over_provisioning_pods", {})
+            for op_pod in op_pods.values():
+                if "time_to_assign_node" in op_pod:
+                    samples[TIME_TO_ASSIGN_NODE_METRIC].append(
+                        op_pod["time_to_assign_node"]
+                    )
+    return samples
+
+
+def load_reports(files_paths: t.Iterable[str]) -> t.List[dict]:
+    reports = []
+    for file_path in files_paths:
+        with open(file_path) as f:
+            reports.append(json.load(f))
+    return reports
+
+
+def _mean(values: t.Sequence[float]) -> float:
+    return math.fsum(values) / len(values)
+
+
+def _percentile(sorted_values: t.Sequence[float], fraction: float) -> float:
+    """linear interpolation between closest ranks"""
+    position = (len(sorted_values) - 1) * fraction
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    weight = position - lower
+    return (
+        sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+    )
+
+
+def bootstrap_mean_difference(
+    baseline: t.Sequence[float],
+    candidate: t.Sequence[float],
+    n_resamples: int = 2000,
+    confidence: float = 0.95,
+    rng: random.Random = None,
+) -> t.Tuple[float, float]:
+    """
+    confidence interval of candidate mean minus baseline mean,
+    percentile bootstrap with resampling of both samples
+    """
+    rng = rng or random.Random()
+    differences = sorted(
+        _mean(rng.choices(candidate, k=len(candidate)))
+        - _mean(rng.choices(baseline, k=len(baseline)))
+        for _ in range(n_resamples)
+    )
+    tail = (1 - confidence) / 2
+    return (
+        _percentile(differences, tail),
+        _percentile(differences, 1 - tail),
+    )
+
+
+def cohens_d(
+    baseline: t.Sequence[float], candidate: t.Sequence[float]
+) -> t.Optional[float]:
+    """difference of means in pooled standard deviations"""
+    if len(baseline) < 2 or len(candidate) < 2:
+        return None
+    pooled_variance = (
+        (len(baseline) - 1) * statistics.variance(baseline)
+        + (len(candidate) - 1) * statistics.variance(candidate)
+    ) / (len(baseline) + len(candidate) - 2)
+    difference = _mean(candidate) - _mean(baseline)
+    if pooled_variance == 0:
+        return 0.0 if difference == 0 else math.copysign(math.inf, difference)
+    return difference / math.sqrt(pooled_variance)
+
+
+class MetricComparison(t.NamedTuple):
+    metric: str
+    baseline_count: int
+    candidate_count: int
+    baseline_mean: float
+    candidate_mean: float
+    relative_change: float
+    difference_ci: t.Tuple[float, float]
+    effect_size: t.Optional[float]
+    regressed: bool
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+def compare_metric(
+    metric: str,
+    baseline: t.Sequence[float],
+    candidate: t.Sequence[float],
+    threshold: float,
+    n_resamples: int = 2000,
+    confidence: float = 0.95,
+    rng: random.Random = None,
+) -> MetricComparison:
+    """
+    latency is regressed when candidate mean is bigger than baseline mean
+    more than threshold(relative) and the whole confidence interval
+    of the difference is above zero
+    """
+    baseline_mean = _mean(baseline)
+    candidate_mean = _mean(candidate)
+    difference_ci = bootstrap_mean_difference(
+        baseline, candidate, n_resamples, confidence, rng
+    )
+    relative_change = (
+        (candidate_mean - baseline_mean) / baseline_mean
+        if baseline_mean
+        else 0.0
+    )
+    return MetricComparison(
+        metric,
+        len(baseline),
+        len(candidate),
+        baseline_mean,
+        candidate_mean,
+        relative_change,
+        difference_ci,
+        cohens_d(baseline, candidate),
+        relative_change > threshold and difference_ci[0] > 0,
+    )
+
+
+def compare_reports(
+    baseline_reports: t.Iterable[dict],
+    candidate_reports: t.Iterable[dict],
+    threshold: float = 0.1,
+    n_resamples: int = 2000,
+    confidence: float = 0.95,
+    seed: int = None,
+) -> t.Tuple[bool, dict]:
+    """returns whether any metric regressed and comparison report"""
+    rng = random.Random(seed)
+    baseline_samples = extract_samples(baseline_reports)
+    candidate_samples = extract_samples(candidate_reports)
+
+    comparisons = {}
+    skipped = []
+    for metric, baseline in baseline_samples.items():
+        candidate = candidate_samples[metric]
+        if not baseline or not candidate:
+            skipped.append(metric)
+            continue
+        comparisons[metric] = compare_metric(
+            metric,
+            baseline,
+            candidate,
+            threshold,
+            n_resamples,
+            confidence,
+            rng,
+        )
+
+    regressed = any(
+        comparison.regressed for comparison in comparisons.values()
+    )
+    return (
+        regressed,
+        {
+            "regressed": regressed,
+            "threshold": threshold,
+            "confidence": confidence,
+            "metrics": {
+                metric: comparison.to_dict()
+                for metric, comparison in comparisons.items()
+            },
+            "skipped_metrics": skipped,
+        },
+    )
+
+
+def _create_report(
+    pod_creation_time: float, times_to_assign_node: t.List[float]
+) -> dict:
+    return {
+        "amount_of_created_pods": 5,
+        "average_pod_creation_time": pod_creation_time,
+        "over_provisioning_pods": {
+            f"op-{i}": {"time_to_assign_node": value}
+            for i, value in enumerate(times_to_assign_node)
+        },
+    }
+
+
+def test_compare_reports():
+    baseline = [
+        _create_report(value, [60.0 + value, 65.0])
+        for value in [2.0, 2.1, 1.9, 2.0, 2.2]
+    ]
+    same = [
+        _create_report(value, [61.0 + value, 64.0])
+        for value in [2.1, 2.0, 1.9, 2.1]
+    ]
+    slower = [
+        _create_report(value, [60.0 + value, 65.0])
+        for value in [3.0, 3.1, 2.9, 3.2]
+    ]
+
+    regressed, _ = compare_reports(baseline, same, seed=1)
+    assert not regressed
+
+    regressed, report = compare_reports(baseline, slower, seed=1)
+    assert regressed
+    pod_creation = report["metrics"][POD_CREATION_TIME_METRIC]
+    assert pod_creation["regressed"]
+    assert pod_creation["difference_ci"][0] > 0.8
+    assert pod_creation["effect_size"] > 5
+    assert not report["metrics"][TIME_TO_ASSIGN_NODE_METRIC]["regressed"]
+    assert report["skipped_metrics"] == [EXTRA_POD_CREATION_TIME_METRIC]
@@ -0,0 +1,201 @@
+import collections
+import json
+import random
+import threading
+import typing as t
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from over_provisioning.logger import get_logger
+from over_provisioning.timer import Timer
+
+logger = get_logger()
+
+
+class MonitoringResult(t.NamedTuple):
+    started_at: float
+    duration: float
+    # None when run was skipped
+    passed: t.Optional[bool]
+    skip_reason: t.Optional[str]
+    report: dict
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+def jittered_interval(
+    interval: float, jitter: float, rng: random.Random = None
+) -> float:
+    """
+    runs of several daemons on the same cluster are spread,
+    jitter is fraction of the interval
+    """
+    rng = rng or random.Random()
+    return max(interval * (1 + rng.uniform(-jitter, jitter)), 0)
+
+
+class MonitoringDaemon:
+    """
+    Runs test on a jittered schedule within one process,
+    so kubernetes client, pod templates and watch caches are reused.
+    Run is skipped when leftovers of the previous one are found.
+    Only the last results are kept in memory.
+    """
+
+    def __init__(
+        self,
+        run_test: t.Callable[[], t.Tuple[bool, dict]],
+        find_leftovers: t.Callable[[], t.Optional[str]],
+        interval: float,
+        jitter: float = 0.1,
+        history_size: int = 100,
+        rng: random.Random = None,
+    ):
+        self._run_test = run_test
+        self._find_leftovers = find_leftovers
+        self._interval = interval
+        self._jitter = jitter
+        self._rng = rng or random.Random()
+
+        self._lock = threading.Lock()
+        self._results: t.Deque[MonitoringResult] = collections.deque(
+            maxlen=history_size
+        )
+        self._stopped = threading.Event()
+
+    def get_results(self) -> t.List[MonitoringResult]:
+        with self._lock:
+            return list(self._results)
+
+    def get_latest_result(self) -> t.Optional[MonitoringResult]:
+        with self._lock:
+            return self._results[-1] if self._results else None
+
+    def build_summary(self) -> dict:
+        results = self.get_results()
+        finished = [result for result in results if result.passed is not None]
+        return {
+            "runs": len(results),
+            "passed": sum(1 for result in finished if result.passed),
+            "failed": sum(1 for result in finished if not result.passed),
+            "skipped": len(results) - len(finished),
+            "latest": results[-1].to_dict() if results else None,
+        }
+
+    def run_once(self) -> MonitoringResult:
+        started_at = Timer.now()
+        passed: t.Optional[bool] = None
+        report: dict = {}
+        skip_reason = self._find_leftovers()
+        if skip_reason:
+            logger.info(f"Monitoring run is skipped: {skip_reason}")
+        else:
+            try:
+                passed, report = self._run_test()
+            except Exception as e:
+                # daemon must survive failures of the single run
+                logger.exception("Monitoring run failed")
+                passed, report = False, {"errors": [str(e)]}
+
+        result = MonitoringResult(
+            started_at,
+            Timer.now() - started_at,
+            passed,
+            skip_reason,
+            report,
+        )
+        with self._lock:
+            self._results.append(result)
+        return result
+
+    def run_forever(self):
+        while not self._stopped.is_set():
+            self.run_once()
+            self._stopped.wait(
+                jittered_interval(self._interval, self._jitter, self._rng)
+            )
+
+    def stop(self):
+        self._stopped.set()
+
+
+class StatusServer:
+    """
+    Serves results of the daemon as JSON:
+      /latest - the last result
+      /results - all kept results
+      / - counts of passed, failed and skipped runs with the last result
+    """
+
+    def __init__(self, daemon: MonitoringDaemon, host: str, port: int):
+        def get_latest() -> t.Optional[dict]:
+            result = daemon.get_latest_result()
+            return result.to_dict() if result else None
+
+        routes = {
+            "/": daemon.build_summary,
+            "/latest": get_latest,
+            "/results": lambda: [
+                result.to_dict() for result in daemon.get_results()
+            ],
+        }
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                route = routes.get(self.path.rstrip("/") or "/")
+                if route is None:
+                    self.send_error(404)
+                    return
+                body = json.dumps(route()).encode("utf8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args):
+                logger.debug(format, *args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread: t.Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="status-server",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def test_monitoring_daemon():
+    leftovers = ["2 test pods left", None, None]
+    reports = [(True, {"passed": True}), RuntimeError("forbidden")]
+
+    def run_test():
+        outcome = reports.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    daemon = MonitoringDaemon(
+        run_test, lambda: leftovers.pop(0), 60, history_size=2
+    )
+    assert daemon.run_once().skip_reason == "2 test pods left"
+    assert daemon.run_once().passed is True
+    assert daemon.run_once().report == {"errors": ["forbidden"]}
+
+    # only the last results are kept
+    summary = daemon.build_summary()
+    assert (summary["runs"], summary["passed"], summary["failed"]) == (2, 1, 1)
+
+    for _ in range(100):
+        assert 54 <= jittered_interval(60, 0.1) <= 66
@@ -1,6 +1,6 @@
-import time
-
+from over_provisioning.kuber.image_pre_puller import ImagePrePuller
 from over_provisioning.kuber.namespace import KuberNamespace
+from over_provisioning.kuber.namespace_pool import NamespacePool
 from over_provisioning.kuber.pod_deleter import PodDeleter
 
 
@@ -10,12 +10,18 @@ class EnvironmentHook:
 
 
 class CreateNamespaceHook(EnvironmentHook):
-    def __init__(self, kuber_namespace: KuberNamespace):
+    def __init__(
+        self, kuber_namespace: KuberNamespace, ready_timeout: float = 60
+    ):
         self._kuber_namespace = kuber_namespace
+        self._ready_timeout = ready_timeout
 
     def run(self):
         self._kuber_namespace.create()
-        time.sleep(2)
+        self._kuber_namespace.wait_until_active(self._ready_timeout)
+        self._kuber_namespace.wait_for_default_service_account(
+            self._ready_timeout
+        )
 
 
 class CheckNamespaceExistsHook(EnvironmentHook):
@@ -27,11 +33,21 @@ class CheckNamespaceExistsHook(EnvironmentHook):
 
 
 class DeleteNamespaceHook(EnvironmentHook):
-    def __init__(self, kuber_namespace: KuberNamespace):
+    def __init__(
+        self,
+        kuber_namespace: KuberNamespace,
+        termination_timeout: float = None,
+    ):
         self._kuber_namespace = kuber_namespace
+        # None value means namespace termination is not awaited
+        self._termination_timeout = termination_timeout
 
     def run(self):
         self._kuber_namespace.delete()
+        if self._termination_timeout is not None:
+            self._kuber_namespace.wait_until_deleted(
+                self._termination_timeout
+            )
 
 
 class CleanupAllPodsInNamespaceHook(EnvironmentHook):
@@ -40,3 +56,33 @@ class CleanupAllPodsInNamespaceHook(EnvironmentHook):
 
     def run(self):
         self._pods_deleter.delete_all()
+
+
+class ReleaseNamespaceHook(EnvironmentHook):
+    def __init__(self, namespace_pool: NamespacePool, namespace_name: str):
+        self._namespace_pool = namespace_pool
+        self._namespace_name = namespace_name
+
+    def run(self):
+        self._namespace_pool.release(self._namespace_name)
+
+
+class PrePullImagesHook(EnvironmentHook):
+    def __init__(
+        self,
+        image_pre_puller: ImagePrePuller,
+        pod_spec: dict,
+        pull_timeout: float = 600,
+    ):
+        self._image_pre_puller = image_pre_puller
+        self._pod_spec = pod_spec
+        self._pull_timeout = pull_timeout
+
+    def run(self):
+        self._image_pre_puller.create(self._pod_spec)
+        try:
+            self._image_pre_puller.wait_until_pulled(self._pull_timeout)
+        finally:
+            # pulled images stay on nodes, DaemonSet pods must not
+            # take resources of test pods
+            self._image_pre_puller.delete()
@@ -2,8 +2,11 @@ import typing as t
 
 from over_provisioning.environment.hooks import EnvironmentHook
 from over_provisioning.logger import get_logger
+from over_provisioning.timer import Timer
+from over_provisioning.tracing import get_tracer
 
 logger = get_logger()
+tracer = get_tracer()
 
 
 class EnvironmentSetuper:
@@ -15,6 +18,17 @@ class EnvironmentSetuper:
         self._create_hooks = create_hooks or []
         self._destroy_hooks = destroy_hooks or []
 
+        self._create_time: t.Optional[float] = None
+        self._destroy_time: t.Optional[float] = None
+
+    @property
+    def create_time(self) -> t.Optional[float]:
+        return self._create_time
+
+    @property
+    def destroy_time(self) -> t.Optional[float]:
+        return self._destroy_time
+
     def add_create_hook(self, hook: EnvironmentHook):
         self._create_hooks.append(hook)
 
@@ -32,9 +46,13 @@ class EnvironmentSetuper:
     def create(self) -> bool:
         try:
             logger.info("Trying to create environment")
-            for hook in self._create_hooks:
-                hook.run()
-            logger.info("Environment successfully created")
+            with tracer.span("environment_create"), Timer() as timer:
+                for hook in self._create_hooks:
+                    hook.run()
+            self._create_time = timer.elapsed
+            logger.info(
+                f"Environment successfully created. Time: {timer.elapsed}"
+            )
             return True
         except Exception:
             logger.exception(
@@ -45,9 +63,13 @@ class EnvironmentSetuper:
     def destroy(self) -> bool:
         try:
             logger.info("Trying to destroy environment")
-            for hook in self._destroy_hooks:
-                hook.run()
-            logger.info("Environment successfully destroyed")
+            with tracer.span("environment_destroy"), Timer() as timer:
+                for hook in self._destroy_hooks:
+                    hook.run()
+            self._destroy_time = timer.elapsed
+            logger.info(
+                f"Environment successfully destroyed. Time: {timer.elapsed}"
+            )
             return True
         except Exception:
             logger.exception(
@@ -0,0 +1,260 @@
+import contextlib
+import json
+import sqlite3
+import time
+import typing as t
+
+from over_provisioning.kuber.pod_template import PodTemplate
+from over_provisioning.logger import get_logger
+from over_provisioning.test.report_builder import PodMeasurement
+
+logger = get_logger()
+
+# profile of runs without test matrix
+DEFAULT_PROFILE = "default"
+# other test modes are recorded with their own profiles,
+# so trends of different modes are not mixed
+BURST_PROFILE = "burst"
+OPEN_LOOP_PROFILE = "open-loop"
+CHURN_PROFILE = "churn"
+TRACE_REPLAY_PROFILE = "trace-replay"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    cluster TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    namespace TEXT,
+    passed INTEGER NOT NULL,
+    nodes_before_start INTEGER,
+    nodes_after_end INTEGER,
+    amount_of_created_pods INTEGER,
+    average_pod_creation_time REAL,
+    extra_pod_creation_time REAL,
+    max_time_to_assign_node REAL,
+    errors_count INTEGER,
+    pod_spec TEXT,
+    report TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started_at ON runs (started_at);
+CREATE INDEX IF NOT EXISTS runs_cluster_started_at
+    ON runs (cluster, started_at);
+CREATE INDEX IF NOT EXISTS runs_profile_started_at
+    ON runs (profile, started_at);
+
+CREATE TABLE IF NOT EXISTS pod_measurements (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    pod_name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pod_measurements_run_id
+    ON pod_measurements (run_id, kind);
+"""
+
+# columns of the runs table returned by queries
+TREND_COLUMNS = (
+    "id",
+    "started_at",
+    "cluster",
+    "profile",
+    "passed",
+    "nodes_before_start",
+    "nodes_after_end",
+    "amount_of_created_pods",
+    "average_pod_creation_time",
+    "extra_pod_creation_time",
+    "max_time_to_assign_node",
+    "errors_count",
+)
+
+
+class RunMetadata(t.NamedTuple):
+    cluster: str
+    profile: str
+    namespace: str
+    pod_spec: dict
+    started_at: float
+
+
+def _max_time_to_assign_node(report: dict) -> t.Optional[float]:
+    times = [
+        op_pod["time_to_assign_node"]
+        for op_pod in report.get("over_provisioning_pods", {}).values()
+        if "time_to_assign_node" in op_pod
+    ]
+    return max(times, default=None)
+
+
+class RunsHistory:
+    """
+    SQLite database with reports of all runs:
+        >>> history = RunsHistory("history.db")
+        >>> history.add_run(metadata, passed, report, pod_measurements)
+        >>> history.query_trend(cluster="eks-prod", limit=100)
+    aggregates are stored in runs table, so trend queries do not
+    touch per pod measurements.
+    """
+
+    def __init__(self, file_path: str):
+        self._file_path = file_path
+
+    @contextlib.contextmanager
+    def _connect(self) -> t.Iterator[sqlite3.Connection]:
+        with contextlib.closing(sqlite3.connect(self._file_path)) as conn:
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.executescript(SCHEMA)
+            with conn:  # commits transaction
+                yield conn
+
+    def add_run(
+        self,
+        metadata: RunMetadata,
+        passed: bool,
+        report: dict,
+        pod_measurements: t.Iterable[PodMeasurement] = (),
+    ) -> int:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO runs (
+                    started_at, finished_at, cluster, profile, namespace,
+                    passed, nodes_before_start, nodes_after_end,
+                    amount_of_created_pods, average_pod_creation_time,
+                    extra_pod_creation_time, max_time_to_assign_node,
+                    errors_count, pod_spec, report
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    metadata.started_at,
+                    time.time(),
+                    metadata.cluster,
+                    metadata.profile,
+                    metadata.namespace,
+                    int(passed),
+                    report.get("nodes_before_start"),
+                    report.get("nodes_after_end"),
+                    report.get("amount_of_created_pods"),
+                    report.get("average_pod_creation_time"),
+                    report.get("extra_pod_creation_time"),
+                    _max_time_to_assign_node(report),
+                    len(report.get("errors", [])),
+                    json.dumps(metadata.pod_spec),
+                    json.dumps(report),
+                ),
+            )
+            run_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO pod_measurements VALUES (?, ?, ?, ?)",
+                ((run_id, *measurement) for measurement in pod_measurements),
+            )
+        logger.info(f"Run saved to history: {self._file_path}, id: {run_id}")
+        return run_id
+
+    def query_trend(
+        self,
+        cluster: str = None,
+        profile: str = None,
+        since: float = None,
+        limit: int = 50,
+    ) -> t.List[dict]:
+        """latest runs first"""
+        conditions = []
+        params: t.List[t.Any] = []
+        if cluster is not None:
+            conditions.append("cluster = ?")
+            params.append(cluster)
+        if profile is not None:
+            conditions.append("profile = ?")
+            params.append(profile)
+        if since is not None:
+            conditions.append("started_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(TREND_COLUMNS)} FROM runs {where}"
+                " ORDER BY started_at DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [dict(zip(TREND_COLUMNS, row)) for row in rows]
+
+    def get_pod_measurements(
+        self, run_id: int, kind: str = None
+    ) -> t.List[PodMeasurement]:
+        query = (
+            "SELECT pod_name, kind, duration FROM pod_measurements"
+            " WHERE run_id = ?"
+        )
+        params: t.Tuple[t.Any, ...] = (run_id,)
+        if kind is not None:
+            query += " AND kind = ?"
+            params += (kind,)
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [PodMeasurement(*row) for row in rows]
+
+
+class HistoryRecorder:
+    """saves reports of the current run(one per profile) to history"""
+
+    def __init__(self, history: RunsHistory, cluster: str):
+        self._history = history
+        self._cluster = cluster
+        self._started_at = time.time()
+
+    def record(
+        self,
+        profile: str,
+        namespace: str,
+        pod_template: PodTemplate,
+        passed: bool,
+        report: dict,
+        pod_measurements: t.Iterable[PodMeasurement],
+    ):
+        metadata = RunMetadata(
+            self._cluster,
+            profile,
+            namespace,
+            pod_template.spec,
+            self._started_at,
+        )
+        try:
+            self._history.add_run(metadata, passed, report, pod_measurements)
+        except sqlite3.Error:
+            # history must not change result of the test
+            logger.exception("Failed to save run to history")
+
+
+def test_runs_history(tmp_path):
+    history = RunsHistory(str(tmp_path / "history.db"))
+    report = {
+        "nodes_before_start": 2,
+        "nodes_after_end": 3,
+        "amount_of_created_pods": 2,
+        "average_pod_creation_time": 1.5,
+        "over_provisioning_pods": {
+            "op-1": {"creation_time": 100, "time_to_assign_node": 50},
+            "op-2": {"creation_time": 100, "time_to_assign_node": 70},
+        },
+        "errors": [],
+    }
+    for started_at, cluster in [(1, "eks"), (2, "minikube"), (3, "eks")]:
+        metadata = RunMetadata(cluster, "default", "test-ns", {}, started_at)
+        run_id = history.add_run(
+            metadata,
+            True,
+            report,
+            [PodMeasurement("test-pod-1", "creation", 1.0)],
+        )
+
+    trend = history.query_trend(cluster="eks")
+    assert [run["started_at"] for run in trend] == [3, 1]
+    assert trend[0]["max_time_to_assign_node"] == 70
+    assert trend[0]["passed"] == 1
+    assert history.get_pod_measurements(run_id) == [
+        PodMeasurement("test-pod-1", "creation", 1.0)
+    ]
@@ -0,0 +1,112 @@
+import threading
+import typing as t
+
+from kubernetes import client
+from kubernetes.client import rest
+
+from over_provisioning.timer import Timer
+
+
+class EndpointStats:
+    def __init__(self):
+        self.calls = 0
+        self.time = 0.0
+
+    def to_dict(self) -> dict:
+        return {"calls": self.calls, "time": self.time}
+
+
+class ApiCallsTracker:
+    """
+    Counts kubernetes API calls of all clients and measures time spent in them:
+      api time - whole call including response deserialization
+      io time - only HTTP request, time blocked in network I/O
+    Calls are grouped by endpoint path template, so
+    reading different pods is counted as the same endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: t.Dict[str, EndpointStats] = {}
+        self._calls_count = 0
+        self._api_time = 0.0
+        self._io_time = 0.0
+
+        self._original_call_api = None
+        self._original_request = None
+
+    @property
+    def calls_count(self) -> int:
+        return self._calls_count
+
+    @property
+    def api_time(self) -> float:
+        return self._api_time
+
+    @property
+    def io_time(self) -> float:
+        return self._io_time
+
+    def reset(self):
+        """forgets calls made so far, tracker stays installed"""
+        with self._lock:
+            self._endpoints = {}
+            self._calls_count = 0
+            self._api_time = 0.0
+            self._io_time = 0.0
+
+    def get_endpoints_stats(self) -> t.Dict[str, dict]:
+        with self._lock:
+            return {
+                endpoint: stats.to_dict()
+                for endpoint, stats in self._endpoints.items()
+            }
+
+    def _register_call(self, endpoint: str, elapsed: float):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, EndpointStats())
+            stats.calls += 1
+            stats.time += elapsed
+            self._calls_count += 1
+            self._api_time += elapsed
+
+    def _register_io(self, elapsed: float):
+        with self._lock:
+            self._io_time += elapsed
+
+    def install(self):
+        original_call_api = client.ApiClient.call_api
+        original_request = rest.RESTClientObject.request
+        tracker = self
+
+        def call_api(api_client, resource_path, method, *args, **kwargs):
+            timer = Timer()
+            timer.start()
+            try:
+                return original_call_api(
+                    api_client, resource_path, method, *args, **kwargs
+                )
+            finally:
+                tracker._register_call(
+                    f"{method} {resource_path}", timer.elapsed
+                )
+
+        def request(rest_client, *args, **kwargs):
+            timer = Timer()
+            timer.start()
+            try:
+                return original_request(rest_client, *args, **kwargs)
+            finally:
+                tracker._register_io(timer.elapsed)
+
+        self._original_call_api = original_call_api
+        self._original_request = original_request
+        client.ApiClient.call_api = call_api
+        rest.RESTClientObject.request = request
+
+    def uninstall(self):
+        if self._original_call_api:
+            client.ApiClient.call_api = self._original_call_api
+            rest.RESTClientObject.request = self._original_request
+            self._original_call_api = None
+            self._original_request = None
@@ -0,0 +1,384 @@
+import atexit
+import collections
+import functools
+import gzip
+import json
+import threading
+import time
+import typing as t
+from types import SimpleNamespace
+
+from kubernetes import client
+from kubernetes.client import models
+
+from over_provisioning.kuber.namespace_pool import LEASED_AT_ANNOTATION_KEY
+from over_provisioning.timer import Timer
+
+# response of the call is one of
+RESPONSE_ENTRY = "response"  # deserialized model
+RAW_ENTRY = "raw"  # body of response with _preload_content=False
+CHUNKS_ENTRY = "chunks"  # watch stream: [[offset, chunk], ...]
+ERROR_ENTRY = "error"  # ApiException
+
+
+class CassetteMissError(Exception):
+    def __init__(self, method_name: str, key: str):
+        self.method_name = method_name
+        self.key = key
+
+    def __str__(self):
+        return (
+            f"Call of {self.method_name} was not recorded in cassette,"
+            f" call: {self.key}"
+        )
+
+
+# annotations set to current time differ in every run
+VOLATILE_ANNOTATIONS_KEYS = (LEASED_AT_ANNOTATION_KEY,)
+VOLATILE_VALUE = "*"
+
+_serializer = client.ApiClient()
+
+
+def mask_volatile_annotations(value: t.Any) -> t.Any:
+    """serialized bodies are copied with volatile annotations values masked"""
+    if isinstance(value, list):
+        return [mask_volatile_annotations(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    masked = {
+        key: mask_volatile_annotations(item) for key, item in value.items()
+    }
+    annotations = (masked.get("metadata") or {}).get("annotations")
+    if isinstance(annotations, dict):
+        for key in VOLATILE_ANNOTATIONS_KEYS:
+            # removing of annotation is still distinguished
+            if annotations.get(key) is not None:
+                annotations[key] = VOLATILE_VALUE
+    return masked
+
+
+def build_call_key(method_name: str, args: tuple, kwargs: dict) -> str:
+    """
+    calls are matched by method and arguments, underscored options
+    like _preload_content do not change the request,
+    annotations with timestamps are not compared
+    """
+    return json.dumps(
+        [
+            method_name,
+            mask_volatile_annotations(
+                _serializer.sanitize_for_serialization(list(args))
+            ),
+            mask_volatile_annotations(
+                _serializer.sanitize_for_serialization(
+                    {
+                        key: value
+                        for key, value in kwargs.items()
+                        if not key.startswith("_")
+                    }
+                )
+            ),
+        ],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+
+def _open_cassette(file_path: str, mode: str) -> t.IO[str]:
+    if file_path.endswith(".gz"):
+        return gzip.open(file_path, mode + "t")
+    return open(file_path, mode)
+
+
+class CassetteWriter:
+    """
+    Appends one NDJSON entry per call as soon as call is finished,
+    file is gzip compressed when its name ends with .gz
+    """
+
+    def __init__(self, file_path: str):
+        self._file = _open_cassette(file_path, "w")
+        self._lock = threading.Lock()
+        self._start_time = Timer.now()
+        # file is closed by sys.exit() which finishes every test mode
+        atexit.register(self.close)
+
+    def offset(self, timestamp: float) -> float:
+        return timestamp - self._start_time
+
+    def write(self, entry: dict):
+        line = json.dumps(entry, separators=(",", ":"))
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class RecordingStream:
+    """watch response proxy which records chunks while they are read"""
+
+    def __init__(self, response, on_close: t.Callable[[list], None]):
+        self._response = response
+        self._on_close = on_close
+        self._start_time = Timer.now()
+        self._chunks: t.List[t.Tuple[float, str]] = []
+        self._closed = False
+
+    def read_chunked(self, *args, **kwargs) -> t.Iterator[bytes]:
+        for chunk in self._response.read_chunked(*args, **kwargs):
+            offset = Timer.now() - self._start_time
+            self._chunks.append((offset, chunk.decode("utf8")))
+            yield chunk
+
+    def close(self):
+        self._response.close()
+        if not self._closed:
+            self._closed = True
+            self._on_close(self._chunks)
+
+    def __getattr__(self, name: str):
+        return getattr(self._response, name)
+
+
+class RecordingKuber:
+    """
+    CoreV1Api proxy, every call with its response and timing is written
+    to cassette, so the run can be replayed by ReplayKuber without cluster
+    """
+
+    def __init__(self, kuber: client.CoreV1Api, writer: CassetteWriter):
+        self._kuber = kuber
+        self._writer = writer
+
+    def _call(self, method_name: str, *args, **kwargs):
+        entry = {
+            "key": build_call_key(method_name, args, kwargs),
+            "started": self._writer.offset(Timer.now()),
+        }
+        with Timer() as timer:
+            try:
+                result = getattr(self._kuber, method_name)(*args, **kwargs)
+            except client.rest.ApiException as e:
+                entry["elapsed"] = timer.elapsed
+                entry[ERROR_ENTRY] = {
+                    "status": e.status,
+                    "reason": e.reason,
+                    "body": e.body,
+                }
+                self._writer.write(entry)
+                raise
+        entry["elapsed"] = timer.elapsed
+
+        if kwargs.get("_preload_content", True):
+            entry[RESPONSE_ENTRY] = {
+                "type": type(result).__name__ if result is not None else None,
+                "data": _serializer.sanitize_for_serialization(result),
+            }
+        elif kwargs.get("watch"):
+
+            def write_stream(chunks: list):
+                entry[CHUNKS_ENTRY] = chunks
+                self._writer.write(entry)
+
+            return RecordingStream(result, write_stream)
+        else:
+            data = result.read()
+            result.release_conn()
+            entry[RAW_ENTRY] = data.decode("utf8")
+            result = ReplayResponse(data)
+        self._writer.write(entry)
+        return result
+
+    def __getattr__(self, method_name: str):
+        method = getattr(self._kuber, method_name)
+        if not callable(method):
+            return method
+        return functools.wraps(method)(
+            functools.partial(self._call, method_name)
+        )
+
+
+class ReplayResponse:
+    """replaces urllib3 response of calls with _preload_content=False"""
+
+    def __init__(
+        self,
+        data: bytes,
+        chunks: t.List[t.Tuple[float, str]] = (),
+        realtime: bool = False,
+    ):
+        self.data = data
+        self._chunks = chunks
+        self._realtime = realtime
+
+    def read(self, *args, **kwargs) -> bytes:
+        return self.data
+
+    def read_chunked(self, *args, **kwargs) -> t.Iterator[bytes]:
+        start_time = Timer.now()
+        for offset, chunk in self._chunks:
+            if self._realtime:
+                time.sleep(max(start_time + offset - Timer.now(), 0))
+            yield chunk.encode("utf8")
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class Cassette:
+    """recorded calls grouped by call key in order of their start"""
+
+    def __init__(self, entries: t.Iterable[dict]):
+        self._lock = threading.Lock()
+        self._calls: t.Dict[str, t.Deque[dict]] = collections.defaultdict(
+            collections.deque
+        )
+        for entry in sorted(entries, key=lambda entry: entry["started"]):
+            self._calls[entry["key"]].append(entry)
+
+    @classmethod
+    def load(cls, file_path: str) -> "Cassette":
+        with _open_cassette(file_path, "r") as f:
+            return cls(json.loads(line) for line in f if line.strip())
+
+    def next_entry(self, key: str) -> t.Optional[dict]:
+        """
+        the last recorded response is repeated when replayed run
+        polls more times than recorded one
+        """
+        with self._lock:
+            calls = self._calls.get(key)
+            if not calls:
+                return None
+            if len(calls) > 1:
+                return calls.popleft()
+            return calls[0]
+
+
+class ReplayKuber:
+    """
+    Same interface as CoreV1Api, responses are served from cassette:
+      realtime - every call takes as long as recorded one
+      otherwise - calls are returned as fast as possible
+    Watch which was not recorded returns no events after its timeout.
+    """
+
+    def __init__(self, cassette: Cassette, realtime: bool = True):
+        self._cassette = cassette
+        self._realtime = realtime
+
+    def _replay_entry(self, entry: dict):
+        if self._realtime:
+            time.sleep(entry["elapsed"])
+        if ERROR_ENTRY in entry:
+            error = entry[ERROR_ENTRY]
+            exception = client.rest.ApiException(
+                error["status"], error["reason"]
+            )
+            exception.body = error["body"]
+            raise exception
+        if CHUNKS_ENTRY in entry:
+            return ReplayResponse(b"", entry[CHUNKS_ENTRY], self._realtime)
+        if RAW_ENTRY in entry:
+            return ReplayResponse(entry[RAW_ENTRY].encode("utf8"))
+        response = entry[RESPONSE_ENTRY]
+        if response["type"] is None:
+            return None
+        if not hasattr(models, response["type"]):
+            # primitive types are stored as is
+            return response["data"]
+        return _serializer.deserialize(
+            SimpleNamespace(data=json.dumps(response["data"])),
+            response["type"],
+        )
+
+    def _call(self, method_name: str, *args, **kwargs):
+        key = build_call_key(method_name, args, kwargs)
+        entry = self._cassette.next_entry(key)
+        if entry is not None:
+            return self._replay_entry(entry)
+        if kwargs.get("watch"):
+            time.sleep(kwargs.get("timeout_seconds") or 1)
+            return ReplayResponse(b"")
+        raise CassetteMissError(method_name, key)
+
+    def __getattr__(self, method_name: str):
+        # docstring is used by kubernetes.watch to find type of objects
+        method = getattr(client.CoreV1Api, method_name)
+        return functools.wraps(method)(
+            functools.partial(self._call, method_name)
+        )
+
+
+class _FakeKuber:
+    def __init__(self, pod_list: client.V1PodList):
+        self.pod_list = pod_list
+
+    def list_namespaced_pod(self, namespace: str, **kwargs):
+        return self.pod_list
+
+    def create_namespaced_pod(self, namespace: str, body: dict, **kwargs):
+        raise client.rest.ApiException(409, "Conflict")
+
+
+def test_record_and_replay(tmp_path):
+    pod_list = client.V1PodList(
+        metadata=client.V1ListMeta(resource_version="10"),
+        items=[
+            client.V1Pod(
+                metadata=client.V1ObjectMeta(name="op-1", namespace="op"),
+                status=client.V1PodStatus(phase="Running"),
+            )
+        ],
+    )
+    file_path = str(tmp_path / "cassette.ndjson.gz")
+    writer = CassetteWriter(file_path)
+    recording_kuber = RecordingKuber(_FakeKuber(pod_list), writer)
+    recording_kuber.list_namespaced_pod("op", label_selector="app=op")
+    try:
+        recording_kuber.create_namespaced_pod("test", {"kind": "Pod"})
+    except client.rest.ApiException:
+        pass
+    writer.close()
+
+    kuber = ReplayKuber(Cassette.load(file_path), realtime=False)
+    for _ in range(2):
+        replayed = kuber.list_namespaced_pod("op", label_selector="app=op")
+        assert replayed.items[0].metadata.name == "op-1"
+        assert replayed.items[0].status.phase == "Running"
+
+    try:
+        kuber.create_namespaced_pod("test", {"kind": "Pod"})
+        assert False, "ApiException expected"
+    except client.rest.ApiException as e:
+        assert e.status == 409
+
+    try:
+        kuber.list_namespaced_pod("op", label_selector="app=other")
+        assert False, "CassetteMissError expected"
+    except CassetteMissError:
+        pass
+
+
+def test_build_call_key_masks_volatile_annotations():
+    def lease_body(leased_at: t.Optional[str]) -> dict:
+        return {
+            "metadata": {
+                "resourceVersion": "5",
+                "annotations": {LEASED_AT_ANNOTATION_KEY: leased_at},
+            }
+        }
+
+    recorded = build_call_key("patch_namespace", ("ns", lease_body("1")), {})
+    replayed = build_call_key("patch_namespace", ("ns", lease_body("2")), {})
+    released = build_call_key("patch_namespace", ("ns", lease_body(None)), {})
+    assert recorded == replayed
+    assert recorded != released
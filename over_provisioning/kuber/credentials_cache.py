@@ -0,0 +1,248 @@
+import atexit
+import datetime
+import fcntl
+import json
+import os
+import threading
+import typing as t
+
+from kubernetes import client
+from kubernetes.config.exec_provider import ExecProvider
+from kubernetes.config.kube_config import (
+    KUBE_CONFIG_DEFAULT_LOCATION,
+    _get_kube_config_loader_for_yaml_file,
+)
+
+from over_provisioning.logger import get_logger
+from over_provisioning.timer import Timer
+
+logger = get_logger()
+
+
+class CachedToken(t.NamedTuple):
+    # with "Bearer" prefix as it is sent in authorization header
+    token: str
+    expires_at: float
+    # time spent by exec plugin to obtain the token
+    obtained_in: float
+
+
+def parse_expiration(status: dict, now: float, default_ttl: float) -> float:
+    """exec plugins are not obliged to return expiration time"""
+    expiration = status.get("expirationTimestamp")
+    if not expiration:
+        return now + default_ttl
+    return datetime.datetime.fromisoformat(
+        expiration.replace("Z", "+00:00")
+    ).timestamp()
+
+
+class FileLock:
+    """advisory lock shared between processes of the same host"""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._file: t.Optional[t.IO] = None
+
+    def __enter__(self):
+        self._file = open(self._path, "a")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+class CredentialsCache:
+    """
+    Bearer tokens of exec based authentication (EKS token helper) are kept
+    in a file until they are close to expiry, so every run does not spawn
+    the helper again. File is changed under lock, concurrent runs wait for
+    the first one to obtain token and reuse it:
+        >>> cache = CredentialsCache("~/.kube/over-provisioning-tokens.json")
+        >>> configuration = cache.load_kube_config()
+    Token of loaded configuration is refreshed in background before expiry.
+    Other authentication methods are loaded without cache.
+    """
+
+    def __init__(
+        self,
+        cache_file_path: str,
+        refresh_margin: float = 60,
+        default_ttl: float = 600,
+        retry_interval: float = 5,
+    ):
+        self._cache_file_path = os.path.expanduser(cache_file_path)
+        self._refresh_margin = refresh_margin
+        self._default_ttl = default_ttl
+        self._retry_interval = retry_interval
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._auth_time = 0.0
+        self._avoided_auth_time = 0.0
+        self._stopped = threading.Event()
+
+    def _read_entries(self) -> t.Dict[str, list]:
+        try:
+            with open(self._cache_file_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            # broken file is overwritten by the next token
+            return {}
+
+    def _write_entries(self, entries: t.Dict[str, list]):
+        """replaced atomically, only owner can read tokens"""
+        tmp_path = f"{self._cache_file_path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self._cache_file_path)
+
+    def _is_fresh(self, cached_token: CachedToken) -> bool:
+        return cached_token.expires_at - self._refresh_margin > Timer.now()
+
+    def get_token(
+        self, key: str, obtain: t.Callable[[], dict]
+    ) -> CachedToken:
+        """obtain returns status of exec plugin with token"""
+        with FileLock(f"{self._cache_file_path}.lock"):
+            entries = self._read_entries()
+            if key in entries:
+                cached_token = CachedToken(*entries[key])
+                if self._is_fresh(cached_token):
+                    with self._lock:
+                        self._hits += 1
+                        self._avoided_auth_time += cached_token.obtained_in
+                    return cached_token
+
+            with Timer() as timer:
+                status = obtain()
+            if "token" not in status:
+                raise RuntimeError("Exec plugin returned no token.")
+            cached_token = CachedToken(
+                f"Bearer {status['token']}",
+                parse_expiration(status, Timer.now(), self._default_ttl),
+                timer.elapsed,
+            )
+            entries[key] = list(cached_token)
+            self._write_entries(entries)
+        with self._lock:
+            self._misses += 1
+            self._auth_time += cached_token.obtained_in
+        return cached_token
+
+    def load_kube_config(
+        self, config_file_path: str = None
+    ) -> client.Configuration:
+        """same as config.load_kube_config, configuration is set as default"""
+        config_file_path = config_file_path or KUBE_CONFIG_DEFAULT_LOCATION
+        loader = _get_kube_config_loader_for_yaml_file(
+            config_file_path, persist_config=False
+        )
+        configuration = client.Configuration()
+        user = loader._user
+        if not user or "exec" not in user:
+            loader.load_and_set(configuration)
+            client.Configuration.set_default(configuration)
+            return configuration
+
+        context = loader.current_context
+        key = ":".join(
+            (
+                os.path.abspath(os.path.expanduser(config_file_path)),
+                context["name"],
+                context["context"]["user"],
+            )
+        )
+        exec_provider = ExecProvider(user["exec"])
+        cached_token = self.get_token(key, exec_provider.run)
+        loader.token = cached_token.token
+        loader._load_cluster_info()
+        loader._set_config(configuration)
+        # copies of default configuration share api_key dict,
+        # so refreshed token is used by all clients
+        client.Configuration.set_default(configuration)
+
+        threading.Thread(
+            target=self._keep_fresh,
+            args=(key, exec_provider, configuration, cached_token),
+            name="credentials-refresher",
+            daemon=True,
+        ).start()
+        atexit.register(self.stop)
+        return configuration
+
+    def _keep_fresh(
+        self,
+        key: str,
+        exec_provider: ExecProvider,
+        configuration: client.Configuration,
+        cached_token: CachedToken,
+    ):
+        expires_at = cached_token.expires_at
+        while not self._stopped.wait(
+            max(expires_at - self._refresh_margin - Timer.now(), 0)
+        ):
+            try:
+                cached_token = self.get_token(key, exec_provider.run)
+            except Exception:
+                logger.exception("Credentials refreshing failed")
+                expires_at = Timer.now() + self._retry_interval
+                continue
+            configuration.api_key["authorization"] = cached_token.token
+            expires_at = cached_token.expires_at
+            with self._lock:
+                self._refreshes += 1
+
+    def build_report(self) -> dict:
+        with self._lock:
+            return {
+                "cache_hits": self._hits,
+                "cache_misses": self._misses,
+                "background_refreshes": self._refreshes,
+                "auth_time": self._auth_time,
+                "avoided_auth_time": self._avoided_auth_time,
+            }
+
+    def stop(self):
+        if not self._stopped.is_set():
+            self._stopped.set()
+            logger.info(f"Credentials cache: {self.build_report()}")
+
+
+def test_credentials_cache(tmp_path):
+    cache_file_path = str(tmp_path / "tokens.json")
+    statuses = [
+        {"token": "expired", "expirationTimestamp": "2020-01-01T00:00:00Z"},
+        {"token": "fresh"},
+    ]
+
+    def obtain():
+        return statuses.pop(0)
+
+    cache = CredentialsCache(cache_file_path)
+    assert cache.get_token("cluster", obtain).token == "Bearer expired"
+    assert cache.get_token("cluster", obtain).token == "Bearer fresh"
+
+    # another process reuses token from file
+    other_cache = CredentialsCache(cache_file_path)
+    cached_token = other_cache.get_token("cluster", obtain)
+    assert cached_token.token == "Bearer fresh"
+    assert other_cache.build_report()["cache_hits"] == 1
+    assert (
+        other_cache.build_report()["avoided_auth_time"]
+        == cached_token.obtained_in
+    )
+    assert cache.build_report()["cache_misses"] == 2
+    assert oct(os.stat(cache_file_path).st_mode & 0o777) == "0o600"
+
+    assert parse_expiration({}, 100, 600) == 700
+    assert parse_expiration(
+        {"expirationTimestamp": "2020-01-01T00:15:00Z"}, 0, 600
+    ) == datetime.datetime(
+        2020, 1, 1, 0, 15, tzinfo=datetime.timezone.utc
+    ).timestamp()
@@ -1,7 +1,46 @@
 from kubernetes import client, config
 
+from over_provisioning.kuber.cassette import (
+    Cassette,
+    CassetteWriter,
+    RecordingKuber,
+    ReplayKuber,
+)
+from over_provisioning.kuber.credentials_cache import CredentialsCache
 
-def create_kuber(config_file_path=None):
-    config.load_kube_config(config_file_path)
+
+def create_kuber(
+    config_file_path=None,
+    record_file_path=None,
+    replay_file_path=None,
+    replay_realtime=True,
+    credentials_cache_file_path=None,
+):
+    """
+    calls are written to cassette when record file is passed,
+    cluster is not used at all when replay file is passed
+    """
+    if replay_file_path:
+        return ReplayKuber(Cassette.load(replay_file_path), replay_realtime)
+
+    if credentials_cache_file_path:
+        CredentialsCache(credentials_cache_file_path).load_kube_config(
+            config_file_path
+        )
+    else:
+        config.load_kube_config(config_file_path)
     kuber = client.CoreV1Api()
+    if record_file_path:
+        return RecordingKuber(kuber, CassetteWriter(record_file_path))
     return kuber
+
+
+def create_apps_api() -> client.AppsV1Api:
+    """uses configuration loaded by create_kuber, calls are not recorded"""
+    return client.AppsV1Api()
+
+
+def get_cluster_name(config_file_path=None) -> str:
+    """cluster of the current kubeconfig context"""
+    _, active_context = config.list_kube_config_contexts(config_file_path)
+    return active_context["context"]["cluster"]
@@ -0,0 +1,304 @@
+import time
+import typing as t
+
+from kubernetes import client
+
+from over_provisioning.kuber.pod_template import TEST_POD_LABEL_KEY
+from over_provisioning.kuber.pods_lister import PodsLister
+from over_provisioning.logger import get_logger
+from over_provisioning.timer import Timer
+
+logger = get_logger()
+
+PAUSE_IMAGE = "k8s.gcr.io/pause:3.1"
+PRE_PULLER_LABEL_VALUE = "image-pre-puller"
+# pod spec fields which place pods on the same nodes as test pods
+_PLACEMENT_FIELDS = (
+    "nodeSelector",
+    "affinity",
+    "tolerations",
+    "imagePullSecrets",
+)
+_PRE_PULL_REQUESTS = {"requests": {"cpu": "1m", "memory": "8Mi"}}
+_PRE_PULL_CONTAINER_PREFIX = "pre-pull-"
+# image is on node, but `sh -c true` can not run(distroless images)
+_RUN_ERROR_REASONS = (
+    "CrashLoopBackOff",
+    "RunContainerError",
+    "CreateContainerError",
+)
+_PULL_ERROR_REASONS = (
+    "ErrImagePull",
+    "ImagePullBackOff",
+    "InvalidImageName",
+    "ErrImageNeverPull",
+)
+
+
+class ImagePrePullTimeoutError(Exception):
+    def __init__(self, name: str, timeout: float):
+        self.name = name
+        self.timeout = timeout
+
+    def __str__(self):
+        return (
+            f"Images pre-pulling by DaemonSet: {self.name}"
+            f" hit the limit: {self.timeout}."
+        )
+
+
+class ImagePrePullFailedError(Exception):
+    def __init__(self, name: str, image: str, reason: str):
+        self.name = name
+        self.image = image
+        self.reason = reason
+
+    def __str__(self):
+        return (
+            f"Images pre-pulling by DaemonSet: {self.name} failed,"
+            f" image: {self.image} can not be pulled: {self.reason}."
+        )
+
+
+def _get_pre_pull_statuses(
+    pod: client.V1Pod,
+) -> t.List[client.V1ContainerStatus]:
+    return [
+        status
+        for status in (pod.status and pod.status.container_statuses) or []
+        if status.name.startswith(_PRE_PULL_CONTAINER_PREFIX)
+    ]
+
+
+def is_image_pulled(status: client.V1ContainerStatus) -> bool:
+    """container was started or failed to run after its image was pulled"""
+    if status.image_id:
+        return True
+    state = status.state
+    if not state:
+        return False
+    if state.running or state.terminated:
+        return True
+    return bool(state.waiting and state.waiting.reason in _RUN_ERROR_REASONS)
+
+
+def is_pod_pulled(pod: client.V1Pod, images_quantity: int) -> bool:
+    statuses = _get_pre_pull_statuses(pod)
+    return len(statuses) >= images_quantity and all(
+        is_image_pulled(status) for status in statuses
+    )
+
+
+def find_pull_error(pod: client.V1Pod) -> t.Optional[t.Tuple[str, str]]:
+    """image and reason of container which image can not be pulled"""
+    for status in _get_pre_pull_statuses(pod):
+        waiting = status.state and status.state.waiting
+        if waiting and waiting.reason in _PULL_ERROR_REASONS:
+            return status.image, waiting.reason
+    return None
+
+
+def collect_images(pod_spec: dict) -> t.List[str]:
+    """images of serialized pod spec in order of containers"""
+    images = []
+    for container in (pod_spec.get("initContainers") or []) + (
+        pod_spec.get("containers") or []
+    ):
+        if container.get("image") and container["image"] not in images:
+            images.append(container["image"])
+    return images
+
+
+def collect_pre_pull_images(pod_spec: dict) -> t.List[str]:
+    # pulled by pause container
+    return [
+        image for image in collect_images(pod_spec) if image != PAUSE_IMAGE
+    ]
+
+
+def build_pre_pull_daemon_set(name: str, pod_spec: dict) -> dict:
+    """
+    every image runs as container which exits immediately, containers
+    are started independently(unlike init containers), so image which
+    can not run `sh` does not stop pulling of the others,
+    pause container keeps pod alive
+    """
+    labels = {TEST_POD_LABEL_KEY: PRE_PULLER_LABEL_VALUE}
+    pre_pull_containers = [
+        {
+            "name": f"{_PRE_PULL_CONTAINER_PREFIX}{index}",
+            "image": image,
+            "command": ["sh", "-c", "true"],
+            "resources": _PRE_PULL_REQUESTS,
+        }
+        for index, image in enumerate(collect_pre_pull_images(pod_spec))
+    ]
+    template_spec = {
+        field: pod_spec[field]
+        for field in _PLACEMENT_FIELDS
+        if pod_spec.get(field)
+    }
+    template_spec.update(
+        {
+            "terminationGracePeriodSeconds": 0,
+            "containers": [
+                {
+                    "name": "pause",
+                    "image": PAUSE_IMAGE,
+                    "resources": _PRE_PULL_REQUESTS,
+                }
+            ]
+            + pre_pull_containers,
+        }
+    )
+    return {
+        "apiVersion": "apps/v1",
+        "kind": "DaemonSet",
+        "metadata": {"name": name, "labels": labels},
+        "spec": {
+            "selector": {"matchLabels": labels},
+            "template": {
+                "metadata": {"labels": labels},
+                "spec": template_spec,
+            },
+        },
+    }
+
+
+class ImagePrePuller:
+    """
+    Pulls images of test pod spec onto all nodes where test pods can be
+    scheduled with short-lived DaemonSet, so registry speed is not
+    measured as pod creation time on already existent nodes.
+    Images are pulled when pre-pull containers of all pods were started,
+    even unsuccessfully, waiting fails fast when image can not be pulled.
+    """
+
+    def __init__(
+        self,
+        apps_api: client.AppsV1Api,
+        pods_lister: PodsLister,
+        namespace: str,
+        name: str = PRE_PULLER_LABEL_VALUE,
+        check_interval: float = 2,
+    ):
+        self._apps_api = apps_api
+        self._pods_lister = pods_lister
+        self._namespace = namespace
+        self._name = name
+        self._check_interval = check_interval
+        self._images_quantity = 0
+
+    def create(self, pod_spec: dict):
+        self._images_quantity = len(collect_pre_pull_images(pod_spec))
+        self._apps_api.create_namespaced_daemon_set(
+            self._namespace, build_pre_pull_daemon_set(self._name, pod_spec)
+        )
+
+    def _count_pulled_pods(self) -> int:
+        pulled = 0
+        for pod in self._pods_lister.list_by_label_selector(
+            self._namespace, f"{TEST_POD_LABEL_KEY}={PRE_PULLER_LABEL_VALUE}"
+        ):
+            pull_error = find_pull_error(pod)
+            if pull_error:
+                raise ImagePrePullFailedError(self._name, *pull_error)
+            if is_pod_pulled(pod, self._images_quantity):
+                pulled += 1
+        return pulled
+
+    def _is_pulled(self) -> bool:
+        daemon_set = self._apps_api.read_namespaced_daemon_set(
+            self._name, self._namespace
+        )
+        status = daemon_set.status
+        if (
+            status.observed_generation is None
+            or status.observed_generation < daemon_set.metadata.generation
+        ):
+            return False
+        desired = status.desired_number_scheduled
+        pulled = self._count_pulled_pods()
+        logger.info(f"Images are pulled on {pulled} of {desired} nodes")
+        return pulled >= desired
+
+    def wait_until_pulled(self, timeout: float):
+        with Timer() as timer:
+            while not self._is_pulled():
+                if timer.elapsed > timeout:
+                    raise ImagePrePullTimeoutError(self._name, timeout)
+                time.sleep(self._check_interval)
+
+    def delete(self):
+        self._apps_api.delete_namespaced_daemon_set(
+            self._name,
+            self._namespace,
+            body=client.V1DeleteOptions(propagation_policy="Background"),
+        )
+
+
+def test_build_pre_pull_daemon_set():
+    pod_spec = {
+        "nodeSelector": {"kubernetes.io/role": "worker"},
+        "initContainers": [{"name": "init", "image": "busybox"}],
+        "containers": [
+            {"name": "test", "image": PAUSE_IMAGE},
+            {"name": "notebook", "image": "jupyter/base-notebook"},
+            {"name": "sidecar", "image": "busybox"},
+        ],
+    }
+    assert collect_images(pod_spec) == [
+        "busybox",
+        PAUSE_IMAGE,
+        "jupyter/base-notebook",
+    ]
+
+    daemon_set = build_pre_pull_daemon_set("pre-puller", pod_spec)
+    template = daemon_set["spec"]["template"]
+    assert template["spec"]["nodeSelector"] == pod_spec["nodeSelector"]
+    assert "tolerations" not in template["spec"]
+    assert [
+        container["image"] for container in template["spec"]["containers"]
+    ] == [PAUSE_IMAGE, "busybox", "jupyter/base-notebook"]
+    assert template["metadata"]["labels"] == {
+        TEST_POD_LABEL_KEY: PRE_PULLER_LABEL_VALUE
+    }
+
+
+def test_find_pull_error():
+    def create_pod(image_id: str = "", **state) -> client.V1Pod:
+        return client.V1Pod(
+            status=client.V1PodStatus(
+                container_statuses=[
+                    client.V1ContainerStatus(
+                        name="pre-pull-0",
+                        image="distroless",
+                        image_id=image_id,
+                        ready=False,
+                        restart_count=1,
+                        state=client.V1ContainerState(**state),
+                    )
+                ]
+            )
+        )
+
+    # image without `sh` is pulled anyway
+    crash_loop = client.V1ContainerStateWaiting(reason="CrashLoopBackOff")
+    assert find_pull_error(create_pod(waiting=crash_loop)) is None
+    assert is_pod_pulled(create_pod(waiting=crash_loop), 1)
+    exited = client.V1ContainerStateTerminated(exit_code=127)
+    assert is_pod_pulled(create_pod(terminated=exited), 1)
+
+    pulling = client.V1ContainerStateWaiting(reason="ContainerCreating")
+    assert find_pull_error(create_pod(waiting=pulling)) is None
+    assert not is_pod_pulled(create_pod(waiting=pulling), 1)
+    assert is_pod_pulled(create_pod("sha256:1", waiting=pulling), 1)
+    # statuses of containers are not reported yet
+    assert not is_pod_pulled(client.V1Pod(), 1)
+
+    back_off = client.V1ContainerStateWaiting(reason="ImagePullBackOff")
+    assert find_pull_error(create_pod(waiting=back_off)) == (
+        "distroless",
+        "ImagePullBackOff",
+    )
+    assert find_pull_error(client.V1Pod()) is None
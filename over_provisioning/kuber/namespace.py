@@ -1,4 +1,22 @@
-from kubernetes import client
+import math
+import typing as t
+
+from kubernetes import client, watch
+
+from over_provisioning.timer import Timer
+
+
+class NamespaceWaitingTimeoutError(Exception):
+    def __init__(self, namespace: str, condition: str, timeout: float):
+        self.namespace = namespace
+        self.condition = condition
+        self.timeout = timeout
+
+    def __str__(self):
+        return (
+            f"Namespace: {self.namespace} waiting on {self.condition}"
+            f" hit the limit: {self.timeout}."
+        )
 
 
 class KuberNamespace:
@@ -6,13 +24,32 @@ class KuberNamespace:
         self._kuber = kuber
         self._name = name
 
-    def create(self):
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def create(self, labels: t.Dict[str, str] = None):
         return self._kuber.create_namespace(
-            client.V1Namespace(metadata=client.V1ObjectMeta(name=self._name))
+            client.V1Namespace(
+                metadata=client.V1ObjectMeta(name=self._name, labels=labels)
+            )
         )
 
     def delete(self):
-        return self._kuber.delete_namespace(self._name)
+        return self._kuber.delete_namespace(
+            self._name,
+            body=client.V1DeleteOptions(propagation_policy="Background"),
+        )
+
+    def exists(self) -> bool:
+        """terminating namespace still exists"""
+        try:
+            self._kuber.read_namespace(self._name)
+        except client.rest.ApiException as e:
+            if e.status == 404:
+                return False
+            raise e
+        return True
 
     def check_if_exists(self):
         try:
@@ -25,3 +62,105 @@ class KuberNamespace:
             else:
                 raise e
         return True
+
+    @staticmethod
+    def _watch_until(
+        list_func: t.Callable,
+        predicate: t.Callable[[str, t.Any], bool],
+        timeout: float,
+        *args,
+        **kwargs,
+    ) -> bool:
+        """
+        watch starts with ADDED events for already existent objects,
+        so condition which is already satisfied is not missed
+        """
+        w = watch.Watch()
+        for event in w.stream(
+            list_func, *args, timeout_seconds=math.ceil(timeout), **kwargs
+        ):
+            if predicate(event["type"], event["object"]):
+                w.stop()
+                return True
+        return False
+
+    def wait_until_active(self, timeout: float):
+        is_active = self._watch_until(
+            self._kuber.list_namespace,
+            lambda event_type, namespace: event_type != "DELETED"
+            and namespace.status.phase == "Active",
+            timeout,
+            field_selector=f"metadata.name={self._name}",
+        )
+        if not is_active:
+            raise NamespaceWaitingTimeoutError(self._name, "Active", timeout)
+
+    def wait_for_default_service_account(self, timeout: float):
+        # pods can not be created until service account controller
+        # creates default service account in new namespace
+        is_created = self._watch_until(
+            self._kuber.list_namespaced_service_account,
+            lambda event_type, _: event_type in ("ADDED", "MODIFIED"),
+            timeout,
+            self._name,
+            field_selector="metadata.name=default",
+        )
+        if not is_created:
+            raise NamespaceWaitingTimeoutError(
+                self._name, "default ServiceAccount", timeout
+            )
+
+    def wait_until_deleted(self, timeout: float):
+        """
+        watch starts from version of read namespace, so deletion between
+        reading and watching is not missed
+        """
+        with Timer() as timer:
+            while timer.elapsed < timeout:
+                try:
+                    namespace = self._kuber.read_namespace(self._name)
+                except client.rest.ApiException as e:
+                    if e.status == 404:
+                        return
+                    raise e
+
+                is_deleted = self._watch_until(
+                    self._kuber.list_namespace,
+                    # version of too old namespace is expired,
+                    # it is read again
+                    lambda event_type, _: event_type in ("DELETED", "ERROR"),
+                    timeout - timer.elapsed,
+                    field_selector=f"metadata.name={self._name}",
+                    resource_version=namespace.metadata.resource_version,
+                )
+                if is_deleted and not self.exists():
+                    return
+        raise NamespaceWaitingTimeoutError(self._name, "termination", timeout)
+
+    def wait_until_pods_deleted(self, timeout: float):
+        """
+        pods are watched from version of the list until all listed
+        terminating pods are deleted, namespace must not get new pods
+        """
+        with Timer() as timer:
+            while timer.elapsed < timeout:
+                pods = self._kuber.list_namespaced_pod(self._name)
+                left_pods_names = {pod.metadata.name for pod in pods.items}
+                if not left_pods_names:
+                    return
+
+                def is_all_deleted(event_type: str, pod) -> bool:
+                    if event_type == "DELETED":
+                        left_pods_names.discard(pod.metadata.name)
+                    return not left_pods_names or event_type == "ERROR"
+
+                self._watch_until(
+                    self._kuber.list_namespaced_pod,
+                    is_all_deleted,
+                    timeout - timer.elapsed,
+                    self._name,
+                    resource_version=pods.metadata.resource_version,
+                )
+        raise NamespaceWaitingTimeoutError(
+            self._name, "pods termination", timeout
+        )
@@ -0,0 +1,156 @@
+import threading
+import typing as t
+
+from kubernetes import client
+
+from over_provisioning.kuber.namespace import KuberNamespace
+from over_provisioning.logger import get_logger
+from over_provisioning.timer import Timer
+
+logger = get_logger()
+
+POOL_LABEL_KEY = "over-provisioning-test/namespace-pool"
+LEASED_AT_ANNOTATION_KEY = "over-provisioning-test/leased-at"
+
+
+class NoFreeNamespaceError(Exception):
+    def __init__(self, pool_name: str):
+        self.pool_name = pool_name
+
+    def __str__(self):
+        return f"All namespaces of pool: {self.pool_name} are leased."
+
+
+class NamespacePool:
+    """
+    Keeps ready namespaces labeled with pool name, namespace is leased
+    by setting annotation with lease timestamp and released by deleting
+    all pods in it and removing the annotation.
+    Lease is guarded by resourceVersion, so concurrent runs never lease
+    the same namespace. Timestamp is renewed in background until release,
+    so only leases of crashed runs get stale however long the run is.
+    """
+
+    def __init__(
+        self,
+        kuber: client.CoreV1Api,
+        pool_name: str,
+        size: int,
+        lease_ttl: float = 3600,
+        ready_timeout: float = 60,
+        pods_termination_timeout: float = 300,
+    ):
+        self._kuber = kuber
+        self._pool_name = pool_name
+        self._size = size
+        # leases older than ttl are treated as leftovers of crashed runs
+        self._lease_ttl = lease_ttl
+        self._renew_interval = lease_ttl / 4
+        self._ready_timeout = ready_timeout
+        self._pods_termination_timeout = pods_termination_timeout
+        self._renewals: t.Dict[str, threading.Event] = {}
+
+    def _list_namespaces(self) -> t.List[client.V1Namespace]:
+        namespaces = self._kuber.list_namespace(
+            label_selector=f"{POOL_LABEL_KEY}={self._pool_name}"
+        )
+        return namespaces.items
+
+    @staticmethod
+    def _get_leased_at(namespace: client.V1Namespace) -> t.Optional[float]:
+        annotations = namespace.metadata.annotations or {}
+        leased_at = annotations.get(LEASED_AT_ANNOTATION_KEY)
+        return float(leased_at) if leased_at is not None else None
+
+    @staticmethod
+    def _is_active(namespace: client.V1Namespace) -> bool:
+        return namespace.status.phase == "Active"
+
+    def fill(self):
+        existent_names = {
+            namespace.metadata.name for namespace in self._list_namespaces()
+        }
+        for i in range(self._size):
+            name = f"{self._pool_name}-{i}"
+            if name in existent_names:
+                continue
+            logger.info(f"Creating pool namespace: {name}")
+            kuber_namespace = KuberNamespace(self._kuber, name)
+            kuber_namespace.create({POOL_LABEL_KEY: self._pool_name})
+            kuber_namespace.wait_until_active(self._ready_timeout)
+            kuber_namespace.wait_for_default_service_account(
+                self._ready_timeout
+            )
+
+    def _try_lease(self, namespace: client.V1Namespace) -> bool:
+        body = {
+            "metadata": {
+                "resourceVersion": namespace.metadata.resource_version,
+                "annotations": {LEASED_AT_ANNOTATION_KEY: str(Timer.now())},
+            }
+        }
+        try:
+            self._kuber.patch_namespace(namespace.metadata.name, body)
+        except client.rest.ApiException as e:
+            if e.status == 409:
+                # leased by other run in the meantime
+                return False
+            raise e
+        return True
+
+    def lease(self) -> str:
+        self.collect_garbage()
+        for namespace in self._list_namespaces():
+            if not self._is_active(namespace):
+                continue
+            if self._get_leased_at(namespace) is not None:
+                continue
+            if self._try_lease(namespace):
+                logger.info(f"Leased namespace: {namespace.metadata.name}")
+                self._start_renewal(namespace.metadata.name)
+                return namespace.metadata.name
+        raise NoFreeNamespaceError(self._pool_name)
+
+    def _start_renewal(self, name: str):
+        stopped = threading.Event()
+        self._renewals[name] = stopped
+        threading.Thread(
+            target=self._keep_leased,
+            args=(name, stopped),
+            name=f"lease-renewer-{name}",
+            daemon=True,
+        ).start()
+
+    def _keep_leased(self, name: str, stopped: threading.Event):
+        while not stopped.wait(self._renew_interval):
+            annotations = {LEASED_AT_ANNOTATION_KEY: str(Timer.now())}
+            try:
+                self._kuber.patch_namespace(
+                    name, {"metadata": {"annotations": annotations}}
+                )
+            except Exception:
+                logger.exception(f"Renewing lease of: {name} failed")
+
+    def release(self, name: str):
+        stopped = self._renewals.pop(name, None)
+        if stopped:
+            stopped.set()
+        self._kuber.delete_collection_namespaced_pod(name)
+        # the next lease must not see terminating pods
+        KuberNamespace(self._kuber, name).wait_until_pods_deleted(
+            self._pods_termination_timeout
+        )
+        # null value removes annotation
+        body = {"metadata": {"annotations": {LEASED_AT_ANNOTATION_KEY: None}}}
+        self._kuber.patch_namespace(name, body)
+        logger.info(f"Released namespace: {name}")
+
+    def collect_garbage(self):
+        now = Timer.now()
+        for namespace in self._list_namespaces():
+            leased_at = self._get_leased_at(namespace)
+            if leased_at is not None and now - leased_at > self._lease_ttl:
+                logger.warning(
+                    f"Lease of namespace: {namespace.metadata.name} is stale"
+                )
+                self.release(namespace.metadata.name)
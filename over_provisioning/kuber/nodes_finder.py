@@ -1,10 +1,20 @@
 from kubernetes import client
 
+from over_provisioning.kuber.nodes_inventory import NodesInventory
+
 
 class NodesFinder:
-    def __init__(self, kuber: client.CoreV1Api, label_selector: str):
+    """nodes are read from inventory without API calls when it is passed"""
+
+    def __init__(
+        self,
+        kuber: client.CoreV1Api,
+        label_selector: str,
+        inventory: NodesInventory = None,
+    ):
         self._kuber = kuber
         self._label_selector = label_selector
+        self._inventory = inventory
 
     def find_by_label_selector(self):
         """
@@ -13,9 +23,13 @@ class NodesFinder:
           label key with value: "label_key=label_value"
           list of mixed labels: "label_key,label_key_2=label_value"
         """
+        if self._inventory:
+            return self._inventory.find(self._label_selector)
         nodes = self._kuber.list_node(label_selector=self._label_selector)
         return nodes.items
 
     def find_all(self):
+        if self._inventory:
+            return self._inventory.find()
         nodes = self._kuber.list_node()
         return nodes.items
@@ -0,0 +1,308 @@
+import collections
+import threading
+import typing as t
+
+from kubernetes import client, watch
+
+from over_provisioning.label_selector import (
+    matches_label_selector,
+    parse_label_selector,
+)
+from over_provisioning.logger import get_logger
+from over_provisioning.resources import Resources
+
+logger = get_logger()
+
+# labels set by managed node groups of cloud providers and eksctl
+NODE_GROUP_LABELS = (
+    "eks.amazonaws.com/nodegroup",
+    "alpha.eksctl.io/nodegroup-name",
+    "cloud.google.com/gke-nodepool",
+    "kubernetes.azure.com/agentpool",
+)
+
+
+def get_node_group(node: client.V1Node) -> t.Optional[str]:
+    labels = node.metadata.labels or {}
+    for label in NODE_GROUP_LABELS:
+        if label in labels:
+            return labels[label]
+    return None
+
+
+def is_node_ready(node: client.V1Node) -> bool:
+    conditions = (node.status.conditions if node.status else None) or []
+    return any(
+        condition.type == "Ready" and condition.status == "True"
+        for condition in conditions
+    )
+
+
+def _indexed_requirements(label_selector: str) -> t.List[t.Tuple[str, ...]]:
+    """
+    equality, existence and set requirements of selector as index keys,
+    negative requirements are not indexed and are checked per node
+    """
+    keys = []
+    for requirement in parse_label_selector(label_selector):
+        if requirement.operator == "=":
+            (value,) = requirement.values
+            keys.append((requirement.key, value))
+        elif requirement.operator in ("exists", "in"):
+            # nodes with one of values have the key
+            keys.append((requirement.key,))
+    return keys
+
+
+class NodesInventory:
+    """
+    Keeps nodes up to date with one watch, nodes are indexed by labels,
+    node group and readiness, so queries do not call API:
+        >>> with NodesInventory(kuber) as inventory:
+        >>>     inventory.count("node-role=worker")
+    results of label selectors are memoized until nodes change,
+    which is rare, so repeated queries are O(1).
+    """
+
+    def __init__(
+        self,
+        kuber: client.CoreV1Api,
+        watch_timeout: int = 300,
+        retry_interval: float = 5,
+    ):
+        self._kuber = kuber
+        self._watch_timeout = watch_timeout
+        self._retry_interval = retry_interval
+
+        self._lock = threading.Lock()
+        self._nodes: t.Dict[str, client.V1Node] = {}
+        # (label key,) and (label key, label value) -> nodes names
+        self._labels_index: t.Dict[t.Tuple[str, ...], t.Set[str]] = (
+            collections.defaultdict(set)
+        )
+        self._node_groups_index: t.Dict[str, t.Set[str]] = (
+            collections.defaultdict(set)
+        )
+        self._ready_nodes: t.Set[str] = set()
+        self._allocatable: t.Dict[str, Resources] = {}
+        self._selectors_cache: t.Dict[str, t.FrozenSet[str]] = {}
+
+        self._resource_version: t.Optional[str] = None
+        self._watch: t.Optional[watch.Watch] = None
+        self._stopped = threading.Event()
+        self._thread: t.Optional[threading.Thread] = None
+
+    def _index(self, node: client.V1Node):
+        name = node.metadata.name
+        self._nodes[name] = node
+        for key, value in (node.metadata.labels or {}).items():
+            self._labels_index[(key,)].add(name)
+            self._labels_index[(key, value)].add(name)
+        node_group = get_node_group(node)
+        if node_group is not None:
+            self._node_groups_index[node_group].add(name)
+        if is_node_ready(node):
+            self._ready_nodes.add(name)
+        self._allocatable[name] = Resources.from_quantities(
+            node.status.allocatable if node.status else None
+        )
+
+    def _unindex(self, name: str):
+        node = self._nodes.pop(name, None)
+        if node is None:
+            return
+        for key, value in (node.metadata.labels or {}).items():
+            self._labels_index[(key,)].discard(name)
+            self._labels_index[(key, value)].discard(name)
+        node_group = get_node_group(node)
+        if node_group is not None:
+            self._node_groups_index[node_group].discard(name)
+        self._ready_nodes.discard(name)
+        self._allocatable.pop(name, None)
+
+    def _relist(self):
+        nodes_list = self._kuber.list_node()
+        with self._lock:
+            for name in list(self._nodes):
+                self._unindex(name)
+            for node in nodes_list.items:
+                self._index(node)
+            self._selectors_cache = {}
+            self._resource_version = nodes_list.metadata.resource_version
+
+    def _apply_event(self, event_type: str, node: client.V1Node):
+        with self._lock:
+            self._unindex(node.metadata.name)
+            if event_type != "DELETED":
+                self._index(node)
+            self._selectors_cache = {}
+            self._resource_version = node.metadata.resource_version
+
+    def _watch_nodes(self):
+        self._watch = watch.Watch()
+        for event in self._watch.stream(
+            self._kuber.list_node,
+            resource_version=self._resource_version,
+            timeout_seconds=self._watch_timeout,
+        ):
+            if event["type"] == "ERROR":
+                # mostly 410 Gone when resource version is too old,
+                # error is sent as event, watch is not raising it
+                logger.info(
+                    f"Nodes watch error: {event['raw_object'].get('message')}"
+                )
+                self._resource_version = None
+                return
+            self._apply_event(event["type"], event["object"])
+            if self._stopped.is_set():
+                break
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if self._resource_version is None:
+                    self._relist()
+                self._watch_nodes()
+            except Exception:
+                logger.exception("Nodes watch failed")
+                self._stopped.wait(self._retry_interval)
+
+    def start(self):
+        self._relist()
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="nodes-inventory", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._watch:
+            self._watch.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _select(self, label_selector: t.Optional[str]) -> t.FrozenSet[str]:
+        """must be called under the lock"""
+        label_selector = label_selector or ""
+        names = self._selectors_cache.get(label_selector)
+        if names is not None:
+            return names
+
+        index_keys = _indexed_requirements(label_selector)
+        if index_keys:
+            candidates = sorted(
+                (self._labels_index.get(key, set()) for key in index_keys),
+                key=len,
+            )
+            selected = set(candidates[0]).intersection(*candidates[1:])
+        else:
+            selected = set(self._nodes)
+        names = frozenset(
+            name
+            for name in selected
+            if matches_label_selector(
+                self._nodes[name].metadata.labels, label_selector
+            )
+        )
+        self._selectors_cache[label_selector] = names
+        return names
+
+    def find(self, label_selector: str = None) -> t.List[client.V1Node]:
+        with self._lock:
+            return [self._nodes[name] for name in self._select(label_selector)]
+
+    def count(self, label_selector: str = None) -> int:
+        with self._lock:
+            return len(self._select(label_selector))
+
+    def count_ready(self, label_selector: str = None) -> int:
+        with self._lock:
+            return len(self._select(label_selector) & self._ready_nodes)
+
+    def find_by_node_group(self, node_group: str) -> t.List[client.V1Node]:
+        with self._lock:
+            return [
+                self._nodes[name]
+                for name in self._node_groups_index.get(node_group, ())
+            ]
+
+    def count_by_node_group(self) -> t.Dict[str, int]:
+        with self._lock:
+            return {
+                node_group: len(names)
+                for node_group, names in self._node_groups_index.items()
+                if names
+            }
+
+    def get_allocatable(self, node_name: str) -> Resources:
+        """parsed once when node is changed"""
+        with self._lock:
+            return self._allocatable[node_name]
+
+    def get_total_allocatable(self, label_selector: str = None) -> Resources:
+        with self._lock:
+            total = Resources()
+            for name in self._select(label_selector):
+                total = total + self._allocatable[name]
+            return total
+
+
+def _create_node(
+    name: str, labels: dict, ready: bool = True, cpu: str = "2"
+) -> client.V1Node:
+    return client.V1Node(
+        metadata=client.V1ObjectMeta(
+            name=name, labels=labels, resource_version="1"
+        ),
+        status=client.V1NodeStatus(
+            allocatable={"cpu": cpu, "memory": "4Gi", "pods": "110"},
+            conditions=[
+                client.V1NodeCondition(
+                    type="Ready", status="True" if ready else "False"
+                )
+            ],
+        ),
+    )
+
+
+def test_nodes_inventory_events():
+    inventory = NodesInventory(None)
+    group_label = NODE_GROUP_LABELS[0]
+    inventory._apply_event(
+        "ADDED", _create_node("node-1", {"role": "worker", group_label: "a"})
+    )
+    inventory._apply_event(
+        "ADDED",
+        _create_node("node-2", {"role": "worker", group_label: "b"}, False),
+    )
+    inventory._apply_event("ADDED", _create_node("node-3", {"role": "infra"}))
+
+    assert inventory.count() == 3
+    assert inventory.count("role=worker") == 2
+    assert inventory.count_ready("role=worker") == 1
+    assert inventory.count("role,role!=infra") == 2
+    assert inventory.count("!role") == 0
+    assert inventory.count("role in (worker)") == 2
+    assert inventory.count("role notin (worker)") == 1
+    assert inventory.count_by_node_group() == {"a": 1, "b": 1}
+    assert inventory.get_total_allocatable("role=worker").cpu == 4000
+
+    # labels of node are changed
+    inventory._apply_event(
+        "MODIFIED", _create_node("node-2", {"role": "infra"}, cpu="4")
+    )
+    assert inventory.count("role=worker") == 1
+    assert inventory.count_by_node_group() == {"a": 1}
+    assert inventory.get_allocatable("node-2").cpu == 4000
+
+    inventory._apply_event("DELETED", _create_node("node-1", {}))
+    assert sorted(
+        node.metadata.name for node in inventory.find("role=infra")
+    ) == ["node-2", "node-3"]
+    assert len(inventory.find()) == 2
@@ -1,6 +1,10 @@
 from kubernetes import client
 
+from over_provisioning.kuber.pod_template import PodTemplate
 from over_provisioning.timer import Timer
+from over_provisioning.tracing import get_tracer
+
+tracer = get_tracer()
 
 
 class PodCreator:
@@ -10,10 +14,15 @@ class PodCreator:
         self._kuber = kuber
         self._namespace = namespace
 
-    def create_pod(self, pod_name: str, pod_spec: client.V1PodSpec) -> float:
-        with Timer() as timer:
-            pod = client.V1Pod(
-                metadata=client.V1ObjectMeta(name=pod_name), spec=pod_spec,
+    def create_pod(self, pod_name: str, pod_template: PodTemplate) -> float:
+        with tracer.span("create_pod_request"), Timer() as timer:
+            # body is already serialized, response is not deserialized
+            # into V1Pod because it is never used
+            response = self._kuber.create_namespaced_pod(
+                self._namespace,
+                pod_template.render(pod_name),
+                _preload_content=False,
             )
-            self._kuber.create_namespaced_pod(self._namespace, pod)
+            response.read()
+            response.release_conn()
         return timer.elapsed
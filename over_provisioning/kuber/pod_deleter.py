@@ -7,13 +7,26 @@ class PodDeleter:
     def __init__(self, kuber: client.CoreV1Api, namespace: str):
         self._kuber = kuber
         self._namespace = namespace
+        # test pods have no state to save, so they are killed immediately
+        self._delete_options = client.V1DeleteOptions(
+            grace_period_seconds=0, propagation_policy="Background"
+        )
 
     def delete_one(self, pod_name: str):
-        self._kuber.delete_namespaced_pod(pod_name, self._namespace)
+        self._kuber.delete_namespaced_pod(
+            pod_name, self._namespace, body=self._delete_options
+        )
 
     def delete_many(self, pods_names: t.List[str]):
+        """pods which were not created or already deleted are skipped"""
         for pod_name in pods_names:
-            self.delete_one(pod_name)
+            try:
+                self.delete_one(pod_name)
+            except client.rest.ApiException as e:
+                if e.status != 404:
+                    raise e
 
     def delete_all(self):
+        # delete options are not supported by collection deletion
+        # in current client version
         self._kuber.delete_collection_namespaced_pod(self._namespace)
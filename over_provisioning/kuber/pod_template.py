@@ -0,0 +1,98 @@
+import typing as t
+
+import yaml
+from kubernetes import client
+
+TEST_POD_LABEL_KEY = "over-provisioning-test"
+TEST_POD_LABEL_VALUE = "test-pod"
+
+
+class PodTemplate:
+    """
+    Pod spec serialized only once, per pod only metadata is rendered:
+        >>> template = PodTemplate.from_spec(eks_development_pod_spec)
+        >>> template.render("test-pod-1")
+        {"apiVersion": "v1", "kind": "Pod", "metadata": {...}, "spec": {...}}
+
+    Rendered bodies share the same spec dict, so it must not be mutated.
+    """
+
+    def __init__(self, spec: dict, labels: t.Dict[str, str] = None):
+        self._spec = spec
+        self._labels = {TEST_POD_LABEL_KEY: TEST_POD_LABEL_VALUE}
+        self._labels.update(labels or {})
+
+    @property
+    def spec(self) -> dict:
+        return self._spec
+
+    @property
+    def labels(self) -> t.Dict[str, str]:
+        return self._labels
+
+    @property
+    def label_selector(self) -> str:
+        return ",".join(
+            f"{key}={value}" for key, value in self._labels.items()
+        )
+
+    @classmethod
+    def from_spec(
+        cls, pod_spec: client.V1PodSpec, labels: t.Dict[str, str] = None
+    ) -> "PodTemplate":
+        spec = client.ApiClient().sanitize_for_serialization(pod_spec)
+        return cls(spec, labels)
+
+    @classmethod
+    def from_yaml(
+        cls, file_path: str, labels: t.Dict[str, str] = None
+    ) -> "PodTemplate":
+        """
+        file can contain whole Pod manifest or only pod spec,
+        labels from Pod manifest metadata are kept
+        """
+        with open(file_path) as f:
+            document = yaml.safe_load(f)
+
+        if not isinstance(document, dict):
+            raise ValueError(f"Pod spec file: {file_path} has wrong format.")
+
+        if document.get("kind") == "Pod":
+            manifest_labels = document.get("metadata", {}).get("labels", {})
+            return cls(document["spec"], {**manifest_labels, **(labels or {})})
+        return cls(document, labels)
+
+    def render(self, pod_name: str, labels: t.Dict[str, str] = None) -> dict:
+        pod_labels = self._labels
+        if labels:
+            pod_labels = {**self._labels, **labels}
+        return {
+            "apiVersion": "v1",
+            "kind": "Pod",
+            "metadata": {"name": pod_name, "labels": pod_labels},
+            "spec": self._spec,
+        }
+
+
+def test_pod_template_render():
+    template = PodTemplate.from_spec(
+        client.V1PodSpec(
+            containers=[client.V1Container(name="test", image="nginx")]
+        ),
+        {"profile": "small"},
+    )
+    body = template.render("test-pod-1")
+
+    assert body == {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {
+            "name": "test-pod-1",
+            "labels": {
+                TEST_POD_LABEL_KEY: TEST_POD_LABEL_VALUE,
+                "profile": "small",
+            },
+        },
+        "spec": {"containers": [{"name": "test", "image": "nginx"}]},
+    }
+    assert template.render("test-pod-2")["spec"] is body["spec"]
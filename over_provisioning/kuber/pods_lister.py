@@ -0,0 +1,24 @@
+from kubernetes import client
+
+
+class PodsLister:
+    def __init__(self, kuber: client.CoreV1Api):
+        self._kuber = kuber
+
+    def list_on_node(self, node_name: str):
+        """only pods which consume node resources(not finished)"""
+        pods = self._kuber.list_pod_for_all_namespaces(
+            field_selector=f"spec.nodeName={node_name},"
+            f"status.phase!=Succeeded,status.phase!=Failed"
+        )
+        return pods.items
+
+    def list_all(self):
+        pods = self._kuber.list_pod_for_all_namespaces()
+        return pods.items
+
+    def list_by_label_selector(self, namespace: str, label_selector: str):
+        pods = self._kuber.list_namespaced_pod(
+            namespace, label_selector=label_selector
+        )
+        return pods.items
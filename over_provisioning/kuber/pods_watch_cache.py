@@ -0,0 +1,207 @@
+import threading
+import typing as t
+
+from kubernetes import client, watch
+
+from over_provisioning.label_selector import matches_label_selector
+from over_provisioning.logger import get_logger
+
+logger = get_logger()
+
+
+class PodSelector(t.NamedTuple):
+    namespace: str
+    label_selector: str
+
+    def matches(self, pod: client.V1Pod) -> bool:
+        return (
+            pod.metadata.namespace == self.namespace
+            and matches_label_selector(
+                pod.metadata.labels, self.label_selector
+            )
+        )
+
+
+class PodNotCachedError(Exception):
+    def __init__(self, namespace: str, pod_name: str):
+        self.namespace = namespace
+        self.pod_name = pod_name
+
+    def __str__(self):
+        return (
+            f"Pod: {self.pod_name} in namespace: {self.namespace}"
+            f" not found in cache."
+        )
+
+
+class PodsWatchCache:
+    """
+    Keeps pods matching any of selectors up to date with one cluster-wide
+    watch, so pods of several namespaces and label selectors are read
+    without API calls:
+        >>> with PodsWatchCache(kuber, selectors) as cache:
+        >>>     cache.list_pods(selectors[0])
+    pods are listed once on start, watch is restarted from the last
+    resource version(relisted on watch error, e.g. too old version).
+    """
+
+    def __init__(
+        self,
+        kuber: client.CoreV1Api,
+        selectors: t.Iterable[PodSelector],
+        watch_timeout: int = 300,
+        retry_interval: float = 5,
+    ):
+        self._kuber = kuber
+        self._selectors = list(selectors)
+        self._watch_timeout = watch_timeout
+        self._retry_interval = retry_interval
+
+        self._lock = threading.Lock()
+        self._pods: t.Dict[t.Tuple[str, str], client.V1Pod] = {}
+        self._resource_version: t.Optional[str] = None
+        self._watch: t.Optional[watch.Watch] = None
+        self._stopped = threading.Event()
+        self._thread: t.Optional[threading.Thread] = None
+
+    def _is_watched(self, pod: client.V1Pod) -> bool:
+        return any(selector.matches(pod) for selector in self._selectors)
+
+    @staticmethod
+    def _key(pod: client.V1Pod) -> t.Tuple[str, str]:
+        return pod.metadata.namespace, pod.metadata.name
+
+    def _relist(self):
+        pods_list = self._kuber.list_pod_for_all_namespaces()
+        with self._lock:
+            self._pods = {
+                self._key(pod): pod
+                for pod in pods_list.items
+                if self._is_watched(pod)
+            }
+            self._resource_version = pods_list.metadata.resource_version
+
+    def _apply_event(self, event_type: str, pod: client.V1Pod):
+        key = self._key(pod)
+        with self._lock:
+            if event_type == "DELETED" or not self._is_watched(pod):
+                # labels of pod could be changed
+                self._pods.pop(key, None)
+            else:
+                self._pods[key] = pod
+            self._resource_version = pod.metadata.resource_version
+
+    def _watch_pods(self):
+        self._watch = watch.Watch()
+        for event in self._watch.stream(
+            self._kuber.list_pod_for_all_namespaces,
+            resource_version=self._resource_version,
+            timeout_seconds=self._watch_timeout,
+        ):
+            if event["type"] == "ERROR":
+                # mostly 410 Gone when resource version is too old,
+                # error is sent as event, watch is not raising it
+                logger.info(
+                    f"Pods watch error: {event['raw_object'].get('message')}"
+                )
+                self._resource_version = None
+                return
+            self._apply_event(event["type"], event["object"])
+            if self._stopped.is_set():
+                break
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if self._resource_version is None:
+                    self._relist()
+                self._watch_pods()
+            except Exception:
+                logger.exception("Pods watch failed")
+                self._stopped.wait(self._retry_interval)
+
+    def start(self):
+        self._relist()
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="pods-watch-cache", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._watch:
+            self._watch.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def list_pods(self, selector: PodSelector) -> t.List[client.V1Pod]:
+        with self._lock:
+            pods = list(self._pods.values())
+        return [pod for pod in pods if selector.matches(pod)]
+
+    def get_pod(self, namespace: str, pod_name: str) -> client.V1Pod:
+        with self._lock:
+            pod = self._pods.get((namespace, pod_name))
+        if pod is None:
+            raise PodNotCachedError(namespace, pod_name)
+        return pod
+
+
+class CachedPodReader:
+    """
+    same interface as PodReader, pod name is qualified with namespace:
+    "{namespace}/{pod name}", so pods of several namespaces can be read
+    """
+
+    def __init__(self, cache: PodsWatchCache):
+        self._cache = cache
+
+    @staticmethod
+    def qualify_pod_name(namespace: str, pod_name: str) -> str:
+        return f"{namespace}/{pod_name}"
+
+    def read(self, qualified_pod_name: str) -> client.V1Pod:
+        namespace, _, pod_name = qualified_pod_name.partition("/")
+        return self._cache.get_pod(namespace, pod_name)
+
+
+def _create_pod(
+    namespace: str, name: str, labels: dict, node_name: str = None
+) -> client.V1Pod:
+    return client.V1Pod(
+        metadata=client.V1ObjectMeta(
+            namespace=namespace, name=name, labels=labels, resource_version="1"
+        ),
+        spec=client.V1PodSpec(containers=[], node_name=node_name),
+    )
+
+
+def test_pods_watch_cache_events():
+    selector = PodSelector("op", "app=op")
+    cache = PodsWatchCache(None, [selector])
+    cache._apply_event("ADDED", _create_pod("op", "op-1", {"app": "op"}))
+    cache._apply_event("ADDED", _create_pod("op", "other", {"app": "x"}))
+    cache._apply_event("ADDED", _create_pod("test", "op-2", {"app": "op"}))
+    assert [pod.metadata.name for pod in cache.list_pods(selector)] == [
+        "op-1"
+    ]
+
+    cache._apply_event(
+        "MODIFIED", _create_pod("op", "op-1", {"app": "op"}, "node-1")
+    )
+    reader = CachedPodReader(cache)
+    assert reader.read("op/op-1").spec.node_name == "node-1"
+
+    cache._apply_event("DELETED", _create_pod("op", "op-1", {"app": "op"}))
+    assert cache.list_pods(selector) == []
+    try:
+        reader.read("op/op-1")
+        assert False, "PodNotCachedError expected"
+    except PodNotCachedError:
+        pass
@@ -0,0 +1,157 @@
+import functools
+import re
+import typing as t
+
+_SET_BASED_REQUIREMENT = re.compile(
+    r"^(?P<key>[^\s!=(),]+)\s+(?P<operator>in|notin)"
+    r"\s*\((?P<values>[^()]*)\)$"
+)
+_KEY = re.compile(r"^[^\s!=(),]+$")
+
+
+class LabelSelectorParsingError(Exception):
+    def __init__(self, label_selector: str, requirement: str):
+        self.label_selector = label_selector
+        self.requirement = requirement
+
+    def __str__(self):
+        return (
+            f"Label selector: {self.label_selector} has unsupported"
+            f" requirement: {self.requirement}."
+        )
+
+
+class LabelRequirement(t.NamedTuple):
+    key: str
+    # "exists", "!", "=", "!=", "in" or "notin"
+    operator: str
+    values: t.FrozenSet[str] = frozenset()
+
+
+def split_label_selector(label_selector: str) -> t.List[str]:
+    """splits by commas which are not inside of values set"""
+    requirements = []
+    depth = 0
+    start = 0
+    for index, char in enumerate(label_selector):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            requirements.append(label_selector[start:index])
+            start = index + 1
+    requirements.append(label_selector[start:])
+    return [
+        requirement.strip()
+        for requirement in requirements
+        if requirement.strip()
+    ]
+
+
+def _parse_requirement(
+    label_selector: str, requirement: str
+) -> LabelRequirement:
+    set_based = _SET_BASED_REQUIREMENT.match(requirement)
+    if set_based:
+        values = frozenset(
+            value.strip()
+            for value in set_based.group("values").split(",")
+            if value.strip()
+        )
+        return LabelRequirement(
+            set_based.group("key"), set_based.group("operator"), values
+        )
+
+    if requirement.startswith("!"):
+        key, operator, values = requirement[1:].strip(), "!", ()
+    elif "!=" in requirement:
+        key, value = requirement.split("!=", 1)
+        key, operator, values = key.strip(), "!=", (value.strip(),)
+    elif "=" in requirement:
+        key, value = requirement.replace("==", "=", 1).split("=", 1)
+        key, operator, values = key.strip(), "=", (value.strip(),)
+    else:
+        key, operator, values = requirement, "exists", ()
+    if not _KEY.match(key) or any(not _KEY.match(v) for v in values if v):
+        raise LabelSelectorParsingError(label_selector, requirement)
+    return LabelRequirement(key, operator, frozenset(values))
+
+
+@functools.lru_cache(maxsize=None)
+def parse_label_selector(
+    label_selector: t.Optional[str],
+) -> t.Tuple[LabelRequirement, ...]:
+    """
+    same variations as supported by API server:
+      only label key: "label_key", "!label_key"
+      label key with value: "label_key=label_value", "label_key!=label_value"
+      set of values: "label_key in (value,value_2)", "label_key notin (value)"
+      list of mixed labels: "label_key,label_key_2 in (value,value_2)"
+    """
+    if not label_selector:
+        return ()
+    return tuple(
+        _parse_requirement(label_selector, requirement)
+        for requirement in split_label_selector(label_selector)
+    )
+
+
+def _match_requirement(
+    labels: t.Dict[str, str], requirement: LabelRequirement
+) -> bool:
+    value = labels.get(requirement.key)
+    if requirement.operator == "exists":
+        return requirement.key in labels
+    if requirement.operator == "!":
+        return requirement.key not in labels
+    if requirement.operator in ("=", "in"):
+        return value in requirement.values
+    # "!=" and "notin" match labels without the key too
+    return value not in requirement.values
+
+
+def matches_label_selector(
+    labels: t.Optional[t.Dict[str, str]], label_selector: t.Optional[str]
+) -> bool:
+    """client side label selector matching, see parse_label_selector"""
+    labels = labels or {}
+    return all(
+        _match_requirement(labels, requirement)
+        for requirement in parse_label_selector(label_selector)
+    )
+
+
+def test_matches_label_selector():
+    labels = {"app": "over-prov", "kubernetes.io/role": "worker"}
+
+    assert matches_label_selector(labels, None)
+    assert matches_label_selector(labels, "app")
+    assert matches_label_selector(labels, "app=over-prov,kubernetes.io/role")
+    assert matches_label_selector(labels, "app!=test")
+    assert matches_label_selector(labels, "!test")
+    assert not matches_label_selector(labels, "app=test")
+    assert not matches_label_selector(labels, "app,test")
+    assert not matches_label_selector(None, "app")
+
+
+def test_matches_set_based_label_selector():
+    labels = {"app": "a", "kubernetes.io/role": "worker"}
+
+    assert matches_label_selector(labels, "app in (a,b)")
+    assert matches_label_selector(labels, "app in (a, b),kubernetes.io/role")
+    assert matches_label_selector(labels, "app notin (b)")
+    assert matches_label_selector(labels, "test notin (b)")
+    assert not matches_label_selector(labels, "app notin (a,b)")
+    assert not matches_label_selector(labels, "test in (a)")
+    assert split_label_selector("app in (a,b), role") == [
+        "app in (a,b)",
+        "role",
+    ]
+
+    for label_selector in ("app in a", "app > 1", "app=(a)"):
+        try:
+            parse_label_selector(label_selector)
+        except LabelSelectorParsingError:
+            continue
+        raise AssertionError(f"{label_selector} is parsed")
@@ -1,21 +1,66 @@
+import copy
+import os
 import sys
 import json
+import typing as t
 
+from over_provisioning.daemon import MonitoringDaemon, StatusServer
 from over_provisioning.environment.setuper import EnvironmentSetuper
 from over_provisioning.environment.hooks import (
     CreateNamespaceHook,
     DeleteNamespaceHook,
     CheckNamespaceExistsHook,
+    PrePullImagesHook,
+    ReleaseNamespaceHook,
+)
+from over_provisioning.history import (
+    BURST_PROFILE,
+    CHURN_PROFILE,
+    DEFAULT_PROFILE,
+    OPEN_LOOP_PROFILE,
+    TRACE_REPLAY_PROFILE,
+    HistoryRecorder,
+    RunsHistory,
 )
 from over_provisioning.kuber import factory
+from over_provisioning.kuber.image_pre_puller import ImagePrePuller
 from over_provisioning.kuber.namespace import KuberNamespace
+from over_provisioning.kuber.namespace_pool import NamespacePool
 from over_provisioning.kuber.pod_creator import PodCreator
 from over_provisioning.kuber.pod_deleter import PodDeleter
 from over_provisioning.kuber.nodes_finder import NodesFinder
+from over_provisioning.kuber.nodes_inventory import NodesInventory
 from over_provisioning.kuber.pod_reader import PodReader
+from over_provisioning.kuber.pod_template import PodTemplate
+from over_provisioning.kuber.pods_lister import PodsLister
+from over_provisioning.kuber.pods_watch_cache import (
+    CachedPodReader,
+    PodsWatchCache,
+)
 from over_provisioning.logger import get_logger
-from over_provisioning.pods_finder import LabeledPodsFinder
+from over_provisioning.pods_finder import (
+    CachedPodsFinder,
+    LabeledPodsFinder,
+    OverProvisioningPodsFinder,
+)
+from over_provisioning.profiling import flush_profiler
 from over_provisioning.settings import Settings
+from over_provisioning.simulation.simulator import SchedulingSimulator
+from over_provisioning.simulation.snapshot import ClusterSnapshot
+from over_provisioning.test.baseline_waiter import BaselineReturnWaiter
+from over_provisioning.test.burst import BurstAbsorptionTest
+from over_provisioning.test.calibration import (
+    BaselineCalibrator,
+    create_calibration_template,
+)
+from over_provisioning.test.capacity_planner import CapacityPlanner
+from over_provisioning.test.churn import ChurnTest
+from over_provisioning.test.checkpoint import RunCheckpoint
+from over_provisioning.test.coordination import (
+    MatrixCoordinator,
+    ProfileCoordination,
+)
+from over_provisioning.test.matrix import OverProvisioningTestMatrix
 from over_provisioning.test.nodes_assigning_timeout_handler import (
     NodesAssigningTimeoutHandler,
 )
@@ -24,13 +69,29 @@ from over_provisioning.test.node_assigning_waiter import NodesAssigningWaiter
 from over_provisioning.test.pod_waiter import PodWaiter
 from over_provisioning.test.pods_cleaner import PodsCleaner
 from over_provisioning.test.pods_spawner import PodsSpawner
+from over_provisioning.test.pods_startup import PodsStartupReporter
 from over_provisioning.pod_specs import (
     local_development_pod_spec,
     eks_development_pod_spec,
+    notebook_pod_specs,
 )
 from over_provisioning.test.op_pods_state import OverProvisioningPodsState
+from over_provisioning.test.open_loop import (
+    POISSON_ARRIVALS,
+    OpenLoopLoadTest,
+)
+from over_provisioning.test.op_pools_state import (
+    MultiPoolPodsState,
+    OverProvisioningPool,
+)
 from over_provisioning.test.report_builder import ReportBuilder
 from over_provisioning.test.runner import OneOverProvisioningPodTest
+from over_provisioning.test.trace_replay import (
+    TraceReplayTest,
+    load_arrival_trace,
+)
+from over_provisioning.timer import Timer
+from over_provisioning.tracing import get_tracer
 
 logger = get_logger()
 
@@ -38,11 +99,28 @@ logger = get_logger()
 def run_test(
     over_provisioning_test: OneOverProvisioningPodTest,
     max_pod_creation_time_in_seconds: float,
+    resume: bool = False,
+    history_recorder: HistoryRecorder = None,
+    kubernetes_namespace: str = None,
+    pod_template: PodTemplate = None,
 ):
     result, report = over_provisioning_test.run(
-        max_pod_creation_time_in_seconds
+        max_pod_creation_time_in_seconds, resume
     )
+    if history_recorder:
+        history_recorder.record(
+            DEFAULT_PROFILE,
+            kubernetes_namespace,
+            pod_template,
+            result,
+            report,
+            over_provisioning_test.get_pod_measurements(),
+        )
+
+    exit_with_report(result, report)
 
+
+def exit_with_report(result: bool, report: dict):
     with open("report.json", "w") as f:
         json.dump(report, f)
 
@@ -56,6 +134,713 @@ def run_test(
         sys.exit(1)
 
 
+def create_pod_template(
+    pod_spec_file: t.Optional[str], local_development: bool
+) -> PodTemplate:
+    if pod_spec_file:
+        return PodTemplate.from_yaml(pod_spec_file)
+    return PodTemplate.from_spec(
+        local_development_pod_spec
+        if local_development
+        else eks_development_pod_spec
+    )
+
+
+def create_profile_templates(
+    matrix_profiles: t.Iterable[str],
+) -> t.Dict[str, PodTemplate]:
+    """
+    profile is built-in notebook pod spec name("small", "medium", "large")
+    or name with YAML pod spec file path: "name=path/to/spec.yaml"
+    """
+    templates = {}
+    for profile in matrix_profiles:
+        name, _, file_path = profile.partition("=")
+        labels = {"profile": name}
+        if file_path:
+            templates[name] = PodTemplate.from_yaml(file_path, labels)
+        elif name in notebook_pod_specs:
+            templates[name] = PodTemplate.from_spec(
+                notebook_pod_specs[name], labels
+            )
+        else:
+            raise ValueError(
+                f"Unknown profile: {name}. Available built-in profiles:"
+                f" {', '.join(notebook_pod_specs)}"
+            )
+    return templates
+
+
+def create_environment_setuper(
+    kuber,
+    kubernetes_namespace: str,
+    create_new_namespace: bool,
+    resume: bool,
+    max_namespace_termination_time: t.Optional[float],
+    namespace_pool: t.Optional[NamespacePool],
+    pre_pull_pod_template: PodTemplate = None,
+) -> EnvironmentSetuper:
+    kubernetes_namespace_instance = KuberNamespace(kuber, kubernetes_namespace)
+
+    env_setuper = EnvironmentSetuper()
+    if namespace_pool:
+        env_setuper.add_create_hook(
+            CheckNamespaceExistsHook(kubernetes_namespace_instance)
+        )
+        env_setuper.add_destroy_hook(
+            ReleaseNamespaceHook(namespace_pool, kubernetes_namespace)
+        )
+    elif create_new_namespace and not resume:
+        env_setuper.add_create_hook(
+            CreateNamespaceHook(kubernetes_namespace_instance)
+        )
+    else:
+        # interrupted run is reattached to already existent namespace
+        env_setuper.add_create_hook(
+            CheckNamespaceExistsHook(kubernetes_namespace_instance)
+        )
+    if pre_pull_pod_template:
+        # DaemonSet is created in test namespace, so it must exist
+        env_setuper.add_create_hook(
+            PrePullImagesHook(
+                ImagePrePuller(
+                    factory.create_apps_api(),
+                    PodsLister(kuber),
+                    kubernetes_namespace,
+                ),
+                pre_pull_pod_template.spec,
+            )
+        )
+    if create_new_namespace and not namespace_pool:
+        env_setuper.add_destroy_hook(
+            DeleteNamespaceHook(
+                kubernetes_namespace_instance, max_namespace_termination_time
+            )
+        )
+    return env_setuper
+
+
+def create_op_pods_tracking(
+    kuber,
+    settings: Settings,
+    report_builder: ReportBuilder,
+    over_provisioning_pools: t.List[OverProvisioningPool] = None,
+    pods_watch_cache: PodsWatchCache = None,
+    wait_interval: float = 60,
+) -> t.Tuple[NodesAssigningWaiter, OverProvisioningPodsState]:
+    if not over_provisioning_pools:
+        node_assigning_waiter = NodesAssigningWaiter(
+            PodReader(kuber, settings.over_provisioning_pods_namespace),
+            report_builder,
+            settings.max_nodes_assigning_time,  # 60 wait on nodes assigning for 15 minutes
+            wait_interval,
+        )
+        over_provisioning_pods_state_checker = OverProvisioningPodsState(
+            LabeledPodsFinder(
+                kuber,
+                namespace=settings.over_provisioning_pods_namespace,
+                label_selector=settings.over_provisioning_pods_label_selector,
+            ),
+            node_assigning_waiter,
+        )
+        return node_assigning_waiter, over_provisioning_pods_state_checker
+
+    # all pools are read from one watch cache without API calls
+    node_assigning_waiter = NodesAssigningWaiter(
+        CachedPodReader(pods_watch_cache),
+        report_builder,
+        settings.max_nodes_assigning_time,
+        5,  # reading from cache is cheap, check often for precise time
+    )
+    pools_states = {
+        pool.name: OverProvisioningPodsState(
+            CachedPodsFinder(pods_watch_cache, pool.selector),
+            node_assigning_waiter,
+        )
+        for pool in over_provisioning_pools
+    }
+    return (
+        node_assigning_waiter,
+        MultiPoolPodsState(over_provisioning_pools, pools_states),
+    )
+
+
+def create_op_pods_finders(
+    kuber,
+    settings: Settings,
+    over_provisioning_pools: t.List[OverProvisioningPool] = None,
+    pods_watch_cache: PodsWatchCache = None,
+) -> t.List[OverProvisioningPodsFinder]:
+    if over_provisioning_pools:
+        return [
+            CachedPodsFinder(pods_watch_cache, pool.selector)
+            for pool in over_provisioning_pools
+        ]
+    return [
+        LabeledPodsFinder(
+            kuber,
+            namespace=settings.over_provisioning_pods_namespace,
+            label_selector=settings.over_provisioning_pods_label_selector,
+        )
+    ]
+
+
+def create_test(
+    kuber,
+    settings: Settings,
+    pod_template: PodTemplate,
+    env_setuper: EnvironmentSetuper,
+    bulk_fill: bool = False,
+    checkpoint_file: str = None,
+    coordination: ProfileCoordination = None,
+    over_provisioning_pools: t.List[OverProvisioningPool] = None,
+    pods_watch_cache: PodsWatchCache = None,
+    max_return_to_baseline_time: float = None,
+    nodes_inventory: NodesInventory = None,
+    calibration_pods: int = 0,
+    waves: int = 1,
+) -> OneOverProvisioningPodTest:
+    pod_creator = PodCreator(kuber, settings.kubernetes_namespace)
+    nodes_finder = NodesFinder(
+        kuber, settings.nodes_label_selector, nodes_inventory
+    )
+
+    pod_waiter = PodWaiter(
+        PodReader(kuber, settings.kubernetes_namespace),
+        0.5,  # read pod status with 0.5 seconds interval
+    )
+    report_builder = ReportBuilder()
+
+    (
+        node_assigning_waiter,
+        over_provisioning_pods_state_checker,
+    ) = create_op_pods_tracking(
+        kuber,
+        settings,
+        report_builder,
+        over_provisioning_pools,
+        pods_watch_cache,
+    )
+
+    pods_spawner = PodsSpawner(
+        pod_creator, pod_waiter, "test-pod", pod_template
+    )
+
+    nodes_assigning_timeout_handler = NodesAssigningTimeoutHandler(
+        report_builder, nodes_finder, settings.max_amount_of_nodes
+    )
+
+    pods_lister = PodsLister(kuber)
+    capacity_planner = (
+        CapacityPlanner(nodes_finder, pods_lister, pod_template)
+        if bulk_fill
+        else None
+    )
+    checkpoint = (
+        RunCheckpoint(
+            checkpoint_file,
+            pods_spawner,
+            over_provisioning_pods_state_checker,
+            node_assigning_waiter,
+            report_builder,
+            pods_lister,
+            settings.kubernetes_namespace,
+            pod_template.label_selector,
+        )
+        if checkpoint_file
+        else None
+    )
+
+    pod_creating_loop = PodCreatingLoop(
+        pods_spawner,
+        over_provisioning_pods_state_checker,
+        node_assigning_waiter,
+        nodes_assigning_timeout_handler,
+        report_builder,
+        settings.pods_to_create_quantity,
+        capacity_planner,
+        checkpoint,
+        coordination,
+        waves,
+    )
+
+    pod_deleter = PodDeleter(kuber, settings.kubernetes_namespace)
+
+    pods_cleaner = PodsCleaner(pod_deleter)
+    baseline_return_waiter = (
+        BaselineReturnWaiter(
+            nodes_finder,
+            create_op_pods_finders(
+                kuber, settings, over_provisioning_pools, pods_watch_cache
+            ),
+            max_return_to_baseline_time,
+        )
+        if max_return_to_baseline_time
+        else None
+    )
+    calibrator = (
+        BaselineCalibrator(
+            KuberNamespace(kuber, settings.kubernetes_namespace).exists,
+            PodsSpawner(
+                pod_creator,
+                pod_waiter,
+                "calibration-pod",
+                create_calibration_template(pod_template),
+            ),
+            pod_deleter,
+            calibration_pods,
+            max_pod_creation_time=settings.max_pod_creation_time_in_seconds,
+        )
+        if calibration_pods
+        else None
+    )
+    return OneOverProvisioningPodTest(
+        pod_creating_loop,
+        nodes_finder,
+        env_setuper,
+        pods_cleaner,
+        report_builder,
+        baseline_return_waiter,
+        PodsStartupReporter(
+            pods_lister,
+            settings.kubernetes_namespace,
+            pod_template.label_selector,
+        ),
+        calibrator,
+    )
+
+
+def run_burst(
+    kuber,
+    settings: Settings,
+    pod_template: PodTemplate,
+    env_setuper: EnvironmentSetuper,
+    burst_sizes: t.Tuple[int, ...],
+    over_provisioning_pools: t.List[OverProvisioningPool] = None,
+    pods_watch_cache: PodsWatchCache = None,
+    nodes_inventory: NodesInventory = None,
+    max_return_to_baseline_time: float = None,
+    history_recorder: HistoryRecorder = None,
+):
+    pod_waiter = PodWaiter(
+        PodReader(kuber, settings.kubernetes_namespace),
+        0.5,  # read pod status with 0.5 seconds interval
+    )
+    pods_spawner = PodsSpawner(
+        PodCreator(kuber, settings.kubernetes_namespace),
+        pod_waiter,
+        "test-pod",
+        pod_template,
+    )
+    node_assigning_waiter, over_provisioning_pods_state = (
+        create_op_pods_tracking(
+            kuber,
+            settings,
+            ReportBuilder(),
+            over_provisioning_pools,
+            pods_watch_cache,
+            5,  # rescheduling time of every burst is measured
+        )
+    )
+    nodes_finder = NodesFinder(
+        kuber, settings.nodes_label_selector, nodes_inventory
+    )
+    burst_test = BurstAbsorptionTest(
+        pods_spawner,
+        over_provisioning_pods_state,
+        node_assigning_waiter,
+        nodes_finder,
+        PodsLister(kuber),
+        env_setuper,
+        PodsCleaner(PodDeleter(kuber, settings.kubernetes_namespace)),
+        settings.kubernetes_namespace,
+        pod_template.label_selector,
+        BaselineReturnWaiter(
+            nodes_finder,
+            create_op_pods_finders(
+                kuber, settings, over_provisioning_pools, pods_watch_cache
+            ),
+            max_return_to_baseline_time,
+        )
+        if max_return_to_baseline_time
+        else None,
+    )
+    result, report = burst_test.run(
+        burst_sizes, settings.max_pod_creation_time_in_seconds
+    )
+    if history_recorder:
+        history_recorder.record(
+            BURST_PROFILE,
+            settings.kubernetes_namespace,
+            pod_template,
+            result,
+            report,
+            (),
+        )
+    exit_with_report(result, report)
+
+
+def run_open_loop(
+    kuber,
+    settings: Settings,
+    pod_template: PodTemplate,
+    env_setuper: EnvironmentSetuper,
+    arrival_rates: t.Tuple[float, ...],
+    arrival_process: str,
+    step_duration: float,
+    over_provisioning_pools: t.List[OverProvisioningPool] = None,
+    pods_watch_cache: PodsWatchCache = None,
+    nodes_inventory: NodesInventory = None,
+    max_return_to_baseline_time: float = None,
+    history_recorder: HistoryRecorder = None,
+):
+    node_assigning_waiter, over_provisioning_pods_state = (
+        create_op_pods_tracking(
+            kuber,
+            settings,
+            ReportBuilder(),
+            over_provisioning_pools,
+            pods_watch_cache,
+            5,  # reassigning time of every step is measured
+        )
+    )
+    open_loop_test = OpenLoopLoadTest(
+        PodCreator(kuber, settings.kubernetes_namespace),
+        PodsLister(kuber),
+        pod_template,
+        over_provisioning_pods_state,
+        node_assigning_waiter,
+        env_setuper,
+        PodsCleaner(PodDeleter(kuber, settings.kubernetes_namespace)),
+        settings.kubernetes_namespace,
+        BaselineReturnWaiter(
+            NodesFinder(kuber, settings.nodes_label_selector, nodes_inventory),
+            create_op_pods_finders(
+                kuber, settings, over_provisioning_pools, pods_watch_cache
+            ),
+            max_return_to_baseline_time,
+        )
+        if max_return_to_baseline_time
+        else None,
+        arrival_process,
+        step_duration,
+    )
+    result, report = open_loop_test.run(
+        arrival_rates, settings.max_pod_creation_time_in_seconds
+    )
+    if history_recorder:
+        history_recorder.record(
+            OPEN_LOOP_PROFILE,
+            settings.kubernetes_namespace,
+            pod_template,
+            result,
+            report,
+            (),
+        )
+    exit_with_report(result, report)
+
+
+def run_churn(
+    kuber,
+    settings: Settings,
+    pod_template: PodTemplate,
+    env_setuper: EnvironmentSetuper,
+    churn_rate: float,
+    churn_duration: float,
+    churn_amplitude: int,
+    over_provisioning_pools: t.List[OverProvisioningPool] = None,
+    pods_watch_cache: PodsWatchCache = None,
+    nodes_inventory: NodesInventory = None,
+    history_recorder: HistoryRecorder = None,
+):
+    op_pods_finders = create_op_pods_finders(
+        kuber, settings, over_provisioning_pools, pods_watch_cache
+    )
+    nodes_finder = NodesFinder(
+        kuber, settings.nodes_label_selector, nodes_inventory
+    )
+    pod_deleter = PodDeleter(kuber, settings.kubernetes_namespace)
+    churn_test = ChurnTest(
+        PodCreator(kuber, settings.kubernetes_namespace),
+        pod_deleter,
+        pod_template,
+        nodes_finder,
+        op_pods_finders,
+        CapacityPlanner(nodes_finder, PodsLister(kuber), pod_template),
+        env_setuper,
+        PodsCleaner(pod_deleter),
+        churn_rate,
+        churn_amplitude,
+    )
+    result, report = churn_test.run(churn_duration)
+    if history_recorder:
+        history_recorder.record(
+            CHURN_PROFILE,
+            settings.kubernetes_namespace,
+            pod_template,
+            result,
+            report,
+            (),
+        )
+    exit_with_report(result, report)
+
+
+def run_trace_replay(
+    kuber,
+    settings: Settings,
+    pod_template: PodTemplate,
+    env_setuper: EnvironmentSetuper,
+    arrival_trace_file: str,
+    time_compression: float,
+    nodes_inventory: NodesInventory = None,
+    history_recorder: HistoryRecorder = None,
+):
+    arrivals = load_arrival_trace(arrival_trace_file)
+    # unknown profiles fail before environment is created
+    profile_templates = create_profile_templates(
+        sorted({arrival.profile for arrival in arrivals if arrival.profile})
+    )
+    trace_replay_test = TraceReplayTest(
+        PodCreator(kuber, settings.kubernetes_namespace),
+        PodsLister(kuber),
+        NodesFinder(kuber, settings.nodes_label_selector, nodes_inventory),
+        pod_template,
+        profile_templates,
+        env_setuper,
+        PodsCleaner(PodDeleter(kuber, settings.kubernetes_namespace)),
+        ReportBuilder(),
+        settings.kubernetes_namespace,
+        time_compression,
+    )
+    result, report = trace_replay_test.run(
+        arrivals, settings.max_pod_creation_time_in_seconds
+    )
+    if history_recorder:
+        history_recorder.record(
+            TRACE_REPLAY_PROFILE,
+            settings.kubernetes_namespace,
+            pod_template,
+            result,
+            report,
+            (),
+        )
+    exit_with_report(result, report)
+
+
+def run_daemon(
+    kuber,
+    settings: Settings,
+    pod_template: PodTemplate,
+    create_new_namespace: bool,
+    max_namespace_termination_time: t.Optional[float],
+    namespace_pool: t.Optional[NamespacePool],
+    bulk_fill: bool,
+    interval: float,
+    jitter: float,
+    history_size: int,
+    port: int,
+    runs_history: RunsHistory = None,
+    cluster: str = None,
+    over_provisioning_pools: t.List[OverProvisioningPool] = None,
+    pods_watch_cache: PodsWatchCache = None,
+    max_return_to_baseline_time: float = None,
+    nodes_inventory: NodesInventory = None,
+    pre_pull_images: bool = False,
+    calibration_pods: int = 0,
+    waves: int = 1,
+):
+    """
+    client, pod template and watch caches are shared by all runs,
+    spans and profile of every run are saved separately
+    """
+    pods_lister = PodsLister(kuber)
+    # namespace of pool is leased by every run
+    namespace = KuberNamespace(kuber, settings.kubernetes_namespace)
+
+    def find_leftovers() -> t.Optional[str]:
+        if create_new_namespace and not namespace_pool and namespace.exists():
+            return f"namespace: {namespace.name} is not deleted yet"
+        if namespace_pool:
+            return None
+        left_pods = pods_lister.list_by_label_selector(
+            settings.kubernetes_namespace, pod_template.label_selector
+        )
+        if left_pods:
+            return f"{len(left_pods)} test pods are not deleted yet"
+        return None
+
+    def run_test() -> t.Tuple[bool, dict]:
+        run_settings = copy.copy(settings)
+        if namespace_pool:
+            run_settings.kubernetes_namespace = namespace_pool.lease()
+        history_recorder = (
+            HistoryRecorder(runs_history, cluster) if runs_history else None
+        )
+        test = create_test(
+            kuber,
+            run_settings,
+            pod_template,
+            create_environment_setuper(
+                kuber,
+                run_settings.kubernetes_namespace,
+                create_new_namespace,
+                False,
+                max_namespace_termination_time,
+                namespace_pool,
+                pod_template if pre_pull_images else None,
+            ),
+            bulk_fill,
+            over_provisioning_pools=over_provisioning_pools,
+            pods_watch_cache=pods_watch_cache,
+            max_return_to_baseline_time=max_return_to_baseline_time,
+            nodes_inventory=nodes_inventory,
+            calibration_pods=calibration_pods,
+            waves=waves,
+        )
+        try:
+            result, report = test.run(
+                run_settings.max_pod_creation_time_in_seconds
+            )
+        finally:
+            get_tracer().flush()
+            flush_profiler()
+        if history_recorder:
+            history_recorder.record(
+                DEFAULT_PROFILE,
+                run_settings.kubernetes_namespace,
+                pod_template,
+                result,
+                report,
+                test.get_pod_measurements(),
+            )
+        return result, report
+
+    daemon = MonitoringDaemon(
+        run_test, find_leftovers, interval, jitter, history_size
+    )
+    # only local clients can read results
+    status_server = StatusServer(daemon, "127.0.0.1", port)
+    status_server.start()
+    logger.info(f"Serving results on http://127.0.0.1:{status_server.port}")
+    try:
+        daemon.run_forever()
+    finally:
+        status_server.stop()
+
+
+def run_matrix(
+    kuber,
+    settings: Settings,
+    profile_templates: t.Dict[str, PodTemplate],
+    create_new_namespace: bool,
+    max_namespace_termination_time: t.Optional[float],
+    namespace_pool: t.Optional[NamespacePool],
+    bulk_fill: bool,
+    history_recorder: HistoryRecorder = None,
+    over_provisioning_pools: t.List[OverProvisioningPool] = None,
+    pods_watch_cache: PodsWatchCache = None,
+    nodes_inventory: NodesInventory = None,
+    calibration_pods: int = 0,
+    waves: int = 1,
+    pre_pull_images: bool = False,
+):
+    coordinator = MatrixCoordinator(profile_templates)
+    tests = {}
+    coordinations = {}
+    namespaces = {}
+    for profile, pod_template in profile_templates.items():
+        # every profile is running in its own namespace
+        profile_settings = copy.copy(settings)
+        if namespace_pool:
+            profile_settings.kubernetes_namespace = namespace_pool.lease()
+        else:
+            profile_settings.kubernetes_namespace = (
+                f"{settings.kubernetes_namespace}-{profile}"
+            )
+
+        env_setuper = create_environment_setuper(
+            kuber,
+            profile_settings.kubernetes_namespace,
+            create_new_namespace,
+            False,
+            max_namespace_termination_time,
+            namespace_pool,
+            # images of every profile are pulled in its namespace
+            pod_template if pre_pull_images else None,
+        )
+        namespaces[profile] = profile_settings.kubernetes_namespace
+        coordinations[profile] = coordinator.for_profile(profile)
+        tests[profile] = create_test(
+            kuber,
+            profile_settings,
+            pod_template,
+            env_setuper,
+            bulk_fill,
+            coordination=coordinations[profile],
+            over_provisioning_pools=over_provisioning_pools,
+            pods_watch_cache=pods_watch_cache,
+            nodes_inventory=nodes_inventory,
+            calibration_pods=calibration_pods,
+            waves=waves,
+        )
+
+    result, report = OverProvisioningTestMatrix(tests, coordinations).run(
+        settings.max_pod_creation_time_in_seconds
+    )
+    if history_recorder:
+        for profile, profile_report in report["profiles"].items():
+            history_recorder.record(
+                profile,
+                namespaces[profile],
+                profile_templates[profile],
+                profile_report["passed"],
+                profile_report,
+                tests[profile].get_pod_measurements(),
+            )
+    exit_with_report(result, report)
+
+
+def run_dry_run(
+    kuber,
+    settings: Settings,
+    pod_template: PodTemplate,
+    cluster_snapshot_file: t.Optional[str],
+):
+    if cluster_snapshot_file and os.path.exists(cluster_snapshot_file):
+        logger.info(f"Loading cluster snapshot: {cluster_snapshot_file}")
+        snapshot = ClusterSnapshot.load(cluster_snapshot_file)
+    else:
+        logger.info("Taking cluster snapshot")
+        snapshot = ClusterSnapshot.from_cluster(kuber)
+        if cluster_snapshot_file:
+            snapshot.save(cluster_snapshot_file)
+
+    with Timer() as timer:
+        result = SchedulingSimulator(
+            snapshot,
+            settings.nodes_label_selector,
+            settings.over_provisioning_pods_namespace,
+            settings.over_provisioning_pods_label_selector,
+            pod_template,
+            settings.max_amount_of_nodes,
+            settings.pods_to_create_quantity,
+        ).run()
+    logger.info(f"Simulation time: {timer.elapsed}")
+
+    report = result.build_report()
+    with open("dry_run_report.json", "w") as f:
+        json.dump(report, f)
+
+    logger.info(f"DRY RUN REPORT: \n{report}")
+
+    if result.passed:
+        logger.info("Test is predicted to pass ......")
+        sys.exit(0)
+    else:
+        logger.info("Test is predicted to fail ......")
+        sys.exit(1)
+
+
 def main(
     kubernetes_conf_path: str,
     kubernetes_namespace: str,
@@ -68,7 +853,52 @@ def main(
     local_development: bool,
     max_amount_of_nodes: int,
     max_nodes_assigning_time: int,
+    pod_spec_file: str = None,
+    bulk_fill: bool = False,
+    dry_run: bool = False,
+    cluster_snapshot_file: str = None,
+    checkpoint_file: str = None,
+    resume: bool = False,
+    max_namespace_termination_time: float = None,
+    namespace_pool_size: int = None,
+    matrix_profiles: t.Tuple[str, ...] = (),
+    history_file: str = None,
+    over_provisioning_pools: t.Tuple[str, ...] = (),
+    burst_sizes: t.Tuple[int, ...] = (),
+    arrival_rates: t.Tuple[float, ...] = (),
+    arrival_process: str = POISSON_ARRIVALS,
+    open_loop_step_duration: float = 300,
+    arrival_trace_file: str = None,
+    time_compression: float = 1,
+    record_file: str = None,
+    replay_file: str = None,
+    replay_realtime: bool = True,
+    churn_rate: float = None,
+    churn_duration: float = 1800,
+    churn_amplitude: int = 2,
+    max_return_to_baseline_time: float = None,
+    daemon_interval: float = None,
+    daemon_jitter: float = 0.1,
+    daemon_history_size: int = 100,
+    daemon_port: int = 8080,
+    watch_nodes: bool = False,
+    pre_pull_images: bool = False,
+    calibration_pods: int = 0,
+    credentials_cache_file: str = None,
+    waves: int = 1,
 ):
+    pools = [
+        OverProvisioningPool.from_string(pool)
+        for pool in over_provisioning_pools
+    ]
+    if pools and over_provisioning_pods_namespace is None:
+        # single pool options are still used by dry run
+        first_pool_selector = pools[0].selector
+        over_provisioning_pods_namespace = first_pool_selector.namespace
+        over_provisioning_pods_label_selector = (
+            first_pool_selector.label_selector
+        )
+
     settings = Settings(
         kubernetes_namespace,
         max_pod_creation_time,
@@ -79,75 +909,198 @@ def main(
         max_amount_of_nodes,
         max_nodes_assigning_time,
     )
-    kuber = factory.create_kuber(kubernetes_conf_path)
+    pod_template = create_pod_template(pod_spec_file, local_development)
+    if (
+        dry_run
+        and cluster_snapshot_file
+        and os.path.exists(cluster_snapshot_file)
+    ):
+        # saved snapshot is simulated without kube config and credentials
+        run_dry_run(None, settings, pod_template, cluster_snapshot_file)
 
-    kubernetes_namespace_instance = KuberNamespace(kuber, kubernetes_namespace)
-    over_provisioning_pods_finder = LabeledPodsFinder(
-        kuber,
-        namespace=settings.over_provisioning_pods_namespace,
-        label_selector=settings.over_provisioning_pods_label_selector,
+    kuber = factory.create_kuber(
+        kubernetes_conf_path,
+        record_file,
+        replay_file,
+        replay_realtime,
+        credentials_cache_file,
     )
-    pod_creator = PodCreator(kuber, settings.kubernetes_namespace)
-    nodes_finder = NodesFinder(kuber, settings.nodes_label_selector)
+    if dry_run:
+        run_dry_run(kuber, settings, pod_template, cluster_snapshot_file)
 
-    pod_waiter = PodWaiter(
-        PodReader(kuber, settings.kubernetes_namespace),
-        0.5,  # read pod status with 0.5 seconds interval
+    # replayed run is not a new measurement of the cluster
+    runs_history = (
+        RunsHistory(history_file) if history_file and not replay_file else None
     )
-    report_builder = ReportBuilder()
-
-    node_assigning_waiter = NodesAssigningWaiter(
-        PodReader(kuber, settings.over_provisioning_pods_namespace),
-        report_builder,
-        max_nodes_assigning_time,  # 60 wait on nodes assigning for 15 minutes
+    cluster = (
+        factory.get_cluster_name(kubernetes_conf_path)
+        if runs_history
+        else None
     )
-
-    pod_spec = (
-        local_development_pod_spec
-        if local_development
-        else eks_development_pod_spec
+    history_recorder = (
+        HistoryRecorder(runs_history, cluster) if runs_history else None
     )
 
-    pods_spawner = PodsSpawner(pod_creator, pod_waiter, "test-pod", pod_spec)
-    over_provisioning_pods_state_checker = OverProvisioningPodsState(
-        over_provisioning_pods_finder, node_assigning_waiter
-    )
+    namespace_pool = None
+    if namespace_pool_size:
+        if resume:
+            raise RuntimeError(
+                "Namespace pool can not be used to resume test,"
+                " provide leased namespace instead."
+            )
+        # namespace option is used as pool name
+        namespace_pool = NamespacePool(
+            kuber, settings.kubernetes_namespace, namespace_pool_size
+        )
+        namespace_pool.fill()
 
-    nodes_assigning_timeout_handler = NodesAssigningTimeoutHandler(
-        report_builder, nodes_finder, settings.max_amount_of_nodes
-    )
+    pods_watch_cache = None
+    if pools:
+        pods_watch_cache = PodsWatchCache(
+            kuber, [pool.selector for pool in pools]
+        )
+        # watch thread is daemon, it is stopped with the process
+        pods_watch_cache.start()
 
-    pod_creating_loop = PodCreatingLoop(
-        pods_spawner,
-        over_provisioning_pods_state_checker,
-        node_assigning_waiter,
-        nodes_assigning_timeout_handler,
-        report_builder,
-        pods_to_create_quantity,
-    )
+    nodes_inventory = None
+    if watch_nodes:
+        nodes_inventory = NodesInventory(kuber)
+        nodes_inventory.start()
 
-    env_setuper = EnvironmentSetuper()
-    if create_new_namespace:
-        env_setuper.add_create_hook(
-            CreateNamespaceHook(kubernetes_namespace_instance)
+    if matrix_profiles:
+        run_matrix(
+            kuber,
+            settings,
+            create_profile_templates(matrix_profiles),
+            create_new_namespace,
+            max_namespace_termination_time,
+            namespace_pool,
+            bulk_fill,
+            history_recorder,
+            pools,
+            pods_watch_cache,
+            nodes_inventory,
+            calibration_pods,
+            waves,
+            pre_pull_images and not replay_file,
         )
-        env_setuper.add_destroy_hook(
-            DeleteNamespaceHook(kubernetes_namespace_instance)
+
+    if daemon_interval:
+        run_daemon(
+            kuber,
+            settings,
+            pod_template,
+            create_new_namespace,
+            max_namespace_termination_time,
+            namespace_pool,
+            bulk_fill,
+            daemon_interval,
+            daemon_jitter,
+            daemon_history_size,
+            daemon_port,
+            runs_history,
+            cluster,
+            pools,
+            pods_watch_cache,
+            max_return_to_baseline_time,
+            nodes_inventory,
+            # replayed run does not touch the cluster
+            pre_pull_images and not replay_file,
+            calibration_pods,
+            waves,
         )
-    else:
-        env_setuper.add_create_hook(
-            CheckNamespaceExistsHook(kubernetes_namespace_instance)
+        return
+
+    if namespace_pool:
+        settings.kubernetes_namespace = namespace_pool.lease()
+
+    env_setuper = create_environment_setuper(
+        kuber,
+        settings.kubernetes_namespace,
+        create_new_namespace,
+        resume,
+        max_namespace_termination_time,
+        namespace_pool,
+        # replayed run does not touch the cluster
+        pod_template if pre_pull_images and not replay_file else None,
+    )
+    if arrival_trace_file:
+        run_trace_replay(
+            kuber,
+            settings,
+            pod_template,
+            env_setuper,
+            arrival_trace_file,
+            time_compression,
+            nodes_inventory,
+            history_recorder,
         )
 
-    pod_deleter = PodDeleter(kuber, settings.kubernetes_namespace)
+    if arrival_rates:
+        run_open_loop(
+            kuber,
+            settings,
+            pod_template,
+            env_setuper,
+            arrival_rates,
+            arrival_process,
+            open_loop_step_duration,
+            pools,
+            pods_watch_cache,
+            nodes_inventory,
+            max_return_to_baseline_time,
+            history_recorder,
+        )
 
-    pods_cleaner = PodsCleaner(pod_deleter)
-    test_runner = OneOverProvisioningPodTest(
-        pod_creating_loop,
-        nodes_finder,
+    if churn_rate:
+        run_churn(
+            kuber,
+            settings,
+            pod_template,
+            env_setuper,
+            churn_rate,
+            churn_duration,
+            churn_amplitude,
+            pools,
+            pods_watch_cache,
+            nodes_inventory,
+            history_recorder,
+        )
+
+    if burst_sizes:
+        run_burst(
+            kuber,
+            settings,
+            pod_template,
+            env_setuper,
+            burst_sizes,
+            pools,
+            pods_watch_cache,
+            nodes_inventory,
+            max_return_to_baseline_time,
+            history_recorder,
+        )
+
+    test_runner = create_test(
+        kuber,
+        settings,
+        pod_template,
         env_setuper,
-        pods_cleaner,
-        report_builder,
+        bulk_fill,
+        checkpoint_file,
+        over_provisioning_pools=pools,
+        pods_watch_cache=pods_watch_cache,
+        max_return_to_baseline_time=max_return_to_baseline_time,
+        nodes_inventory=nodes_inventory,
+        calibration_pods=calibration_pods,
+        waves=waves,
     )
 
-    run_test(test_runner, settings.max_pod_creation_time_in_seconds)
+    run_test(
+        test_runner,
+        settings.max_pod_creation_time_in_seconds,
+        resume,
+        history_recorder,
+        settings.kubernetes_namespace,
+        pod_template,
+    )
@@ -20,3 +20,30 @@ eks_development_pod_spec = client.V1PodSpec(
         )
     ],
 )
+
+
+def create_notebook_pod_spec(cpu: str, memory: str) -> client.V1PodSpec:
+    """same as eks development pod spec with different requests"""
+    return client.V1PodSpec(
+        scheduler_name="default-scheduler",
+        priority=0,
+        priority_class_name="default",
+        node_selector={"kubernetes.io/role": "worker",},
+        containers=[
+            client.V1Container(
+                resources={
+                    "limits": {"memory": memory},
+                    "requests": {"cpu": cpu, "memory": memory},
+                },
+                name="test",
+                image="k8s.gcr.io/pause:3.1",
+            )
+        ],
+    )
+
+
+notebook_pod_specs = {
+    "small": create_notebook_pod_spec("500m", "1Gi"),
+    "medium": create_notebook_pod_spec("1", "4Gi"),
+    "large": create_notebook_pod_spec("2", "8Gi"),
+}
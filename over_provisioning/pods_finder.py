@@ -2,6 +2,10 @@ import typing as t
 
 from kubernetes import client
 
+from over_provisioning.kuber.pods_watch_cache import (
+    PodSelector,
+    PodsWatchCache,
+)
 from over_provisioning.logger import get_logger
 
 logger = get_logger()
@@ -10,6 +14,21 @@ logger = get_logger()
 class Pod(t.NamedTuple):
     name: str
     node_name: str
+    # unknown for pods saved by checkpoints of previous versions
+    phase: t.Optional[str] = None
+
+    @property
+    def is_running(self) -> bool:
+        """scheduled pod can still be pulling images"""
+        return self.phase == "Running"
+
+
+def _to_pod(pod: client.V1Pod) -> Pod:
+    return Pod(
+        pod.metadata.name,
+        pod.spec.node_name,
+        pod.status.phase if pod.status else None,
+    )
 
 
 class OverProvisioningPodsFinder:
@@ -32,7 +51,48 @@ class LabeledPodsFinder(OverProvisioningPodsFinder):
         pods_list: client.models.v1_pod_list.V1PodList = self._kuber.list_namespaced_pod(
             self._namespace, label_selector=self._label_selector
         )
-        return [
-            Pod(pod.metadata.name, pod.spec.node_name)
-            for pod in pods_list.items
-        ]
+        return [_to_pod(pod) for pod in pods_list.items]
+
+
+class CachedPodsFinder(OverProvisioningPodsFinder):
+    """finds pods in watch cache instead of listing them"""
+
+    def __init__(self, cache: PodsWatchCache, selector: PodSelector):
+        self._cache = cache
+        self._selector = selector
+
+    def find_pods(self) -> t.List[Pod]:
+        return [_to_pod(pod) for pod in self._cache.list_pods(self._selector)]
+
+
+def count_running_pods(
+    finders: t.Iterable[OverProvisioningPodsFinder],
+) -> int:
+    """over provisioning pods of all pools which hold headroom"""
+    return sum(
+        1
+        for finder in finders
+        for pod in finder.find_pods()
+        if pod.is_running
+    )
+
+
+def test_count_running_pods():
+    class StaticPodsFinder(OverProvisioningPodsFinder):
+        def __init__(self, pods: t.List[Pod]):
+            self._pods = pods
+
+        def find_pods(self) -> t.List[Pod]:
+            return self._pods
+
+    finders = [
+        StaticPodsFinder(
+            [
+                Pod("op-1", "node-1", "Running"),
+                Pod("op-2", "node-1", "Pending"),
+            ]
+        ),
+        # phase of pod restored from old checkpoint is unknown
+        StaticPodsFinder([Pod("op-3", None, "Pending"), Pod("op-4", "node")]),
+    ]
+    assert count_running_pods(finders) == 1
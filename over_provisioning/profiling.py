@@ -0,0 +1,158 @@
+import cProfile
+import contextlib
+import io
+import json
+import pstats
+import time
+import tracemalloc
+import typing as t
+
+from over_provisioning.kuber.api_calls import ApiCallsTracker
+from over_provisioning.logger import get_logger
+from over_provisioning.timer import Timer
+
+logger = get_logger()
+
+_active_profiler: t.Optional["RunProfiler"] = None
+
+
+class RunProfiler:
+    """
+    Wraps the run with cProfile and tracemalloc:
+        >>> with RunProfiler("profile"):
+        >>>     main(...)
+    creates "profile.pstats" and "profile_summary.json" with
+    time blocked in API I/O, process CPU time and top allocation sites.
+    cProfile sees only the main thread, CPU time includes all threads.
+    Daemon saves results of every run separately with flush.
+    """
+
+    def __init__(
+        self,
+        output_prefix: str,
+        top_functions: int = 30,
+        top_allocations: int = 20,
+    ):
+        self._output_prefix = output_prefix
+        self._top_functions = top_functions
+        self._top_allocations = top_allocations
+
+        self._profile = cProfile.Profile()
+        self._api_calls_tracker = ApiCallsTracker()
+        self._timer = Timer()
+        self._cpu_start_time = 0.0
+        self._flushes = 0
+
+    @staticmethod
+    def _get_pstats_file_path(output_prefix: str) -> str:
+        return f"{output_prefix}.pstats"
+
+    @staticmethod
+    def _get_summary_file_path(output_prefix: str) -> str:
+        return f"{output_prefix}_summary.json"
+
+    def _start(self):
+        self._timer = Timer()
+        self._timer.start()
+        self._cpu_start_time = time.process_time()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def _save(self, output_prefix: str):
+        self._profile.disable()
+        self._timer.end()
+        cpu_time = time.process_time() - self._cpu_start_time
+        allocations_snapshot = tracemalloc.take_snapshot()
+
+        self._profile.dump_stats(self._get_pstats_file_path(output_prefix))
+        self._log_top_functions()
+
+        summary = self._build_summary(
+            cpu_time, allocations_snapshot, output_prefix
+        )
+        with open(self._get_summary_file_path(output_prefix), "w") as f:
+            json.dump(summary, f)
+        logger.info(f"PROFILE SUMMARY: \n{summary}")
+
+    def __enter__(self):
+        global _active_profiler
+        self._api_calls_tracker.install()
+        tracemalloc.start()
+        self._start()
+        _active_profiler = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _active_profiler
+        _active_profiler = None
+        # sys.exit is called at the end of the run, results are saved anyway
+        self._save(self._output_prefix)
+        tracemalloc.stop()
+        self._api_calls_tracker.uninstall()
+        return False  # reraise exception
+
+    def flush(self):
+        """
+        saves results measured so far with "{prefix}-{N}" prefix
+        and starts measuring from scratch
+        """
+        self._flushes += 1
+        self._save(f"{self._output_prefix}-{self._flushes}")
+        tracemalloc.clear_traces()
+        self._api_calls_tracker.reset()
+        self._start()
+
+    def _log_top_functions(self):
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=stream)
+        stats.sort_stats("cumulative").print_stats(self._top_functions)
+        logger.info(f"Top functions by cumulative time:\n{stream.getvalue()}")
+
+    def _get_top_allocations(
+        self, snapshot: tracemalloc.Snapshot
+    ) -> t.List[dict]:
+        return [
+            {
+                "location": str(stat.traceback),
+                "size": stat.size,
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[: self._top_allocations]
+        ]
+
+    def _build_summary(
+        self,
+        cpu_time: float,
+        snapshot: tracemalloc.Snapshot,
+        output_prefix: str,
+    ) -> dict:
+        wall_time = self._timer.elapsed
+        tracker = self._api_calls_tracker
+        return {
+            "wall_time": wall_time,
+            "cpu_time": cpu_time,
+            # calls from concurrent threads can overlap,
+            # so io time can exceed wall time
+            "api_io_time": tracker.io_time,
+            "api_time": tracker.api_time,
+            "api_deserialization_time": tracker.api_time - tracker.io_time,
+            "api_calls": tracker.calls_count,
+            "api_endpoints": tracker.get_endpoints_stats(),
+            "not_cpu_nor_api_time": max(
+                wall_time - cpu_time - tracker.io_time, 0
+            ),
+            "top_allocations": self._get_top_allocations(snapshot),
+            "pstats_file": self._get_pstats_file_path(output_prefix),
+        }
+
+
+def create_profiler(output_prefix: t.Optional[str]) -> t.ContextManager:
+    if output_prefix:
+        return RunProfiler(output_prefix)
+    return contextlib.nullcontext()
+
+
+def flush_profiler():
+    """saves results of the finished daemon run when run is profiled"""
+    if _active_profiler is not None:
+        _active_profiler.flush()
@@ -0,0 +1,164 @@
+import typing as t
+
+_MEMORY_SUFFIXES = {
+    "Ki": 2 ** 10,
+    "Mi": 2 ** 20,
+    "Gi": 2 ** 30,
+    "Ti": 2 ** 40,
+    "Pi": 2 ** 50,
+    "Ei": 2 ** 60,
+    "k": 10 ** 3,
+    "M": 10 ** 6,
+    "G": 10 ** 9,
+    "T": 10 ** 12,
+    "P": 10 ** 15,
+    "E": 10 ** 18,
+}
+
+
+def parse_cpu(quantity: t.Union[str, int, float, None]) -> int:
+    """returns cpu quantity in millicores: "200m" -> 200, "2" -> 2000"""
+    if quantity is None:
+        return 0
+    quantity = str(quantity)
+    if quantity.endswith("m"):
+        return int(float(quantity[:-1]))
+    return int(float(quantity) * 1000)
+
+
+def parse_memory(quantity: t.Union[str, int, float, None]) -> int:
+    """returns memory quantity in bytes: "512Mi" -> 536870912"""
+    if quantity is None:
+        return 0
+    quantity = str(quantity)
+    for suffix in ("Ki", "Mi", "Gi", "Ti", "Pi", "Ei"):
+        if quantity.endswith(suffix):
+            return int(float(quantity[:-2]) * _MEMORY_SUFFIXES[suffix])
+    if quantity[-1] in _MEMORY_SUFFIXES:
+        return int(float(quantity[:-1]) * _MEMORY_SUFFIXES[quantity[-1]])
+    return int(float(quantity))
+
+
+class Resources(t.NamedTuple):
+    cpu: int = 0  # millicores
+    memory: int = 0  # bytes
+    pods: int = 0
+
+    @classmethod
+    def from_quantities(cls, quantities: t.Optional[t.Dict[str, str]]):
+        quantities = quantities or {}
+        return cls(
+            parse_cpu(quantities.get("cpu")),
+            parse_memory(quantities.get("memory")),
+            int(quantities.get("pods", 0)),
+        )
+
+    def __add__(self, other: "Resources") -> "Resources":
+        return Resources(
+            self.cpu + other.cpu,
+            self.memory + other.memory,
+            self.pods + other.pods,
+        )
+
+    def __sub__(self, other: "Resources") -> "Resources":
+        return Resources(
+            self.cpu - other.cpu,
+            self.memory - other.memory,
+            self.pods - other.pods,
+        )
+
+    def max(self, other: "Resources") -> "Resources":
+        return Resources(
+            max(self.cpu, other.cpu),
+            max(self.memory, other.memory),
+            max(self.pods, other.pods),
+        )
+
+    def fits(self, request: "Resources") -> bool:
+        return (
+            request.cpu <= self.cpu
+            and request.memory <= self.memory
+            and request.pods <= self.pods
+        )
+
+    def fit_count(self, request: "Resources") -> int:
+        """how many times request fits into these resources"""
+        counts = [
+            free // requested
+            for free, requested in zip(self, request)
+            if requested > 0
+        ]
+        if not counts:
+            raise ValueError("Request is empty, can not calculate fit count")
+        return max(min(counts), 0)
+
+
+def _containers_requests(
+    containers: t.Iterable[t.Any], get_requests: t.Callable
+) -> Resources:
+    result = Resources()
+    for container in containers or []:
+        result = result + Resources.from_quantities(get_requests(container))
+    return result
+
+
+def pod_spec_requests(spec: dict) -> Resources:
+    """requests of serialized(dict) pod spec, including one pod slot"""
+
+    def get_requests(container: dict):
+        return (container.get("resources") or {}).get("requests")
+
+    containers = _containers_requests(spec.get("containers"), get_requests)
+    init_containers = [
+        _containers_requests([container], get_requests)
+        for container in spec.get("initContainers") or []
+    ]
+    return _effective_requests(containers, init_containers)
+
+
+def pod_requests(pod) -> Resources:
+    """requests of V1Pod model, including one pod slot"""
+
+    def get_requests(container):
+        resources = container.resources
+        return resources.requests if resources else None
+
+    containers = _containers_requests(pod.spec.containers, get_requests)
+    init_containers = [
+        _containers_requests([container], get_requests)
+        for container in pod.spec.init_containers or []
+    ]
+    return _effective_requests(containers, init_containers)
+
+
+def _effective_requests(
+    containers: Resources, init_containers: t.List[Resources]
+) -> Resources:
+    # same as scheduler does: init containers run one by one before others
+    result = containers
+    for init_container in init_containers:
+        result = result.max(init_container)
+    return result._replace(pods=1)
+
+
+def test_parse_quantities():
+    assert parse_cpu("200m") == 200
+    assert parse_cpu("1.5") == 1500
+    assert parse_memory("512Mi") == 512 * 2 ** 20
+    assert parse_memory("1G") == 10 ** 9
+    assert parse_memory("1024") == 1024
+
+
+def test_resources_fit_count():
+    free = Resources.from_quantities(
+        {"cpu": "1900m", "memory": "7Gi", "pods": "110"}
+    )
+    request = pod_spec_requests(
+        {
+            "containers": [
+                {"resources": {"requests": {"cpu": "200m", "memory": "512Mi"}}}
+            ]
+        }
+    )
+    assert request == Resources(200, 512 * 2 ** 20, 1)
+    assert free.fit_count(request) == 9
@@ -0,0 +1,350 @@
+import typing as t
+
+from over_provisioning.kuber.pod_template import PodTemplate
+from over_provisioning.label_selector import matches_label_selector
+from over_provisioning.logger import get_logger
+from over_provisioning.resources import Resources, pod_spec_requests
+from over_provisioning.simulation.snapshot import (
+    ClusterSnapshot,
+    NodeSnapshot,
+    PodSnapshot,
+)
+
+logger = get_logger()
+
+
+class SimulationResult(t.NamedTuple):
+    pods_to_create: int
+    preempted_over_provisioning_pods: t.List[str]
+    over_provisioning_pods_nodes: t.Dict[str, t.Optional[str]]
+    nodes_before_start: int
+    nodes_after_end: int
+    passed: bool
+    errors: t.List[str]
+
+    @property
+    def new_nodes_required(self) -> int:
+        return self.nodes_after_end - self.nodes_before_start
+
+    def build_report(self) -> dict:
+        return {
+            "nodes_before_start": self.nodes_before_start,
+            "nodes_after_end": self.nodes_after_end,
+            "new_nodes_required": self.new_nodes_required,
+            "amount_of_created_pods": self.pods_to_create,
+            "preempted_over_provisioning_pods": (
+                self.preempted_over_provisioning_pods
+            ),
+            "over_provisioning_pods_nodes": self.over_provisioning_pods_nodes,
+            "errors": self.errors,
+        }
+
+
+class _SimulatedNode:
+    def __init__(
+        self, node: NodeSnapshot, free: Resources, is_new: bool = False
+    ):
+        self.name = node.name
+        self.labels = node.labels
+        self.unschedulable = node.unschedulable
+        self.free = free
+        self.pods: t.List[PodSnapshot] = []
+        self.is_new = is_new
+
+    def bind(self, pod: PodSnapshot):
+        self.pods.append(pod)
+        self.free = self.free - pod.requests
+
+    def evict(self, pod: PodSnapshot):
+        self.pods.remove(pod)
+        self.free = self.free + pod.requests
+
+    def find_victims(
+        self, pod: PodSnapshot
+    ) -> t.Optional[t.List[PodSnapshot]]:
+        """lowest priority pods which have to be preempted to fit pod"""
+        free = self.free
+        victims = []
+        candidates = sorted(
+            (p for p in self.pods if p.priority < pod.priority),
+            key=lambda p: p.priority,
+        )
+        for candidate in candidates:
+            if free.fits(pod.requests):
+                break
+            victims.append(candidate)
+            free = free + candidate.requests
+        if free.fits(pod.requests):
+            return victims
+        return None
+
+
+class SchedulingSimulator:
+    """
+    In memory simulation of default scheduler resources fit and priority
+    preemption with cluster autoscaler scale up, for the same sequence of
+    test pods as PodCreatingLoop creates.
+    """
+
+    def __init__(
+        self,
+        snapshot: ClusterSnapshot,
+        nodes_label_selector: str,
+        over_provisioning_pods_namespace: str,
+        over_provisioning_pods_label_selector: str,
+        pod_template: PodTemplate,
+        max_amount_of_nodes: t.Optional[int],
+        pods_to_create_quantity: int = None,
+        max_pods_to_simulate: int = 10000,
+    ):
+        self._snapshot = snapshot
+        self._nodes_label_selector = nodes_label_selector
+        self._op_pods_namespace = over_provisioning_pods_namespace
+        self._op_pods_label_selector = over_provisioning_pods_label_selector
+        self._pod_template = pod_template
+        self._max_amount_of_nodes = max_amount_of_nodes
+        self._pods_to_create_quantity = pods_to_create_quantity
+        self._max_pods_to_simulate = max_pods_to_simulate
+
+        self._nodes: t.Dict[str, _SimulatedNode] = {}
+        self._op_pods_nodes: t.Dict[str, t.Optional[str]] = {}
+        self._preempted_op_pods: t.List[str] = []
+        self._new_node_template: t.Optional[_SimulatedNode] = None
+
+    def _is_op_pod(self, pod: PodSnapshot) -> bool:
+        return pod.namespace == self._op_pods_namespace and (
+            matches_label_selector(pod.labels, self._op_pods_label_selector)
+        )
+
+    def _load_snapshot(self):
+        self._nodes = {
+            node.name: _SimulatedNode(node, node.allocatable)
+            for node in self._snapshot.nodes
+            if matches_label_selector(node.labels, self._nodes_label_selector)
+        }
+        for pod in self._snapshot.pods:
+            node = self._nodes.get(pod.node_name)
+            if node:
+                node.bind(pod)
+            if self._is_op_pod(pod):
+                self._op_pods_nodes[pod.name] = pod.node_name
+
+        self._new_node_template = self._choose_new_node_template()
+
+    def _choose_new_node_template(self) -> t.Optional[_SimulatedNode]:
+        """new nodes are created in the node group of over provisioning pods"""
+        for node_name in self._op_pods_nodes.values():
+            if node_name in self._nodes:
+                return self._nodes[node_name]
+        return next(iter(self._nodes.values()), None)
+
+    def _scale_up(self) -> t.Optional[_SimulatedNode]:
+        template = self._new_node_template
+        if template is None:
+            return None
+        # None value means nodes quantity is not limited
+        if (
+            self._max_amount_of_nodes is not None
+            and len(self._nodes) >= self._max_amount_of_nodes
+        ):
+            return None
+        snapshot = next(
+            node for node in self._snapshot.nodes if node.name == template.name
+        )
+        free = snapshot.allocatable
+        for pod in template.pods:
+            if pod.daemon_set:
+                free = free - pod.requests
+        name = f"simulated-node-{len(self._nodes) + 1}"
+        node = _SimulatedNode(snapshot._replace(name=name), free, is_new=True)
+        self._nodes[name] = node
+        logger.info(f"Simulated scale up, new node: {name}")
+        return node
+
+    def _candidate_nodes(
+        self, node_selector: t.Dict[str, str]
+    ) -> t.List[_SimulatedNode]:
+        return [
+            node
+            for node in self._nodes.values()
+            if not node.unschedulable
+            and all(node.labels.get(k) == v for k, v in node_selector.items())
+        ]
+
+    def _bind(self, pod: PodSnapshot, node: _SimulatedNode):
+        node.bind(pod)
+        if self._is_op_pod(pod):
+            self._op_pods_nodes[pod.name] = node.name
+
+    def _preempt(self, pod: PodSnapshot, nodes: t.List[_SimulatedNode]):
+        options = []
+        for node in nodes:
+            victims = node.find_victims(pod)
+            if victims is not None:
+                highest_priority = max(
+                    (victim.priority for victim in victims), default=0
+                )
+                options.append((highest_priority, len(victims), node, victims))
+        if not options:
+            return None
+
+        _, _, node, victims = min(options, key=lambda option: option[:2])
+        for victim in victims:
+            node.evict(victim)
+        self._bind(pod, node)
+
+        for victim in victims:
+            if self._is_op_pod(victim):
+                self._preempted_op_pods.append(victim.name)
+                self._op_pods_nodes[victim.name] = None
+            # preempted pods are recreated by their controllers
+            self._schedule(victim, {})
+        return node
+
+    def _schedule(
+        self, pod: PodSnapshot, node_selector: t.Dict[str, str]
+    ) -> t.Tuple[t.Optional[_SimulatedNode], bool]:
+        """returns node where pod was bound and if pod waited for new node"""
+        nodes = self._candidate_nodes(node_selector)
+
+        fitting = [node for node in nodes if node.free.fits(pod.requests)]
+        if fitting:
+            # least requested nodes are preferred by default scheduler
+            node = max(fitting, key=lambda n: (n.free.cpu, n.free.memory))
+            self._bind(pod, node)
+            return node, False
+
+        node = self._preempt(pod, nodes)
+        if node:
+            return node, False
+
+        node = self._scale_up()
+        if node and node.free.fits(pod.requests):
+            self._bind(pod, node)
+            return node, True
+        return None, True
+
+    def _create_test_pod(self, pod_name_suffix: str) -> t.Optional[str]:
+        """returns error message if pod can not be created without delay"""
+        spec = self._pod_template.spec
+        pod = PodSnapshot(
+            f"test-pod-{pod_name_suffix}",
+            "",
+            self._pod_template.labels,
+            None,
+            pod_spec_requests(spec),
+            spec.get("priority") or 0,
+        )
+        node, waited_for_new_node = self._schedule(
+            pod, spec.get("nodeSelector") or {}
+        )
+        if node is None:
+            return f"Pod: {pod.name} can not be scheduled"
+        if waited_for_new_node:
+            return f"Pod: {pod.name} has to wait on new node creation"
+        return None
+
+    def _all_op_pods_preempted(self) -> bool:
+        return len(self._preempted_op_pods) >= len(self._op_pods_nodes)
+
+    def _quantity_limit(self) -> int:
+        if self._pods_to_create_quantity is None:
+            return self._max_pods_to_simulate
+        return self._pods_to_create_quantity
+
+    def run(self) -> SimulationResult:
+        self._load_snapshot()
+        nodes_before_start = len(self._nodes)
+        initial_op_nodes = set(self._op_pods_nodes.values())
+        errors = []
+
+        if not self._op_pods_nodes:
+            errors.append("Over provisioning pods not found")
+
+        i = 0
+        while not errors:
+            i += 1
+            error = self._create_test_pod(str(i))
+            if error:
+                errors.append(error)
+            elif self._all_op_pods_preempted():
+                error = self._create_test_pod("extra")
+                if error:
+                    errors.append(error)
+                break
+            elif i >= self._quantity_limit():
+                errors.append(f"Hit the limit of pods quantity: {i}")
+
+        not_moved = [
+            pod_name
+            for pod_name, node_name in self._op_pods_nodes.items()
+            if node_name is None or node_name in initial_op_nodes
+        ]
+        if not errors and not_moved:
+            errors.append(
+                f"Over provisioning pods not moved to new nodes: {not_moved}"
+            )
+
+        return SimulationResult(
+            i,
+            self._preempted_op_pods,
+            self._op_pods_nodes,
+            nodes_before_start,
+            len(self._nodes),
+            not errors,
+            errors,
+        )
+
+
+def test_scheduling_simulator_run():
+    node = NodeSnapshot(
+        "node_1", {"role": "worker"}, Resources(2000, 4 * 2 ** 30, 110)
+    )
+    op_pod = PodSnapshot(
+        "op-pod",
+        "over-prov",
+        {"app": "op"},
+        "node_1",
+        Resources(1000, 2 ** 30, 1),
+        priority=-1,
+    )
+    template = PodTemplate(
+        {
+            "priority": 0,
+            "nodeSelector": {"role": "worker"},
+            "containers": [
+                {"resources": {"requests": {"cpu": "400m", "memory": "512Mi"}}}
+            ],
+        }
+    )
+
+    simulator = SchedulingSimulator(
+        ClusterSnapshot([node], [op_pod]),
+        "role=worker",
+        "over-prov",
+        "app=op",
+        template,
+        max_amount_of_nodes=2,
+    )
+    result = simulator.run()
+
+    # 2 pods fit into free space, third preempts op pod
+    assert result.pods_to_create == 3
+    assert result.preempted_over_provisioning_pods == ["op-pod"]
+    assert result.over_provisioning_pods_nodes == {
+        "op-pod": "simulated-node-2"
+    }
+    assert result.new_nodes_required == 1
+    assert result.passed
+
+    # nodes quantity is not limited without --max-amount-of-nodes
+    unlimited_result = SchedulingSimulator(
+        ClusterSnapshot([node], [op_pod]),
+        "role=worker",
+        "over-prov",
+        "app=op",
+        template,
+        max_amount_of_nodes=None,
+    ).run()
+    assert unlimited_result.new_nodes_required == 1
+    assert unlimited_result.passed
@@ -0,0 +1,99 @@
+import json
+import typing as t
+
+from kubernetes import client
+
+from over_provisioning.resources import Resources, pod_requests
+
+
+class NodeSnapshot(t.NamedTuple):
+    name: str
+    labels: t.Dict[str, str]
+    allocatable: Resources
+    unschedulable: bool = False
+
+
+class PodSnapshot(t.NamedTuple):
+    name: str
+    namespace: str
+    labels: t.Dict[str, str]
+    node_name: t.Optional[str]
+    requests: Resources
+    priority: int = 0
+    daemon_set: bool = False
+
+
+class ClusterSnapshot:
+    def __init__(
+        self, nodes: t.List[NodeSnapshot], pods: t.List[PodSnapshot]
+    ):
+        self.nodes = nodes
+        self.pods = pods
+
+    @classmethod
+    def from_cluster(cls, kuber: client.CoreV1Api) -> "ClusterSnapshot":
+        """takes snapshot with two list calls"""
+        nodes = [
+            NodeSnapshot(
+                node.metadata.name,
+                node.metadata.labels or {},
+                Resources.from_quantities(node.status.allocatable),
+                bool(node.spec.unschedulable),
+            )
+            for node in kuber.list_node().items
+        ]
+        pods = [
+            PodSnapshot(
+                pod.metadata.name,
+                pod.metadata.namespace,
+                pod.metadata.labels or {},
+                pod.spec.node_name,
+                pod_requests(pod),
+                pod.spec.priority or 0,
+                cls._is_owned_by_daemon_set(pod),
+            )
+            for pod in kuber.list_pod_for_all_namespaces(
+                field_selector="status.phase!=Succeeded,status.phase!=Failed"
+            ).items
+        ]
+        return cls(nodes, pods)
+
+    @staticmethod
+    def _is_owned_by_daemon_set(pod) -> bool:
+        owners = pod.metadata.owner_references or []
+        return any(owner.kind == "DaemonSet" for owner in owners)
+
+    def to_dict(self) -> dict:
+        return {
+            "nodes": [
+                {**node._asdict(), "allocatable": node.allocatable._asdict()}
+                for node in self.nodes
+            ],
+            "pods": [
+                {**pod._asdict(), "requests": pod.requests._asdict()}
+                for pod in self.pods
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ClusterSnapshot":
+        nodes = [
+            NodeSnapshot(
+                **{**node, "allocatable": Resources(**node["allocatable"])}
+            )
+            for node in data["nodes"]
+        ]
+        pods = [
+            PodSnapshot(**{**pod, "requests": Resources(**pod["requests"])})
+            for pod in data["pods"]
+        ]
+        return cls(nodes, pods)
+
+    def save(self, file_path: str):
+        with open(file_path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, file_path: str) -> "ClusterSnapshot":
+        with open(file_path) as f:
+            return cls.from_dict(json.load(f))
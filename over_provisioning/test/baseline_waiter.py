@@ -0,0 +1,113 @@
+import time
+import typing as t
+
+from over_provisioning.kuber.nodes_finder import NodesFinder
+from over_provisioning.logger import get_logger
+from over_provisioning.pods_finder import (
+    OverProvisioningPodsFinder,
+    count_running_pods,
+)
+from over_provisioning.timer import Timer
+from over_provisioning.tracing import get_tracer
+
+logger = get_logger()
+tracer = get_tracer()
+
+
+def integrate_node_minutes(
+    nodes_over_time: t.List[t.Tuple[float, int]],
+    end_time: float,
+    baseline: int = 0,
+) -> float:
+    """
+    nodes count is constant until the next sample,
+    only nodes above baseline are counted
+    """
+    node_seconds = 0.0
+    for index, (timestamp, count) in enumerate(nodes_over_time):
+        next_timestamp = (
+            nodes_over_time[index + 1][0]
+            if index + 1 < len(nodes_over_time)
+            else end_time
+        )
+        node_seconds += max(count - baseline, 0) * (next_timestamp - timestamp)
+    return node_seconds / 60
+
+
+class BaselineReturnWaiter:
+    """
+    After test pods are deleted waits until cluster scales down
+    to the initial amount of nodes and all over provisioning pods
+    are running again, node-minutes spent meanwhile are reported
+    to tune autoscaler scale-down settings.
+    """
+
+    def __init__(
+        self,
+        nodes_finder: NodesFinder,
+        op_pods_finders: t.List[OverProvisioningPodsFinder],
+        max_waiting_time: float,
+        wait_interval: float = 30,
+    ):
+        self._nodes_finder = nodes_finder
+        self._op_pods_finders = op_pods_finders
+        self._max_waiting_time = max_waiting_time
+        self._wait_interval = wait_interval
+
+        self._initial_nodes: t.Optional[int] = None
+        self._initial_op_pods: t.Optional[int] = None
+
+    def _count_nodes(self) -> int:
+        return len(self._nodes_finder.find_by_label_selector())
+
+    def set_baseline(self):
+        """called before the test"""
+        self._initial_nodes = self._count_nodes()
+        self._initial_op_pods = count_running_pods(self._op_pods_finders)
+
+    def wait(self) -> dict:
+        with tracer.span("wait_return_to_baseline"):
+            return self._wait()
+
+    def _wait(self) -> dict:
+        logger.info(
+            f"Waiting on return to {self._initial_nodes} nodes"
+            f" and {self._initial_op_pods} over provisioning pods"
+        )
+        nodes_over_time: t.List[t.Tuple[float, int]] = []
+        returned = False
+        with Timer() as timer:
+            while True:
+                nodes_count = self._count_nodes()
+                nodes_over_time.append((timer.elapsed, nodes_count))
+                if (
+                    nodes_count <= self._initial_nodes
+                    and count_running_pods(self._op_pods_finders)
+                    >= self._initial_op_pods
+                ):
+                    returned = True
+                    break
+                if timer.elapsed > self._max_waiting_time:
+                    logger.info("Cluster did not return to baseline in time")
+                    break
+                time.sleep(self._wait_interval)
+            end_time = timer.elapsed
+
+        return {
+            "returned": returned,
+            "initial_nodes": self._initial_nodes,
+            "nodes_after_return": nodes_over_time[-1][1],
+            "scale_down_latency": end_time if returned else None,
+            "waiting_time": end_time,
+            "node_minutes": integrate_node_minutes(nodes_over_time, end_time),
+            "extra_node_minutes": integrate_node_minutes(
+                nodes_over_time, end_time, self._initial_nodes
+            ),
+        }
+
+
+def test_integrate_node_minutes():
+    nodes_over_time = [(0.0, 5), (60.0, 4), (120.0, 3)]
+    assert integrate_node_minutes(nodes_over_time, 180.0) == 12
+    assert integrate_node_minutes(nodes_over_time, 180.0, 3) == 3
+    assert integrate_node_minutes([], 10.0) == 0
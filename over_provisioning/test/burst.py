@@ -0,0 +1,221 @@
+import typing as t
+
+from over_provisioning.environment.setuper import EnvironmentSetuper
+from over_provisioning.kuber.nodes_finder import NodesFinder
+from over_provisioning.kuber.pods_lister import PodsLister
+from over_provisioning.logger import get_logger
+from over_provisioning.test.baseline_waiter import BaselineReturnWaiter
+from over_provisioning.test.node_assigning_waiter import NodesAssigningWaiter
+from over_provisioning.test.op_pods_state import (
+    OverProvisioningPodsState,
+    wait_on_recreated_pods,
+)
+from over_provisioning.test.pod_measurements import DurationsColumn
+from over_provisioning.test.pods_cleaner import PodsCleaner
+from over_provisioning.test.pods_spawner import PodsSpawner, SpawnedPod
+from over_provisioning.timer import Timer
+from over_provisioning.tracing import get_tracer
+
+logger = get_logger()
+tracer = get_tracer()
+
+
+def classify_by_nodes(
+    spawned_pods: t.List[SpawnedPod],
+    pods_nodes: t.Dict[str, t.Optional[str]],
+    initial_nodes: t.Set[str],
+) -> t.Tuple[t.List[SpawnedPod], t.List[SpawnedPod]]:
+    """
+    splits pods into served by headroom(scheduled on nodes existed before
+    the burst) and waited for new nodes, pods which hit the time limit
+    without node or on new node did not fit into headroom either
+    """
+    served_by_headroom = []
+    waited_for_new_nodes = []
+    for spawned_pod in spawned_pods:
+        if pods_nodes.get(spawned_pod.pod_name) in initial_nodes:
+            served_by_headroom.append(spawned_pod)
+        else:
+            waited_for_new_nodes.append(spawned_pod)
+    return served_by_headroom, waited_for_new_nodes
+
+
+def _build_durations_summary(pods: t.List[SpawnedPod]) -> dict:
+    """time to running is known only for running pods"""
+    durations = DurationsColumn()
+    for spawned_pod in pods:
+        if spawned_pod.is_running:
+            durations.append(spawned_pod.time_to_running)
+    return durations.build_summary()
+
+
+class BurstAbsorptionTest:
+    """
+    Fires bursts of pods creations at once against warm headroom,
+    for every burst size:
+      time to running distribution of the whole burst
+      how many pods were served by headroom or waited for new nodes
+      time until preempted over provisioning pods were rescheduled
+    Pods of the burst are deleted before the next burst, with baseline
+    return waiter the next burst starts when cluster is back to initial
+    nodes and over provisioning pods, otherwise right after deletion.
+    """
+
+    def __init__(
+        self,
+        pods_spawner: PodsSpawner,
+        over_provisioning_pods_state: OverProvisioningPodsState,
+        nodes_assigning_waiter: NodesAssigningWaiter,
+        nodes_finder: NodesFinder,
+        pods_lister: PodsLister,
+        environment_setuper: EnvironmentSetuper,
+        pods_cleaner: PodsCleaner,
+        namespace: str,
+        pods_label_selector: str,
+        baseline_return_waiter: BaselineReturnWaiter = None,
+    ):
+        self._pods_spawner = pods_spawner
+        self._over_provisioning_pods_state = over_provisioning_pods_state
+        self._nodes_assigning_waiter = nodes_assigning_waiter
+        self._nodes_finder = nodes_finder
+        self._pods_lister = pods_lister
+        self._environment_setuper = environment_setuper
+        self._pods_cleaner = pods_cleaner
+        self._namespace = namespace
+        self._pods_label_selector = pods_label_selector
+        self._baseline_return_waiter = baseline_return_waiter
+
+    def _find_nodes_names(self) -> t.Set[str]:
+        return {
+            node.metadata.name
+            for node in self._nodes_finder.find_by_label_selector()
+        }
+
+    def _find_pods_nodes(self) -> t.Dict[str, t.Optional[str]]:
+        """one list call for the whole burst"""
+        return {
+            pod.metadata.name: pod.spec.node_name
+            for pod in self._pods_lister.list_by_label_selector(
+                self._namespace, self._pods_label_selector
+            )
+        }
+
+    def _run_burst(
+        self, burst_index: int, burst_size: int, max_pod_creation_time: float
+    ) -> t.Tuple[bool, dict]:
+        self._over_provisioning_pods_state.set_initial_pods()
+        initial_nodes = self._find_nodes_names()
+        if self._baseline_return_waiter:
+            self._baseline_return_waiter.set_baseline()
+
+        suffixes = [
+            f"burst{burst_index}-{i}" for i in range(1, burst_size + 1)
+        ]
+        # pods are deleted by cleaner if burst is interrupted
+        self._pods_cleaner.set_pods_to_delete(
+            [
+                self._pods_spawner.construct_pod_name(suffix)
+                for suffix in suffixes
+            ]
+        )
+
+        logger.info(f"Burst {burst_index}: creating {burst_size} pods at once")
+        with tracer.span("burst", burst_size=burst_size), Timer() as timer:
+            spawned_pods = self._pods_spawner.spawn_pods(
+                suffixes, max_pod_creation_time, max_workers=burst_size
+            )
+            burst_time = timer.elapsed
+            (
+                preempted_op_pods,
+                op_pods_reschedule_time,
+                op_pods_rescheduled,
+            ) = wait_on_recreated_pods(
+                self._over_provisioning_pods_state,
+                self._nodes_assigning_waiter,
+                timer.start_time,
+            )
+
+        served_by_headroom, waited_for_new_nodes = classify_by_nodes(
+            spawned_pods,
+            self._find_pods_nodes(),
+            initial_nodes,
+        )
+        running_pods = [
+            spawned_pod
+            for spawned_pod in spawned_pods
+            if spawned_pod.is_running
+        ]
+        nodes_after_burst = self._find_nodes_names()
+        self._pods_cleaner.clean()
+        self._pods_cleaner.set_pods_to_delete([])
+        return_to_baseline_report = (
+            self._baseline_return_waiter.wait()
+            if self._baseline_return_waiter
+            else None
+        )
+
+        passed = len(running_pods) == burst_size and op_pods_rescheduled
+        return (
+            passed,
+            {
+                "burst_size": burst_size,
+                "passed": passed,
+                "burst_time": burst_time,
+                "pods_running": len(running_pods),
+                "pods_hit_time_limit": burst_size - len(running_pods),
+                "time_to_running": _build_durations_summary(running_pods),
+                "served_by_headroom": len(served_by_headroom),
+                "waited_for_new_nodes": len(waited_for_new_nodes),
+                "headroom_time_to_running": _build_durations_summary(
+                    served_by_headroom
+                ),
+                "new_nodes_time_to_running": _build_durations_summary(
+                    waited_for_new_nodes
+                ),
+                "preempted_op_pods": preempted_op_pods,
+                "op_pods_reschedule_time": op_pods_reschedule_time,
+                "nodes_before_burst": len(initial_nodes),
+                "new_nodes": len(nodes_after_burst - initial_nodes),
+                "return_to_baseline": return_to_baseline_report,
+            },
+        )
+
+    def run(
+        self, burst_sizes: t.Iterable[int], max_pod_creation_time: float
+    ) -> t.Tuple[bool, dict]:
+        results = []
+        with self._environment_setuper as env_created_successfully:
+            if env_created_successfully:
+                with self._pods_cleaner:
+                    for burst_index, burst_size in enumerate(burst_sizes, 1):
+                        results.append(
+                            self._run_burst(
+                                burst_index, burst_size, max_pod_creation_time
+                            )
+                        )
+
+        report = {
+            "bursts": [burst_report for _, burst_report in results],
+            "environment_setup_time": self._environment_setuper.create_time,
+            "environment_teardown_time": (
+                self._environment_setuper.destroy_time
+            ),
+        }
+        passed = bool(results) and all(passed for passed, _ in results)
+        return passed, report
+
+
+def test_classify_by_nodes():
+    spawned_pods = [
+        SpawnedPod("test-pod-1", True, 2.0),
+        SpawnedPod("test-pod-2", True, 90.0),
+        SpawnedPod("test-pod-3", False, 120.0),
+    ]
+    served_by_headroom, waited_for_new_nodes = classify_by_nodes(
+        spawned_pods,
+        {"test-pod-1": "node-1", "test-pod-2": "node-2", "test-pod-3": None},
+        {"node-1"},
+    )
+    assert served_by_headroom == [spawned_pods[0]]
+    assert waited_for_new_nodes == spawned_pods[1:]
+    assert _build_durations_summary(waited_for_new_nodes)["count"] == 1
@@ -0,0 +1,151 @@
+import copy
+import typing as t
+
+from over_provisioning.kuber.pod_deleter import PodDeleter
+from over_provisioning.kuber.pod_template import (
+    TEST_POD_LABEL_KEY,
+    PodTemplate,
+)
+from over_provisioning.logger import get_logger
+from over_provisioning.test.pod_measurements import DurationsColumn
+from over_provisioning.test.pods_spawner import (
+    PodCreationTimeHitsLimitError,
+    PodsSpawner,
+)
+from over_provisioning.timer import Timer
+from over_provisioning.tracing import get_tracer
+
+logger = get_logger()
+tracer = get_tracer()
+
+CALIBRATION_POD_LABEL_VALUE = "calibration-pod"
+
+
+def create_calibration_template(pod_template: PodTemplate) -> PodTemplate:
+    """
+    same containers without resources requests, so pod fits onto
+    idle node and nothing is preempted or scaled up,
+    other label keeps it out of test pods selector
+    """
+    spec = copy.deepcopy(pod_template.spec)
+    for container in (spec.get("initContainers") or []) + (
+        spec.get("containers") or []
+    ):
+        container.pop("resources", None)
+    return PodTemplate(spec, {TEST_POD_LABEL_KEY: CALIBRATION_POD_LABEL_VALUE})
+
+
+def net_of_baseline(
+    value: t.Optional[float], baseline: t.Optional[float]
+) -> t.Optional[float]:
+    if value is None or baseline is None:
+        return None
+    return max(value - baseline, 0)
+
+
+class BaselineCalibrator:
+    """
+    Measures costs which exist even with infinite headroom before the test:
+    API round trip time of a cheap call and time until pod is running on
+    already existent node. Pods are created one by one and deleted right
+    after they are running.
+    """
+
+    def __init__(
+        self,
+        api_call: t.Callable[[], t.Any],
+        pods_spawner: PodsSpawner,
+        pod_deleter: PodDeleter,
+        pods_quantity: int,
+        api_calls_quantity: int = 10,
+        max_pod_creation_time: float = 120,
+    ):
+        self._api_call = api_call
+        self._pods_spawner = pods_spawner
+        self._pod_deleter = pod_deleter
+        self._pods_quantity = pods_quantity
+        self._api_calls_quantity = api_calls_quantity
+        self._max_pod_creation_time = max_pod_creation_time
+
+    def _measure_api_rtt(self) -> DurationsColumn:
+        rtt = DurationsColumn()
+        for _ in range(self._api_calls_quantity):
+            with Timer() as timer:
+                self._api_call()
+            rtt.append(timer.elapsed)
+        return rtt
+
+    def _measure_time_to_running(self) -> t.Tuple[DurationsColumn, int]:
+        times_to_running = DurationsColumn()
+        failed = 0
+        for index in range(1, self._pods_quantity + 1):
+            pod_name = self._pods_spawner.construct_pod_name(str(index))
+            try:
+                _, time_to_running = self._pods_spawner.create_pod(
+                    str(index), self._max_pod_creation_time
+                )
+                times_to_running.append(time_to_running)
+            except PodCreationTimeHitsLimitError:
+                logger.info(f"Calibration pod: {pod_name} is not running")
+                failed += 1
+            finally:
+                self._pod_deleter.delete_one(pod_name)
+        return times_to_running, failed
+
+    def calibrate(self) -> dict:
+        with tracer.span("calibration", pods=self._pods_quantity):
+            api_rtt = self._measure_api_rtt()
+            times_to_running, failed = self._measure_time_to_running()
+        logger.info(
+            f"Calibration API RTT p50: {api_rtt.percentile(0.5)},"
+            f" time to running p50: {times_to_running.percentile(0.5)}"
+        )
+        return {
+            "api_rtt": api_rtt.build_summary(),
+            "time_to_running": times_to_running.build_summary(),
+            "failed_pods": failed,
+        }
+
+
+def test_baseline_calibrator():
+    template = PodTemplate(
+        {
+            "containers": [
+                {
+                    "name": "test",
+                    "image": "nginx",
+                    "resources": {"requests": {"cpu": "1"}},
+                }
+            ]
+        }
+    )
+    calibration_template = create_calibration_template(template)
+    assert "resources" not in calibration_template.spec["containers"][0]
+    assert "resources" in template.spec["containers"][0]
+    assert calibration_template.labels == {
+        TEST_POD_LABEL_KEY: CALIBRATION_POD_LABEL_VALUE
+    }
+
+    class FakeSpawner:
+        def construct_pod_name(self, suffix: str) -> str:
+            return f"calibration-pod-{suffix}"
+
+        def create_pod(self, suffix: str, max_pod_creation_time: float):
+            if suffix == "2":
+                raise PodCreationTimeHitsLimitError(suffix, 1)
+            return self.construct_pod_name(suffix), 2.0
+
+    deleted = []
+    pod_deleter = PodDeleter(None, "test")
+    pod_deleter.delete_one = deleted.append
+    report = BaselineCalibrator(
+        lambda: None, FakeSpawner(), pod_deleter, 3, 5
+    ).calibrate()
+
+    assert report["api_rtt"]["count"] == 5
+    assert report["time_to_running"]["p50"] == 2.0
+    assert report["failed_pods"] == 1
+    assert deleted == [f"calibration-pod-{index}" for index in (1, 2, 3)]
+    assert net_of_baseline(5.0, 2.0) == 3.0
+    assert net_of_baseline(1.0, 2.0) == 0
+    assert net_of_baseline(None, 2.0) is None
@@ -0,0 +1,105 @@
+from over_provisioning.kuber.nodes_finder import NodesFinder
+from over_provisioning.kuber.pod_template import PodTemplate
+from over_provisioning.kuber.pods_lister import PodsLister
+from over_provisioning.logger import get_logger
+from over_provisioning.resources import (
+    Resources,
+    pod_requests,
+    pod_spec_requests,
+)
+
+logger = get_logger()
+
+
+class CapacityPlanner:
+    """
+    Predicts how many test pods fit into free nodes capacity,
+    before over provisioning pods have to be preempted.
+    Over provisioning pods requests are counted as used capacity.
+    """
+
+    def __init__(
+        self,
+        nodes_finder: NodesFinder,
+        pods_lister: PodsLister,
+        pod_template: PodTemplate,
+        boundary_margin: int = 1,
+    ):
+        self._nodes_finder = nodes_finder
+        self._pods_lister = pods_lister
+        self._pod_requests = pod_spec_requests(pod_template.spec)
+        # pods which are left for single pod stepping near the boundary
+        self._boundary_margin = boundary_margin
+
+    def _get_free_resources(self, node) -> Resources:
+        allocatable = Resources.from_quantities(node.status.allocatable)
+        used = Resources()
+        for pod in self._pods_lister.list_on_node(node.metadata.name):
+            used = used + pod_requests(pod)
+        return allocatable - used
+
+    def count_pods_to_fit(self) -> int:
+        quantity = 0
+        for node in self._nodes_finder.find_by_label_selector():
+            if node.spec.unschedulable:
+                continue
+            fit_count = self._get_free_resources(node).fit_count(
+                self._pod_requests
+            )
+            logger.info(
+                f"Node: {node.metadata.name} fits {fit_count} test pods"
+            )
+            quantity += fit_count
+        return quantity
+
+    def plan_batch_size(self) -> int:
+        return max(self.count_pods_to_fit() - self._boundary_margin, 0)
+
+
+def test_capacity_planner_plan_batch_size():
+    from types import SimpleNamespace
+    from kubernetes import client
+
+    def node(name, cpu, memory, unschedulable=None):
+        return SimpleNamespace(
+            metadata=SimpleNamespace(name=name),
+            spec=SimpleNamespace(unschedulable=unschedulable),
+            status=SimpleNamespace(
+                allocatable={"cpu": cpu, "memory": memory, "pods": "110"}
+            ),
+        )
+
+    def pod(cpu, memory):
+        return client.V1Pod(
+            spec=client.V1PodSpec(
+                containers=[
+                    client.V1Container(
+                        name="test",
+                        resources=client.V1ResourceRequirements(
+                            requests={"cpu": cpu, "memory": memory}
+                        ),
+                    )
+                ]
+            )
+        )
+
+    nodes_finder = NodesFinder(None, "test_selector")
+    nodes_finder.find_by_label_selector = lambda: [
+        node("node_1", "2", "4Gi"),
+        node("node_2", "2", "4Gi", unschedulable=True),
+    ]
+    pods_lister = PodsLister(None)
+    # over provisioning pod reserves half of the node
+    pods_lister.list_on_node = lambda node_name: [pod("1", "1Gi")]
+    template = PodTemplate(
+        {
+            "containers": [
+                {"resources": {"requests": {"cpu": "200m", "memory": "512Mi"}}}
+            ]
+        }
+    )
+
+    planner = CapacityPlanner(nodes_finder, pods_lister, template)
+
+    assert planner.count_pods_to_fit() == 5
+    assert planner.plan_batch_size() == 4
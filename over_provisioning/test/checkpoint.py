@@ -0,0 +1,228 @@
+import json
+import os
+import typing as t
+
+from over_provisioning.kuber.pods_lister import PodsLister
+from over_provisioning.logger import get_logger
+from over_provisioning.test.node_assigning_waiter import NodesAssigningWaiter
+from over_provisioning.test.op_pods_state import OverProvisioningPodsState
+from over_provisioning.test.pods_spawner import PodsSpawner
+from over_provisioning.test.report_builder import ReportBuilder, WaveTimes
+from over_provisioning.timer import Timer
+
+logger = get_logger()
+
+CREATING_PODS_PHASE = "creating_pods"
+# saved before the extra pod is created, so it is not created twice
+CREATING_EXTRA_POD_PHASE = "creating_extra_pod"
+WAITING_NODES_ASSIGNING_PHASE = "waiting_nodes_assigning"
+
+
+class WaveProgress(t.NamedTuple):
+    wave: int = 1
+    first_pod_index: int = 1
+    # known when over provisioning pods of the wave are preempted
+    times: t.Optional[WaveTimes] = None
+    extra_pod_creation_time: t.Optional[float] = None
+
+    def dump(self) -> list:
+        return [
+            self.wave,
+            self.first_pod_index,
+            list(self.times) if self.times else None,
+            self.extra_pod_creation_time,
+        ]
+
+    @classmethod
+    def load(cls, dumped: t.Optional[list]) -> "WaveProgress":
+        """checkpoints of older versions have no wave"""
+        if not dumped:
+            return cls()
+        wave, first_pod_index, times, extra_pod_creation_time = dumped
+        return cls(
+            wave,
+            first_pod_index,
+            WaveTimes(*times) if times else None,
+            extra_pod_creation_time,
+        )
+
+
+class CheckpointNotFoundError(Exception):
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def __str__(self):
+        return f"Checkpoint file: {self.file_path} doesnt exists, nothing to resume."
+
+
+class CheckpointNamespaceMismatchError(Exception):
+    def __init__(self, file_path: str, saved_namespace: str, namespace: str):
+        self.file_path = file_path
+        self.saved_namespace = saved_namespace
+        self.namespace = namespace
+
+    def __str__(self):
+        return (
+            f"Checkpoint file: {self.file_path} was saved for namespace:"
+            f" {self.saved_namespace}, it can not be resumed in namespace:"
+            f" {self.namespace}."
+        )
+
+
+class RunCheckpoint:
+    """
+    Saves state of running test to local file,
+    not more often than once per save_interval while phase is the same.
+    Pods created after the last save are rediscovered by label on restore.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        pods_spawner: PodsSpawner,
+        over_provisioning_pods_state: OverProvisioningPodsState,
+        nodes_assigning_waiter: NodesAssigningWaiter,
+        report_builder: ReportBuilder,
+        pods_lister: PodsLister,
+        namespace: str,
+        pods_label_selector: str,
+        save_interval: float = 5,
+    ):
+        self._file_path = file_path
+        self._pods_spawner = pods_spawner
+        self._over_provisioning_pods_state = over_provisioning_pods_state
+        self._nodes_assigning_waiter = nodes_assigning_waiter
+        self._report_builder = report_builder
+        self._pods_lister = pods_lister
+        self._namespace = namespace
+        self._pods_label_selector = pods_label_selector
+        self._save_interval = save_interval
+
+        self._last_saved_phase: t.Optional[str] = None
+        self._last_save_time: float = 0
+
+    def _is_save_required(self, phase: str) -> bool:
+        if phase != self._last_saved_phase:
+            return True
+        return Timer.now() - self._last_save_time >= self._save_interval
+
+    def save(
+        self,
+        phase: str,
+        next_pod_index: int = None,
+        wave_progress: WaveProgress = WaveProgress(),
+    ):
+        if not self._is_save_required(phase):
+            return
+
+        state = {
+            "phase": phase,
+            "namespace": self._namespace,
+            "next_pod_index": next_pod_index,
+            "wave_progress": wave_progress.dump(),
+            "pods_spawner": self._pods_spawner.dump_state(),
+            "over_provisioning_pods_state": (
+                self._over_provisioning_pods_state.dump_state()
+            ),
+            "nodes_assigning_waiter": (
+                self._nodes_assigning_waiter.dump_state()
+            ),
+            "report_builder": self._report_builder.dump_state(),
+        }
+        # replace is atomic, so checkpoint is never partially written
+        tmp_file_path = f"{self._file_path}.tmp"
+        with open(tmp_file_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_file_path, self._file_path)
+
+        self._last_saved_phase = phase
+        self._last_save_time = Timer.now()
+
+    def restore(self) -> t.Tuple[str, int, WaveProgress]:
+        """returns saved phase, index of the next pod to create and wave"""
+        if not os.path.exists(self._file_path):
+            raise CheckpointNotFoundError(self._file_path)
+
+        with open(self._file_path) as f:
+            state = json.load(f)
+
+        # checkpoints of older versions have no namespace
+        saved_namespace = state.get("namespace", self._namespace)
+        if saved_namespace != self._namespace:
+            raise CheckpointNamespaceMismatchError(
+                self._file_path, saved_namespace, self._namespace
+            )
+
+        self._pods_spawner.restore_state(state["pods_spawner"])
+        self._over_provisioning_pods_state.restore_state(
+            state["over_provisioning_pods_state"]
+        )
+        self._nodes_assigning_waiter.restore_state(
+            state["nodes_assigning_waiter"]
+        )
+        self._report_builder.restore_state(state["report_builder"])
+
+        self._rediscover_pods()
+
+        next_pod_index = max(
+            state["next_pod_index"] or 1,
+            self._pods_spawner.get_next_pod_index(),
+        )
+        self._last_saved_phase = state["phase"]
+        return (
+            state["phase"],
+            next_pod_index,
+            WaveProgress.load(state.get("wave_progress")),
+        )
+
+    def _rediscover_pods(self):
+        pods = self._pods_lister.list_by_label_selector(
+            self._namespace, self._pods_label_selector
+        )
+        pods_names = [pod.metadata.name for pod in pods]
+        logger.info(f"Rediscovered test pods: {str(pods_names)}")
+        self._pods_spawner.add_created_pods(pods_names)
+
+    def remove(self):
+        if os.path.exists(self._file_path):
+            os.remove(self._file_path)
+
+
+def test_run_checkpoint(tmp_path):
+    from types import SimpleNamespace
+
+    class FakePodsLister:
+        def list_by_label_selector(self, namespace: str, label_selector: str):
+            return [SimpleNamespace(metadata=SimpleNamespace(name="t-extra"))]
+
+    def create_checkpoint(namespace: str) -> RunCheckpoint:
+        report_builder = ReportBuilder()
+        return RunCheckpoint(
+            str(tmp_path / "checkpoint.json"),
+            PodsSpawner(None, None, "t", None),
+            OverProvisioningPodsState(None, None),
+            NodesAssigningWaiter(None, report_builder, 60),
+            report_builder,
+            FakePodsLister(),
+            namespace,
+            "test=pod",
+        )
+
+    checkpoint = create_checkpoint("test")
+    checkpoint._report_builder.set_nodes_report(3, None)
+    checkpoint._report_builder.add_wave_report({"wave": 1})
+    wave_progress = WaveProgress(2, 4, WaveTimes(1.0, 2.0, 3.0))
+    checkpoint.save(CREATING_EXTRA_POD_PHASE, 5, wave_progress)
+
+    restored = create_checkpoint("test")
+    assert restored.restore() == (CREATING_EXTRA_POD_PHASE, 5, wave_progress)
+    assert restored._report_builder.nodes_before_start == 3
+    assert restored._report_builder.build_report()["waves"] == [{"wave": 1}]
+    # extra pod created before interruption is rediscovered
+    assert "t-extra" in restored._pods_spawner.get_created_pods()
+
+    try:
+        create_checkpoint("other").restore()
+        assert False, "checkpoint is resumed in other namespace"
+    except CheckpointNamespaceMismatchError:
+        pass
@@ -0,0 +1,226 @@
+import time
+import typing as t
+
+from over_provisioning.environment.setuper import EnvironmentSetuper
+from over_provisioning.kuber.nodes_finder import NodesFinder
+from over_provisioning.kuber.pod_creator import PodCreator
+from over_provisioning.kuber.pod_deleter import PodDeleter
+from over_provisioning.kuber.pod_template import PodTemplate
+from over_provisioning.logger import get_logger
+from over_provisioning.pods_finder import (
+    OverProvisioningPodsFinder,
+    count_running_pods,
+)
+from over_provisioning.test.capacity_planner import CapacityPlanner
+from over_provisioning.test.pod_measurements import DurationsColumn
+from over_provisioning.test.pods_cleaner import PodsCleaner
+from over_provisioning.timer import Timer
+from over_provisioning.tracing import get_tracer
+
+logger = get_logger()
+tracer = get_tracer()
+
+
+def count_flaps(nodes_counts: t.Iterable[int]) -> int:
+    """how many times node count changed direction(grew after shrinking)"""
+    flaps = 0
+    last_count = None
+    last_direction = 0
+    for count in nodes_counts:
+        if last_count is not None and count != last_count:
+            direction = 1 if count > last_count else -1
+            if last_direction and direction != last_direction:
+                flaps += 1
+            last_direction = direction
+        last_count = count
+    return flaps
+
+
+class ChurnTest:
+    """
+    Keeps amount of test pods swinging around the capacity boundary
+    (amount of test pods which fit before over provisioning pods are
+    preempted) with one creation or deletion per churn interval:
+        boundary - amplitude <= test pods <= boundary + amplitude
+    Boundary is planned again when scale-out swing starts with all over
+    provisioning pods running, so it follows nodes added or removed by
+    autoscaler. When scale-in swing starts with over provisioning pods
+    displaced, measures time until all of them are running in headroom
+    again. Nodes count is sampled every tick to expose autoscaler flapping.
+    """
+
+    def __init__(
+        self,
+        pod_creator: PodCreator,
+        pod_deleter: PodDeleter,
+        pod_template: PodTemplate,
+        nodes_finder: NodesFinder,
+        op_pods_finders: t.List[OverProvisioningPodsFinder],
+        capacity_planner: CapacityPlanner,
+        environment_setuper: EnvironmentSetuper,
+        pods_cleaner: PodsCleaner,
+        churn_rate_per_minute: float,
+        amplitude: int = 2,
+        tick_interval: float = 5,
+    ):
+        self._pod_creator = pod_creator
+        self._pod_deleter = pod_deleter
+        self._pod_template = pod_template
+        self._nodes_finder = nodes_finder
+        self._op_pods_finders = op_pods_finders
+        self._capacity_planner = capacity_planner
+        self._environment_setuper = environment_setuper
+        self._pods_cleaner = pods_cleaner
+        self._churn_interval = 60 / churn_rate_per_minute
+        self._amplitude = amplitude
+        self._tick_interval = tick_interval
+
+    def _count_nodes(self) -> int:
+        return len(self._nodes_finder.find_by_label_selector())
+
+    def _plan_bounds(self, test_pods_count: int) -> t.Tuple[int, int, int]:
+        """free capacity is counted with already created test pods"""
+        boundary = test_pods_count + self._capacity_planner.count_pods_to_fit()
+        return (
+            boundary,
+            max(boundary - self._amplitude, 0),
+            boundary + self._amplitude,
+        )
+
+    def _churn(self, duration: float) -> dict:
+        boundary, lower_bound, upper_bound = self._plan_bounds(0)
+        boundaries = [boundary]
+        initial_op_pods = count_running_pods(self._op_pods_finders)
+        logger.info(
+            f"Churn between {lower_bound} and {upper_bound} test pods,"
+            f" over provisioning pods: {initial_op_pods}"
+        )
+
+        test_pods: t.List[str] = []
+        self._pods_cleaner.set_pods_to_delete(test_pods)
+        created = deleted = 0
+        # pods below the lower bound do not preempt anything
+        with tracer.span("churn_fill", pods=lower_bound):
+            for created in range(1, lower_bound + 1):
+                pod_name = f"test-pod-churn-{created}"
+                test_pods.append(pod_name)
+                self._pod_creator.create_pod(pod_name, self._pod_template)
+        scaling_out = True
+        # start of the last scale-in swing if over provisioning pods
+        # did not return after it yet
+        scale_in_start: t.Optional[float] = None
+        return_times = DurationsColumn()
+        not_returned = 0
+        # upper bound was reached without preemption
+        not_displaced = 0
+        nodes_over_time: t.List[t.Tuple[float, int]] = []
+
+        start_time = Timer.now()
+        next_churn_time = start_time
+        while Timer.now() - start_time < duration:
+            now = Timer.now()
+            while next_churn_time <= now:
+                if scaling_out:
+                    created += 1
+                    pod_name = f"test-pod-churn-{created}"
+                    test_pods.append(pod_name)
+                    self._pod_creator.create_pod(pod_name, self._pod_template)
+                    scaling_out = len(test_pods) < upper_bound
+                else:
+                    if len(test_pods) >= upper_bound:
+                        # the first deletion of scale-in swing
+                        if (
+                            count_running_pods(self._op_pods_finders)
+                            < initial_op_pods
+                        ):
+                            if scale_in_start is not None:
+                                # preempted again before they returned
+                                not_returned += 1
+                            scale_in_start = next_churn_time
+                        else:
+                            not_displaced += 1
+                    deleted += 1
+                    self._pod_deleter.delete_one(test_pods.pop(0))
+                    if len(test_pods) <= lower_bound:
+                        scaling_out = True
+                        # pending over provisioning pods would be
+                        # counted as free capacity
+                        if (
+                            count_running_pods(self._op_pods_finders)
+                            >= initial_op_pods
+                        ):
+                            (
+                                boundary,
+                                lower_bound,
+                                upper_bound,
+                            ) = self._plan_bounds(len(test_pods))
+                            boundaries.append(boundary)
+                            logger.info(
+                                f"Churn between {lower_bound} and"
+                                f" {upper_bound} test pods"
+                            )
+                next_churn_time += self._churn_interval
+
+            if (
+                scale_in_start is not None
+                and count_running_pods(self._op_pods_finders)
+                >= initial_op_pods
+            ):
+                return_times.append(Timer.now() - scale_in_start)
+                scale_in_start = None
+
+            nodes_count = self._count_nodes()
+            if not nodes_over_time or nodes_over_time[-1][1] != nodes_count:
+                nodes_over_time.append((Timer.now() - start_time, nodes_count))
+            time.sleep(
+                max(
+                    min(next_churn_time, Timer.now() + self._tick_interval)
+                    - Timer.now(),
+                    0,
+                )
+            )
+
+        nodes_counts = [count for _, count in nodes_over_time]
+        return {
+            "capacity_boundaries": boundaries,
+            "lower_bound": lower_bound,
+            "upper_bound": upper_bound,
+            "created_pods": created,
+            "deleted_pods": deleted,
+            "op_pods_return_time": return_times.build_summary(),
+            "op_pods_not_returned": not_returned,
+            "op_pods_not_displaced": not_displaced,
+            "nodes_over_time": nodes_over_time,
+            "min_nodes": min(nodes_counts, default=None),
+            "max_nodes": max(nodes_counts, default=None),
+            "nodes_flaps": count_flaps(nodes_counts),
+        }
+
+    def run(self, duration: float) -> t.Tuple[bool, dict]:
+        churn_report = {}
+        with self._environment_setuper as env_created_successfully:
+            if env_created_successfully:
+                with self._pods_cleaner, tracer.span("churn"):
+                    churn_report = self._churn(duration)
+
+        report = {
+            **churn_report,
+            "churn_interval": self._churn_interval,
+            "environment_setup_time": self._environment_setuper.create_time,
+            "environment_teardown_time": (
+                self._environment_setuper.destroy_time
+            ),
+        }
+        passed = (
+            bool(churn_report)
+            and churn_report["op_pods_return_time"]["count"] > 0
+            and churn_report["op_pods_not_returned"] == 0
+        )
+        return passed, report
+
+
+def test_count_flaps():
+    assert count_flaps([]) == 0
+    assert count_flaps([3, 3, 4, 5, 5]) == 0
+    assert count_flaps([3, 4, 3]) == 1
+    assert count_flaps([3, 4, 4, 3, 3, 4, 5, 4]) == 3
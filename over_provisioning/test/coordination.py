@@ -0,0 +1,80 @@
+import contextlib
+import threading
+import typing as t
+
+
+class MatrixCoordinator:
+    """
+    Profiles share the same over provisioning pods, so only one profile
+    at a time can fill free capacity or step near the boundary,
+    otherwise preemption caused by one profile is observed by others.
+    Stepping starts only after all profiles have filled free capacity.
+    Stepping lock is held until recreated over provisioning pods get
+    nodes, other profiles would preempt or count them while they are
+    pending.
+    """
+
+    def __init__(self, profiles: t.Iterable[str]):
+        self._lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._not_filled_profiles: t.Set[str] = set(profiles)
+
+    def for_profile(self, profile: str) -> "ProfileCoordination":
+        return ProfileCoordination(self, profile)
+
+    @contextlib.contextmanager
+    def filling(self, profile: str):
+        try:
+            with self._lock:
+                yield
+        finally:
+            self.finish_filling(profile)
+
+    @contextlib.contextmanager
+    def stepping(self):
+        with self._condition:
+            self._condition.wait_for(lambda: not self._not_filled_profiles)
+        with self._lock:
+            yield
+
+    def finish_filling(self, profile: str):
+        with self._condition:
+            self._not_filled_profiles.discard(profile)
+            self._condition.notify_all()
+
+
+class ProfileCoordination:
+    def __init__(self, coordinator: MatrixCoordinator, profile: str):
+        self._coordinator = coordinator
+        self._profile = profile
+
+    def filling(self) -> t.ContextManager:
+        return self._coordinator.filling(self._profile)
+
+    def stepping(self) -> t.ContextManager:
+        return self._coordinator.stepping()
+
+    def withdraw(self):
+        """profile which failed before filling must not block others"""
+        self._coordinator.finish_filling(self._profile)
+
+
+def test_matrix_coordinator_stepping_waits_for_filling():
+    coordinator = MatrixCoordinator(["small", "large"])
+    events = []
+
+    def run_small():
+        with coordinator.for_profile("small").filling():
+            events.append("small filled")
+        with coordinator.for_profile("small").stepping():
+            events.append("small stepping")
+
+    thread = threading.Thread(target=run_small)
+    thread.start()
+    thread.join(timeout=0.1)
+    assert events == ["small filled"]
+
+    # large profile failed before filling
+    coordinator.for_profile("large").withdraw()
+    thread.join(timeout=1)
+    assert events == ["small filled", "small stepping"]
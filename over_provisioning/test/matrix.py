@@ -0,0 +1,65 @@
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+from over_provisioning.logger import get_logger
+from over_provisioning.test.coordination import ProfileCoordination
+from over_provisioning.test.runner import OneOverProvisioningPodTest
+from over_provisioning.tracing import Span, get_tracer
+
+logger = get_logger()
+tracer = get_tracer()
+
+
+class OverProvisioningTestMatrix:
+    def __init__(
+        self,
+        tests: t.Dict[str, OneOverProvisioningPodTest],
+        coordinations: t.Dict[str, ProfileCoordination],
+    ):
+        self._tests = tests
+        self._coordinations = coordinations
+
+    def _run_profile(
+        self,
+        profile: str,
+        max_pod_creation_time_in_seconds: float,
+        parent_span: t.Optional[Span] = None,
+    ) -> t.Tuple[bool, dict]:
+        try:
+            logger.info(f"Starting test for profile: {profile}")
+            with tracer.attached(parent_span), tracer.span(
+                "profile", profile=profile
+            ):
+                result, report = self._tests[profile].run(
+                    max_pod_creation_time_in_seconds
+                )
+            logger.info(f"Test for profile: {profile} finished: {result}")
+            return result, report
+        finally:
+            self._coordinations[profile].withdraw()
+
+    def run(
+        self, max_pod_creation_time_in_seconds: float
+    ) -> t.Tuple[bool, dict]:
+        parent_span = tracer.current_span()
+        with ThreadPoolExecutor(max_workers=len(self._tests)) as executor:
+            futures = {
+                profile: executor.submit(
+                    self._run_profile,
+                    profile,
+                    max_pod_creation_time_in_seconds,
+                    parent_span,
+                )
+                for profile in self._tests
+            }
+            results = {
+                profile: future.result() for profile, future in futures.items()
+            }
+
+        report = {
+            "profiles": {
+                profile: {"passed": result, **profile_report}
+                for profile, (result, profile_report) in results.items()
+            }
+        }
+        return all(result for result, _ in results.values()), report
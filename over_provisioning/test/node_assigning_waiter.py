@@ -5,8 +5,10 @@ from over_provisioning.kuber.pod_reader import PodReader
 from over_provisioning.logger import get_logger
 from over_provisioning.test.report_builder import ReportBuilder, NodeAssigning
 from over_provisioning.timer import Timer
+from over_provisioning.tracing import get_tracer
 
 logger = get_logger()
+tracer = get_tracer()
 
 
 class NodesAssigningWaiter:
@@ -25,6 +27,8 @@ class NodesAssigningWaiter:
         self._pods_to_wait_on: t.Set[str] = set()
 
         self._pods_node_assigning_time_map: t.Dict[str, NodeAssigning] = {}
+        # wall clock time when waiting was started, kept to resume waiting
+        self._wait_start_time: t.Optional[float] = None
 
     def _all_pods_has_assigned_node(self) -> bool:
         return len(self._pods_to_wait_on) == 0
@@ -44,11 +48,51 @@ class NodesAssigningWaiter:
     def pods_node_assigning_time_map(self) -> t.Dict[str, NodeAssigning]:
         return self._pods_node_assigning_time_map
 
+    def reset(self):
+        """forgets previous waiting, so waiter can be reused"""
+        self._pods_to_wait_on = set()
+        self._pods_node_assigning_time_map = {}
+        self._wait_start_time = None
+
     def set_pods_to_wait_on(self, pods_names: t.Iterable[str]):
         self._pods_to_wait_on = set(pods_names)
 
-    def wait(self):
+    def dump_state(self) -> dict:
+        assigning_map = self._pods_node_assigning_time_map
+        return {
+            "pods_to_wait_on": list(self._pods_to_wait_on),
+            "pods_node_assigning_time_map": {
+                pod_name: list(node_assigning)
+                for pod_name, node_assigning in assigning_map.items()
+            },
+            "wait_start_time": self._wait_start_time,
+        }
+
+    def restore_state(self, state: dict):
+        self._pods_to_wait_on = set(state["pods_to_wait_on"])
+        self._pods_node_assigning_time_map = {
+            pod_name: NodeAssigning(*node_assigning)
+            for pod_name, node_assigning in state[
+                "pods_node_assigning_time_map"
+            ].items()
+        }
+        self._wait_start_time = state["wait_start_time"]
+
+    def wait(self, on_progress: t.Callable[[], None] = None):
+        with tracer.span(
+            "wait_nodes_assigning", pods=len(self._pods_to_wait_on)
+        ):
+            return self._wait_on_nodes_assigning(on_progress)
+
+    def _wait_on_nodes_assigning(
+        self, on_progress: t.Callable[[], None] = None
+    ) -> bool:
         with Timer() as timer:
+            if self._wait_start_time is None:
+                self._wait_start_time = timer.start_time
+            # not zero when waiting is resumed after interruption
+            already_waited = timer.start_time - self._wait_start_time
+
             while not self._all_pods_has_assigned_node():
                 pods_to_check = self._pods_to_wait_on.copy()
                 logger.info(
@@ -56,14 +100,25 @@ class NodesAssigningWaiter:
                     f" Waited time: {timer.elapsed}"
                 )
 
-                for pod_name in pods_to_check:
-                    is_assigned, node_name = self._node_was_assigned(pod_name)
-                    if is_assigned:
-                        self._set_that_node_was_assigned(
-                            pod_name, node_name, timer.now()
+                with tracer.span("check_nodes_assigning") as span:
+                    for pod_name in pods_to_check:
+                        is_assigned, node_name = self._node_was_assigned(
+                            pod_name
                         )
-
-                if self._is_time_limit_exhausted(timer.elapsed):
+                        if is_assigned:
+                            self._set_that_node_was_assigned(
+                                pod_name, node_name, timer.now()
+                            )
+                    span.set_attribute(
+                        "not_assigned", len(self._pods_to_wait_on)
+                    )
+
+                if on_progress:
+                    on_progress()
+
+                if self._is_time_limit_exhausted(
+                    already_waited + timer.elapsed
+                ):
                     return False
 
                 self._wait(self._wait_interval)
@@ -26,9 +26,33 @@ class OverProvisioningPodsState:
     def pods_creation_time_map(self) -> t.Dict[str, float]:
         return self._pods_creation_time_map
 
+    def dump_state(self) -> dict:
+        return {
+            "initial_pods": [list(pod) for pod in self._initial_pods],
+            "created_pods": list(self._created_pods),
+            "pods_creation_time_map": self._pods_creation_time_map,
+        }
+
+    def restore_state(self, state: dict):
+        self._initial_pods = [Pod(*pod) for pod in state["initial_pods"]]
+        self._created_pods = set(state["created_pods"])
+        self._pods_creation_time_map = dict(state["pods_creation_time_map"])
+
+    def build_pools_report(self) -> t.Dict[str, dict]:
+        """only one pool is tracked, so there is no per pool report"""
+        return {}
+
     def set_initial_pods(self):
         self._initial_pods = self._over_provisioning_pods_finder.find_pods()
 
+    def start_next_wave(self):
+        """
+        recreated pods become initial pods of the next wave,
+        their creation time is kept for the report
+        """
+        self.set_initial_pods()
+        self._created_pods = set()
+
     def is_all_pods_recreated_on_new_nodes(self) -> bool:
         current_pods = self._over_provisioning_pods_finder.find_pods()
 
@@ -86,3 +110,32 @@ class OverProvisioningPodsState:
     @staticmethod
     def _get_current_time():
         return time.time()
+
+
+def wait_on_recreated_pods(
+    pods_state: OverProvisioningPodsState,
+    node_assigning_waiter: NodesAssigningWaiter,
+    start_time: float,
+) -> t.Tuple[int, t.Optional[float], bool]:
+    """
+    waits until over provisioning pods recreated since initial pods were
+    set get nodes, returns amount of recreated pods, time from start
+    until the last of them got node and whether all of them got it in time
+    """
+    recreated_pods = pods_state.save_newly_created_pods()
+    if not recreated_pods:
+        return 0, None, True
+
+    node_assigning_waiter.reset()
+    node_assigning_waiter.set_pods_to_wait_on(recreated_pods)
+    is_assigned = node_assigning_waiter.wait()
+    assigning_timestamps = [
+        node_assigning.timestamp
+        for node_assigning in (
+            node_assigning_waiter.pods_node_assigning_time_map.values()
+        )
+    ]
+    reassign_time = (
+        max(assigning_timestamps) - start_time if is_assigned else None
+    )
+    return len(recreated_pods), reassign_time, is_assigned
@@ -0,0 +1,161 @@
+import typing as t
+
+from over_provisioning.kuber.pods_watch_cache import (
+    CachedPodReader,
+    PodSelector,
+)
+from over_provisioning.label_selector import parse_label_selector
+from over_provisioning.pods_finder import OverProvisioningPodsFinder, Pod
+from over_provisioning.test.op_pods_state import OverProvisioningPodsState
+
+
+class OverProvisioningPool(t.NamedTuple):
+    name: str
+    selector: PodSelector
+
+    @classmethod
+    def from_string(cls, pool: str) -> "OverProvisioningPool":
+        """pool is "namespace:label_selector", it is also used as name"""
+        namespace, separator, label_selector = pool.partition(":")
+        if not separator or not namespace:
+            raise ValueError(
+                f"Wrong over provisioning pool: {pool},"
+                f" expected format: namespace:label_selector"
+            )
+        # pods are matched on client side, wrong selector matches nothing
+        parse_label_selector(label_selector)
+        return cls(pool, PodSelector(namespace, label_selector))
+
+
+class MultiPoolPodsState:
+    """
+    Same interface as OverProvisioningPodsState for several pools.
+    Test pods preempt over provisioning pods only in the pools of
+    node groups where they are scheduled, so:
+      last pod is removed when any pool is fully preempted
+      test passes when all preempted pools are recreated on new nodes
+    Pods names are qualified with namespace("{namespace}/{pod name}").
+    """
+
+    def __init__(
+        self,
+        pools: t.List[OverProvisioningPool],
+        pools_states: t.Dict[str, OverProvisioningPodsState],
+    ):
+        self._pools = pools
+        self._pools_states = pools_states
+
+    def _qualify(self, pool: OverProvisioningPool, pod_name: str) -> str:
+        return CachedPodReader.qualify_pod_name(
+            pool.selector.namespace, pod_name
+        )
+
+    def _preempted_pools(self) -> t.List[OverProvisioningPool]:
+        return [
+            pool
+            for pool in self._pools
+            if self._pools_states[pool.name].last_pod_was_removed()
+        ]
+
+    @property
+    def created_pods(self) -> t.Set[str]:
+        return {
+            self._qualify(pool, pod_name)
+            for pool in self._pools
+            for pod_name in self._pools_states[pool.name].created_pods
+        }
+
+    @property
+    def pods_creation_time_map(self) -> t.Dict[str, float]:
+        return {
+            self._qualify(pool, pod_name): creation_time
+            for pool in self._pools
+            for pod_name, creation_time in self._pools_states[
+                pool.name
+            ].pods_creation_time_map.items()
+        }
+
+    def dump_state(self) -> dict:
+        return {
+            pool_name: state.dump_state()
+            for pool_name, state in self._pools_states.items()
+        }
+
+    def restore_state(self, state: dict):
+        for pool_name, pool_state in state.items():
+            self._pools_states[pool_name].restore_state(pool_state)
+
+    def build_pools_report(self) -> t.Dict[str, dict]:
+        report = {}
+        for pool in self._pools:
+            state = self._pools_states[pool.name]
+            report[pool.name] = {
+                "namespace": pool.selector.namespace,
+                "label_selector": pool.selector.label_selector,
+                "preempted": state.last_pod_was_removed(),
+                "recreated_pods": sorted(
+                    self._qualify(pool, pod_name)
+                    for pod_name in state.created_pods
+                ),
+            }
+        return report
+
+    def set_initial_pods(self):
+        for state in self._pools_states.values():
+            state.set_initial_pods()
+
+    def start_next_wave(self):
+        for state in self._pools_states.values():
+            state.start_next_wave()
+
+    def is_all_pods_recreated_on_new_nodes(self) -> bool:
+        preempted_pools = self._preempted_pools()
+        return bool(preempted_pools) and all(
+            self._pools_states[pool.name].is_all_pods_recreated_on_new_nodes()
+            for pool in preempted_pools
+        )
+
+    def last_pod_was_removed(self) -> bool:
+        return bool(self._preempted_pools())
+
+    def save_newly_created_pods(self) -> t.Set[str]:
+        newly_created_pods = set()
+        for pool in self._pools:
+            state = self._pools_states[pool.name]
+            newly_created_pods.update(
+                self._qualify(pool, pod_name)
+                for pod_name in state.save_newly_created_pods()
+            )
+        return newly_created_pods
+
+
+class _StaticPodsFinder(OverProvisioningPodsFinder):
+    def __init__(self, pods: t.List[Pod]):
+        self.pods = pods
+
+    def find_pods(self) -> t.List[Pod]:
+        return self.pods
+
+
+def test_multi_pool_pods_state():
+    cpu_pool = OverProvisioningPool.from_string("op:app=cpu")
+    gpu_pool = OverProvisioningPool.from_string("op-gpu:app=gpu")
+    cpu_finder = _StaticPodsFinder([Pod("cpu-1", "node-1")])
+    gpu_finder = _StaticPodsFinder([Pod("gpu-1", "gpu-node-1")])
+    state = MultiPoolPodsState(
+        [cpu_pool, gpu_pool],
+        {
+            cpu_pool.name: OverProvisioningPodsState(cpu_finder, None),
+            gpu_pool.name: OverProvisioningPodsState(gpu_finder, None),
+        },
+    )
+    state.set_initial_pods()
+    assert not state.last_pod_was_removed()
+
+    # cpu pool is preempted and recreated on a new node
+    cpu_finder.pods = [Pod("cpu-2", "node-2")]
+    assert state.save_newly_created_pods() == {"op/cpu-2"}
+    assert state.last_pod_was_removed()
+    assert state.is_all_pods_recreated_on_new_nodes()
+    assert state.build_pools_report()["op-gpu:app=gpu"]["preempted"] is False
+    assert set(state.pods_creation_time_map) == {"op/cpu-2"}
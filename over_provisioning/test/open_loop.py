@@ -0,0 +1,395 @@
+import random
+import time
+import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from over_provisioning.environment.setuper import EnvironmentSetuper
+from over_provisioning.kuber.pod_creator import PodCreator
+from over_provisioning.kuber.pod_template import PodTemplate
+from over_provisioning.kuber.pods_lister import PodsLister
+from over_provisioning.logger import get_logger
+from over_provisioning.test.baseline_waiter import BaselineReturnWaiter
+from over_provisioning.test.node_assigning_waiter import NodesAssigningWaiter
+from over_provisioning.test.op_pods_state import (
+    OverProvisioningPodsState,
+    wait_on_recreated_pods,
+)
+from over_provisioning.test.pod_measurements import DurationsColumn
+from over_provisioning.test.pods_cleaner import PodsCleaner
+from over_provisioning.timer import Timer
+from over_provisioning.tracing import get_tracer
+
+logger = get_logger()
+tracer = get_tracer()
+
+POISSON_ARRIVALS = "poisson"
+CONSTANT_ARRIVALS = "constant"
+
+CREATING_STATE = "creating"
+PENDING_STATE = "pending"
+RUNNING_STATE = "running"
+FAILED_STATE = "failed"
+TIMED_OUT_STATE = "timed_out"
+
+
+def generate_arrival_offsets(
+    arrival_process: str,
+    rate_per_minute: float,
+    duration: float,
+    rng: random.Random = None,
+) -> t.Iterator[float]:
+    """
+    seconds from the start of the step when pods arrive,
+    poisson process has exponentially distributed intervals
+    """
+    rng = rng or random.Random()
+    rate_per_second = rate_per_minute / 60
+    offset = 0.0
+    while True:
+        if arrival_process == POISSON_ARRIVALS:
+            offset += rng.expovariate(rate_per_second)
+        else:
+            offset += 1 / rate_per_second
+        if offset > duration:
+            return
+        yield offset
+
+
+class InFlightPod:
+    __slots__ = ("name", "arrival_time", "state", "creation", "finish_time")
+
+    def __init__(self, name: str, arrival_time: float, creation: Future):
+        self.name = name
+        self.arrival_time = arrival_time
+        self.state = CREATING_STATE
+        self.creation = creation
+        self.finish_time: t.Optional[float] = None
+
+    @property
+    def time_to_running(self) -> float:
+        """precision is one tick of pods phases reading"""
+        return self.finish_time - self.arrival_time
+
+
+def read_pods_phases(
+    pods_lister: PodsLister, namespace: str, label_selector: str
+) -> t.Dict[str, str]:
+    return {
+        pod.metadata.name: pod.status.phase
+        for pod in pods_lister.list_by_label_selector(
+            namespace, label_selector
+        )
+    }
+
+
+def advance_in_flight_pods(
+    in_flight: t.Dict[str, InFlightPod],
+    pods_phases: t.Dict[str, str],
+    now: float,
+    max_pod_creation_time: float,
+) -> t.List[InFlightPod]:
+    """
+    moves in-flight pods to the next state:
+        creating -> pending -> running | timed_out
+        creating -> failed(creation request error)
+    finished pods are removed from in-flight and returned
+    """
+    finished = []
+    for pod in list(in_flight.values()):
+        if pod.state == CREATING_STATE and pod.creation.done():
+            if pod.creation.exception():
+                logger.warning(
+                    f"Pod: {pod.name} creation failed:"
+                    f" {pod.creation.exception()}"
+                )
+                pod.state = FAILED_STATE
+            else:
+                pod.state = PENDING_STATE
+        if pod.state == PENDING_STATE:
+            if pods_phases.get(pod.name) == "Running":
+                pod.state = RUNNING_STATE
+            elif now - pod.arrival_time > max_pod_creation_time:
+                pod.state = TIMED_OUT_STATE
+        if pod.state not in (CREATING_STATE, PENDING_STATE):
+            pod.finish_time = now
+            finished.append(pod)
+            del in_flight[pod.name]
+    return finished
+
+
+class OpenLoopStepResult(t.NamedTuple):
+    rate_per_minute: float
+    arrivals: int
+    latencies: DurationsColumn
+    failed: int
+    timed_out: int
+    # the biggest amount of pods not running yet at the same time
+    max_in_flight: int
+    # from step start until the last arrival was sent,
+    # longer than step duration when sending falls behind
+    arrivals_duration: float
+    preempted_op_pods: int
+    # from step start until the last recreated pod got node
+    op_pods_reassign_time: t.Optional[float]
+    op_pods_reassigned: bool
+    return_to_baseline: t.Optional[dict] = None
+
+    @property
+    def kept_up(self) -> bool:
+        return self.failed == 0 and self.timed_out == 0
+
+    def to_dict(self) -> dict:
+        return {
+            "offered_load_per_minute": self.rate_per_minute,
+            "achieved_load_per_minute": (
+                self.arrivals / self.arrivals_duration * 60
+            ),
+            "arrivals": self.arrivals,
+            "running": self.latencies.count,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "max_in_flight": self.max_in_flight,
+            "time_to_running": self.latencies.build_summary(),
+            "kept_up": self.kept_up,
+            "preempted_op_pods": self.preempted_op_pods,
+            "op_pods_reassign_time": self.op_pods_reassign_time,
+            "op_pods_reassigned": self.op_pods_reassigned,
+            "return_to_baseline": self.return_to_baseline,
+        }
+
+
+class OpenLoopLoadTest:
+    """
+    Creates pods at target arrival rate independently of their completion.
+    Creation requests are sent from thread pool, in-flight pods are
+    advanced by one pods list call per tick.
+    Arrival rates are run one by one, pods of every step are deleted
+    before the next one, with baseline return waiter the next step starts
+    when cluster is back to initial nodes and over provisioning pods.
+    Over provisioning pods preempted during the step are waited on
+    until they get nodes again.
+    """
+
+    def __init__(
+        self,
+        pod_creator: PodCreator,
+        pods_lister: PodsLister,
+        pod_template: PodTemplate,
+        over_provisioning_pods_state: OverProvisioningPodsState,
+        nodes_assigning_waiter: NodesAssigningWaiter,
+        environment_setuper: EnvironmentSetuper,
+        pods_cleaner: PodsCleaner,
+        namespace: str,
+        baseline_return_waiter: BaselineReturnWaiter = None,
+        arrival_process: str = POISSON_ARRIVALS,
+        step_duration: float = 300,
+        tick_interval: float = 1,
+        max_workers: int = 16,
+        seed: int = None,
+    ):
+        self._pod_creator = pod_creator
+        self._pods_lister = pods_lister
+        self._pod_template = pod_template
+        self._over_provisioning_pods_state = over_provisioning_pods_state
+        self._nodes_assigning_waiter = nodes_assigning_waiter
+        self._environment_setuper = environment_setuper
+        self._pods_cleaner = pods_cleaner
+        self._namespace = namespace
+        self._baseline_return_waiter = baseline_return_waiter
+        self._arrival_process = arrival_process
+        self._step_duration = step_duration
+        self._tick_interval = tick_interval
+        self._max_workers = max_workers
+        self._rng = random.Random(seed)
+
+    def _advance(
+        self,
+        in_flight: t.Dict[str, InFlightPod],
+        latencies: DurationsColumn,
+        max_pod_creation_time: float,
+    ) -> t.Dict[str, int]:
+        """moves in-flight pods to the next state, counts finished ones"""
+        finished = {FAILED_STATE: 0, TIMED_OUT_STATE: 0}
+        pods_phases = (
+            read_pods_phases(
+                self._pods_lister,
+                self._namespace,
+                self._pod_template.label_selector,
+            )
+            if in_flight
+            else {}
+        )
+        for pod in advance_in_flight_pods(
+            in_flight, pods_phases, Timer.now(), max_pod_creation_time
+        ):
+            if pod.state == RUNNING_STATE:
+                latencies.append(pod.time_to_running)
+            else:
+                finished[pod.state] += 1
+        return finished
+
+    def _run_step(
+        self,
+        step: int,
+        rate_per_minute: float,
+        max_pod_creation_time: float,
+        executor: ThreadPoolExecutor,
+    ) -> OpenLoopStepResult:
+        offsets = generate_arrival_offsets(
+            self._arrival_process,
+            rate_per_minute,
+            self._step_duration,
+            self._rng,
+        )
+        next_offset = next(offsets, None)
+        in_flight: t.Dict[str, InFlightPod] = {}
+        created_pods: t.List[str] = []
+        latencies = DurationsColumn()
+        failed = timed_out = max_in_flight = 0
+        # pods which are still being created are deleted too,
+        # pods which failed to be created are skipped by deleter
+        self._pods_cleaner.set_pods_to_delete(created_pods)
+        self._over_provisioning_pods_state.set_initial_pods()
+
+        start_time = arrivals_end_time = Timer.now()
+        while next_offset is not None or in_flight:
+            # all arrivals which are due, deadlines are absolute
+            # so slow API calls do not shift next arrivals
+            now = Timer.now()
+            while next_offset is not None and start_time + next_offset <= now:
+                pod_name = f"test-pod-load{step}-{len(created_pods) + 1}"
+                created_pods.append(pod_name)
+                in_flight[pod_name] = InFlightPod(
+                    pod_name,
+                    start_time + next_offset,
+                    executor.submit(
+                        self._pod_creator.create_pod,
+                        pod_name,
+                        self._pod_template,
+                    ),
+                )
+                next_offset = next(offsets, None)
+                arrivals_end_time = Timer.now()
+            max_in_flight = max(max_in_flight, len(in_flight))
+
+            finished = self._advance(
+                in_flight, latencies, max_pod_creation_time
+            )
+            failed += finished[FAILED_STATE]
+            timed_out += finished[TIMED_OUT_STATE]
+
+            next_tick = Timer.now() + self._tick_interval
+            if next_offset is not None:
+                next_tick = min(next_tick, start_time + next_offset)
+            time.sleep(max(next_tick - Timer.now(), 0))
+
+        (
+            preempted_op_pods,
+            op_pods_reassign_time,
+            op_pods_reassigned,
+        ) = wait_on_recreated_pods(
+            self._over_provisioning_pods_state,
+            self._nodes_assigning_waiter,
+            start_time,
+        )
+        return OpenLoopStepResult(
+            rate_per_minute,
+            len(created_pods),
+            latencies,
+            failed,
+            timed_out,
+            max_in_flight,
+            max(arrivals_end_time - start_time, self._step_duration),
+            preempted_op_pods,
+            op_pods_reassign_time,
+            op_pods_reassigned,
+        )
+
+    def run(
+        self,
+        rates_per_minute: t.Iterable[float],
+        max_pod_creation_time: float,
+    ) -> t.Tuple[bool, dict]:
+        results: t.List[OpenLoopStepResult] = []
+        with self._environment_setuper as env_created_successfully:
+            if env_created_successfully:
+                with self._pods_cleaner, ThreadPoolExecutor(
+                    max_workers=self._max_workers
+                ) as executor:
+                    for step, rate in enumerate(rates_per_minute, 1):
+                        logger.info(
+                            f"Open loop step {step}: {rate} pods per minute"
+                        )
+                        if self._baseline_return_waiter:
+                            self._baseline_return_waiter.set_baseline()
+                        with tracer.span("open_loop_step", rate=rate):
+                            result = self._run_step(
+                                step, rate, max_pod_creation_time, executor
+                            )
+                        self._pods_cleaner.clean()
+                        self._pods_cleaner.set_pods_to_delete([])
+                        if self._baseline_return_waiter:
+                            result = result._replace(
+                                return_to_baseline=(
+                                    self._baseline_return_waiter.wait()
+                                )
+                            )
+                        results.append(result)
+
+        saturation_rate = next(
+            (
+                result.rate_per_minute
+                for result in results
+                if not result.kept_up
+            ),
+            None,
+        )
+        report = {
+            "arrival_process": self._arrival_process,
+            "step_duration": self._step_duration,
+            "steps": [result.to_dict() for result in results],
+            "saturation_rate_per_minute": saturation_rate,
+            "environment_setup_time": self._environment_setuper.create_time,
+            "environment_teardown_time": (
+                self._environment_setuper.destroy_time
+            ),
+        }
+        passed = bool(results) and saturation_rate is None
+        return passed, report
+
+
+def test_generate_arrival_offsets():
+    constant = list(generate_arrival_offsets(CONSTANT_ARRIVALS, 60, 5))
+    assert constant == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    poisson = list(
+        generate_arrival_offsets(
+            POISSON_ARRIVALS, 60, 10000, random.Random(1)
+        )
+    )
+    assert 9500 < len(poisson) < 10500
+    assert poisson == sorted(poisson)
+
+
+def test_advance_in_flight_pods():
+    created = Future()
+    created.set_result(0.1)
+    failed = Future()
+    failed.set_exception(RuntimeError("forbidden"))
+    in_flight = {
+        "running": InFlightPod("running", 100, created),
+        "pending": InFlightPod("pending", 100, created),
+        "late": InFlightPod("late", 10, created),
+        "failed": InFlightPod("failed", 100, failed),
+        "creating": InFlightPod("creating", 100, Future()),
+    }
+    finished = advance_in_flight_pods(
+        in_flight, {"running": "Running", "pending": "Pending"}, 105, 60
+    )
+    assert {pod.name: pod.state for pod in finished} == {
+        "running": RUNNING_STATE,
+        "late": TIMED_OUT_STATE,
+        "failed": FAILED_STATE,
+    }
+    assert finished[0].time_to_running == 5
+    assert set(in_flight) == {"pending", "creating"}
@@ -1,5 +1,17 @@
+import contextlib
+import typing as t
+
 from over_provisioning.logger import get_logger
+from over_provisioning.test.capacity_planner import CapacityPlanner
+from over_provisioning.test.checkpoint import (
+    RunCheckpoint,
+    WaveProgress,
+    CREATING_EXTRA_POD_PHASE,
+    CREATING_PODS_PHASE,
+    WAITING_NODES_ASSIGNING_PHASE,
+)
 from over_provisioning.test.node_assigning_waiter import NodesAssigningWaiter
+from over_provisioning.test.coordination import ProfileCoordination
 from over_provisioning.test.nodes_assigning_timeout_handler import (
     NodesAssigningTimeoutHandler,
 )
@@ -8,13 +20,25 @@ from over_provisioning.test.pods_spawner import (
     PodCreationTimeHitsLimitError,
 )
 from over_provisioning.test.op_pods_state import OverProvisioningPodsState
-from over_provisioning.test.report_builder import ReportBuilder
+from over_provisioning.test.report_builder import (
+    NodeAssigning,
+    ReportBuilder,
+    WaveTimes,
+    build_wave_report,
+)
+from over_provisioning.timer import Timer
+from over_provisioning.tracing import get_tracer
 
 logger = get_logger()
+tracer = get_tracer()
 
 
 class PodCreatingLoop:
-    """For one over provisioning pod"""
+    """
+    Creates test pods until all over provisioning pods are preempted and
+    recreated on new nodes. With several waves recreated pods are preempted
+    again by the next test pods, every wave is reported separately.
+    """
 
     def __init__(
         self,
@@ -24,6 +48,10 @@ class PodCreatingLoop:
         node_assigning_timeout_handler: NodesAssigningTimeoutHandler,
         report_builder: ReportBuilder,
         pods_to_create_quantity: int = None,
+        capacity_planner: CapacityPlanner = None,
+        checkpoint: RunCheckpoint = None,
+        coordination: ProfileCoordination = None,
+        waves: int = 1,
     ):
         self._pods_spawner = pods_spawner
         self._over_provisioning_pods_state = over_provisioning_pods_state
@@ -32,6 +60,12 @@ class PodCreatingLoop:
 
         self._pods_to_create_quantity = pods_to_create_quantity
         self._report_builder = report_builder
+        self._capacity_planner = capacity_planner
+        self._checkpoint = checkpoint
+        self._coordination = coordination
+        self._waves = waves
+        self._pods_node_assigning_time_map: t.Dict[str, NodeAssigning] = {}
+        self._wave_progress = WaveProgress()
 
     def get_created_pods(self):
         return self._pods_spawner.get_created_pods()
@@ -53,76 +87,312 @@ class PodCreatingLoop:
         return True
 
     def _create_extra_pod(
-        self, max_pod_creation_time_in_seconds: float
-    ) -> bool:
+        self,
+        max_pod_creation_time_in_seconds: float,
+        pod_name_suffix: str = "extra",
+    ) -> t.Optional[float]:
+        """returns creation time, None when pod hit the time limit"""
         try:
-            pod_name, creation_time = self._pods_spawner.create_pod(
-                "extra", max_pod_creation_time_in_seconds
+            _, creation_time = self._pods_spawner.create_pod(
+                pod_name_suffix, max_pod_creation_time_in_seconds
             )
-            self._report_builder.set_extra_pod_creation_time(creation_time)
         except PodCreationTimeHitsLimitError:
             self._report_builder.add_error("Extra pod creation timout error")
             logger.exception("Pod creation failed")
+            return None
+        return creation_time
+
+    def _plan_bulk_fill_size(self) -> int:
+        batch_size = self._capacity_planner.plan_batch_size()
+        if self._pods_to_create_quantity is not None:
+            # at least one pod is left for the single pod stepping
+            batch_size = min(batch_size, self._pods_to_create_quantity - 1)
+        return batch_size
+
+    def _bulk_fill(
+        self, max_pod_creation_time_in_seconds: float
+    ) -> t.Tuple[bool, int]:
+        """
+        spawns in one batch pods which fit into free capacity,
+        returns status and index of the next pod
+        """
+        batch_size = self._plan_bulk_fill_size()
+        if batch_size <= 0:
+            return True, 1
+
+        logger.info(f"Bulk fill: creating {batch_size} pods concurrently")
+        try:
+            with tracer.span("bulk_fill", pods=batch_size):
+                created_pods = self._pods_spawner.create_pods(
+                    [str(i) for i in range(1, batch_size + 1)],
+                    max_pod_creation_time_in_seconds,
+                )
+        except PodCreationTimeHitsLimitError:
+            logger.exception("Pod creation failed during bulk fill")
+            self._report_builder.add_error(f"Pod creation timeout error")
+            return False, batch_size + 1
+
+        for pod_name, creation_time in created_pods:
+            self._report_builder.add_pod_creation_report(
+                pod_name, creation_time
+            )
+        return True, batch_size + 1
+
+    def _save_checkpoint(self, phase: str, next_pod_index: int = None):
+        if self._checkpoint:
+            self._checkpoint.save(phase, next_pod_index, self._wave_progress)
+
+    def _wait_on_nodes_assigning(self, next_pod_index: int = None) -> bool:
+        self._save_checkpoint(WAITING_NODES_ASSIGNING_PHASE, next_pod_index)
+        is_assigned = self._node_assigning_waiter.wait(
+            on_progress=lambda: self._save_checkpoint(
+                WAITING_NODES_ASSIGNING_PHASE, next_pod_index
+            )
+        )
+        # waiter is reset for every wave
+        self._pods_node_assigning_time_map.update(
+            self._node_assigning_waiter.pods_node_assigning_time_map
+        )
+        self._report_builder.set_op_pods_nodes_assigning_time_map(
+            self._pods_node_assigning_time_map
+        )
+        self._report_builder.set_op_pools_report(
+            self._over_provisioning_pods_state.build_pools_report()
+        )
+        if not is_assigned:
+            self._node_assigning_timeout_handler.handle()
             return False
+
+        if (
+            self._over_provisioning_pods_state.is_all_pods_recreated_on_new_nodes()
+        ):
+            return True
+        return False
+
+    def _run_waves(
+        self,
+        pod_index: int,
+        max_pod_creation_time_in_seconds: float,
+        wave_progress: WaveProgress = None,
+        phase: str = CREATING_PODS_PHASE,
+    ) -> bool:
+        """
+        runs waves one by one, the first wave is continued
+        from the phase when progress of interrupted run is given
+        """
+        first_wave = wave_progress.wave if wave_progress else 1
+        for wave in range(first_wave, self._waves + 1):
+            if wave > first_wave:
+                logger.info(f"Starting over provisioning pods wave: {wave}")
+                self._over_provisioning_pods_state.start_next_wave()
+                self._node_assigning_waiter.reset()
+                wave_progress = None
+                phase = CREATING_PODS_PHASE
+            self._wave_progress = wave_progress or WaveProgress(
+                wave, pod_index
+            )
+            with tracer.span("wave", wave=wave):
+                ok, pod_index = self._run_wave(
+                    pod_index, max_pod_creation_time_in_seconds, phase
+                )
+            if not ok:
+                return False
         return True
 
-    def run(self, max_pod_creation_time_in_seconds: float):
-        self._over_provisioning_pods_state.set_initial_pods()
+    def _run_wave(
+        self,
+        pod_index: int,
+        max_pod_creation_time_in_seconds: float,
+        phase: str,
+    ) -> t.Tuple[bool, int]:
+        """returns status and index of the next pod"""
+        wave = self._wave_progress.wave
+        # recreated over provisioning pods are pending until they get
+        # nodes, so other profiles must not step and preempt them
+        with self._stepping():
+            if phase != WAITING_NODES_ASSIGNING_PHASE:
+                if phase == CREATING_PODS_PHASE:
+                    if self._coordination and wave == 1:
+                        # over provisioning pods could be moved
+                        # by other profiles
+                        self._over_provisioning_pods_state.set_initial_pods()
+                    ok, pod_index = self._create_pods_until_wave_preemption(
+                        pod_index, max_pod_creation_time_in_seconds
+                    )
+                    if not ok:
+                        return False, pod_index
+                ok, extra_pod_creation_time = self._create_wave_extra_pod(
+                    wave, max_pod_creation_time_in_seconds
+                )
+                if not ok:
+                    return False, pod_index
+                self._wave_progress = self._wave_progress._replace(
+                    extra_pod_creation_time=extra_pod_creation_time
+                )
+                self._node_assigning_waiter.set_pods_to_wait_on(
+                    self._over_provisioning_pods_state.created_pods
+                )
+
+            is_recreated = self._wait_on_nodes_assigning(pod_index)
+        if self._waves > 1:
+            self._add_wave_report(pod_index)
+        return is_recreated, pod_index
+
+    def _add_wave_report(self, next_pod_index: int):
+        op_pods_state = self._over_provisioning_pods_state
+        waiter = self._node_assigning_waiter
+        wave_progress = self._wave_progress
+        pods_creation_time_map = op_pods_state.pods_creation_time_map
+        assigning_map = waiter.pods_node_assigning_time_map
+        now = Timer.now()
+        self._report_builder.add_wave_report(
+            build_wave_report(
+                wave_progress.wave,
+                next_pod_index - wave_progress.first_pod_index,
+                # unknown when checkpoint of older version is resumed
+                wave_progress.times or WaveTimes(now, now, now),
+                wave_progress.extra_pod_creation_time,
+                {
+                    pod_name: pods_creation_time_map[pod_name]
+                    for pod_name in op_pods_state.created_pods
+                },
+                assigning_map,
+                len(assigning_map) == len(op_pods_state.created_pods),
+            )
+        )
+
+    def _create_wave_extra_pod(
+        self, wave: int, max_pod_creation_time_in_seconds: float
+    ) -> t.Tuple[bool, t.Optional[float]]:
+        """
+        all over provisioning pods are preempted, so extra pod
+        is created in free capacity, returns status and creation time
+        """
+        extra_pod_suffix = "extra" if wave == 1 else f"extra-{wave}"
+        extra_pod_name = self._pods_spawner.construct_pod_name(
+            extra_pod_suffix
+        )
+        self._report_builder.set_op_pods_time_creation_map(
+            self._over_provisioning_pods_state.pods_creation_time_map
+        )
+        if self._pods_spawner.is_created(extra_pod_name):
+            # created before interruption, its creation time is lost
+            logger.info(f"Extra pod: {extra_pod_name} is already created")
+            return True, None
 
-        i = 1
+        extra_pod_creation_time = self._create_extra_pod(
+            max_pod_creation_time_in_seconds, extra_pod_suffix
+        )
+        if extra_pod_creation_time is None:
+            return False, None
+        if wave == 1:
+            self._report_builder.set_extra_pod_creation_time(
+                extra_pod_creation_time
+            )
+        return True, extra_pod_creation_time
+
+    def _create_pods_until_wave_preemption(
+        self, first_pod_index: int, max_pod_creation_time_in_seconds: float
+    ) -> t.Tuple[bool, int]:
+        """
+        returns status and index of the next pod,
+        times of the wave are kept in the wave progress
+        """
+        op_pods_state = self._over_provisioning_pods_state
+        started_time = Timer.now()
+        first_preemption_time: t.Optional[float] = None
+        i = first_pod_index
         while True:
             ok = self._create_next_pod(str(i), max_pod_creation_time_in_seconds)
             if not ok:
-                return False
+                return False, i
 
-            newly_created_pods = (
-                self._over_provisioning_pods_state.save_newly_created_pods()
-            )
+            with tracer.span("check_op_pods"):
+                newly_created_pods = op_pods_state.save_newly_created_pods()
             if newly_created_pods:
                 logger.info(
                     f"The following over provisioning pods was created: {str(newly_created_pods)}"
                 )
+                if first_preemption_time is None:
+                    first_preemption_time = Timer.now()
+            self._save_checkpoint(CREATING_PODS_PHASE, i + 1)
 
-            if self._over_provisioning_pods_state.last_pod_was_removed():
-                last_pod_created_without_delay = self._create_extra_pod(
-                    max_pod_creation_time_in_seconds
-                )
-                self._report_builder.set_op_pods_time_creation_map(
-                    self._over_provisioning_pods_state.pods_creation_time_map
-                )
-                if last_pod_created_without_delay:
-                    pods_to_wait_on = (
-                        self._over_provisioning_pods_state.created_pods
-                    )
-
-                    self._node_assigning_waiter.set_pods_to_wait_on(
-                        pods_to_wait_on
+            if op_pods_state.last_pod_was_removed():
+                preempted_time = Timer.now()
+                self._wave_progress = self._wave_progress._replace(
+                    times=WaveTimes(
+                        started_time,
+                        first_preemption_time or preempted_time,
+                        preempted_time,
                     )
-                    if not self._node_assigning_waiter.wait():
-                        self._report_builder.set_op_pods_nodes_assigning_time_map(
-                            self._node_assigning_waiter.pods_node_assigning_time_map
-                        )
-                        self._node_assigning_timeout_handler.handle()
-                        return False
-                    self._report_builder.set_op_pods_nodes_assigning_time_map(
-                        self._node_assigning_waiter.pods_node_assigning_time_map
-                    )
-
-                    if (
-                        self._over_provisioning_pods_state.is_all_pods_recreated_on_new_nodes()
-                    ):
-                        return True
-                    return False
-                return False
+                )
+                self._save_checkpoint(CREATING_EXTRA_POD_PHASE, i + 1)
+                return True, i + 1
 
             if self._is_created_pods_quantity_hits_limit(i):
                 message = f"Hit the limit of pods quantity: {self._pods_to_create_quantity}"
                 self._report_builder.add_error(message)
                 logger.info(message)
-                return False
+                return False, i
 
             i += 1
 
+    def _filling(self) -> t.ContextManager:
+        if self._coordination:
+            return self._coordination.filling()
+        return contextlib.nullcontext()
+
+    def _stepping(self) -> t.ContextManager:
+        if self._coordination:
+            return self._coordination.stepping()
+        return contextlib.nullcontext()
+
+    def run(self, max_pod_creation_time_in_seconds: float):
+        with tracer.span("pod_creating_loop"):
+            return self._run(max_pod_creation_time_in_seconds)
+
+    def _run(self, max_pod_creation_time_in_seconds: float):
+        with self._filling(), tracer.span("filling"):
+            self._over_provisioning_pods_state.set_initial_pods()
+            self._save_checkpoint(CREATING_PODS_PHASE, 1)
+
+            i = 1
+            if self._capacity_planner:
+                ok, i = self._bulk_fill(max_pod_creation_time_in_seconds)
+                if not ok:
+                    return self._finish(False)
+                self._save_checkpoint(CREATING_PODS_PHASE, i)
+
+        with tracer.span("stepping"):
+            return self._finish(
+                self._run_waves(i, max_pod_creation_time_in_seconds)
+            )
+
+    def resume(self, max_pod_creation_time_in_seconds: float):
+        """continues interrupted run from the last saved checkpoint"""
+        phase, next_pod_index, wave_progress = self._checkpoint.restore()
+        logger.info(
+            f"Resuming run from phase: {phase}, wave: {wave_progress.wave},"
+            f" next pod index: {next_pod_index}"
+        )
+        # nodes assigning of previous waves
+        self._pods_node_assigning_time_map.update(
+            self._report_builder.op_pods_node_assigning_map
+        )
+        return self._finish(
+            self._run_waves(
+                next_pod_index,
+                max_pod_creation_time_in_seconds,
+                wave_progress,
+                phase,
+            )
+        )
+
+    def _finish(self, test_result: bool) -> bool:
+        if self._checkpoint:
+            self._checkpoint.remove()
+        return test_result
+
     def _is_created_pods_quantity_hits_limit(self, pods_quantity: int):
         if self._pods_to_create_quantity is None:
             # pods_to_create_quantity None value means infinite pod creation
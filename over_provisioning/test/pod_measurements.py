@@ -0,0 +1,239 @@
+import math
+import typing as t
+from array import array
+
+
+class PodNamesColumn:
+    """
+    Stores pod names as 8 byte ids:
+    names like "{base name}-{number}" are stored as their number,
+    other names are kept once in a list and referenced by negative id.
+    Base name is taken from the first appended numbered pod name.
+    Numbers are dense, so appended ones are marked in a bitmap
+    (1 bit per number) next to the array and lookups do not rescan it.
+    """
+
+    def __init__(self):
+        self._base_name: t.Optional[str] = None
+        self._ids = array("q")
+        self._numbers_bitmap = bytearray()
+        self._max_number = 0
+        self._other_names: t.List[str] = []
+        self._other_names_ids: t.Dict[str, int] = {}
+
+    @staticmethod
+    def _split_number(pod_name: str) -> t.Tuple[str, t.Optional[int]]:
+        base_name, _, suffix = pod_name.rpartition("-")
+        if not base_name or not suffix.isdigit():
+            return base_name, None
+        if str(int(suffix)) != suffix:
+            # leading zeros would be lost
+            return base_name, None
+        return base_name, int(suffix)
+
+    def _parse_number(self, pod_name: str) -> t.Optional[int]:
+        base_name, number = self._split_number(pod_name)
+        if number is None or base_name != self._base_name:
+            return None
+        return number
+
+    def _to_id(self, pod_name: str) -> int:
+        if self._base_name is None:
+            base_name, number = self._split_number(pod_name)
+            if number is not None:
+                self._base_name = base_name
+        number = self._parse_number(pod_name)
+        if number is not None:
+            return number
+        other_name_id = self._other_names_ids.get(pod_name)
+        if other_name_id is None:
+            self._other_names.append(pod_name)
+            other_name_id = -len(self._other_names)
+            self._other_names_ids[pod_name] = other_name_id
+        return other_name_id
+
+    def _to_name(self, pod_id: int) -> str:
+        if pod_id >= 0:
+            return f"{self._base_name}-{pod_id}"
+        return self._other_names[-pod_id - 1]
+
+    def append(self, pod_name: str):
+        pod_id = self._to_id(pod_name)
+        self._ids.append(pod_id)
+        if pod_id >= 0:
+            byte_index = pod_id >> 3
+            if byte_index >= len(self._numbers_bitmap):
+                self._numbers_bitmap.extend(
+                    bytes(byte_index + 1 - len(self._numbers_bitmap))
+                )
+            self._numbers_bitmap[byte_index] |= 1 << (pod_id & 7)
+            self._max_number = max(self._max_number, pod_id)
+
+    def max_number(self, base_name: str) -> int:
+        """biggest number of pods named "{base_name}-{number}", 0 if none"""
+        if base_name != self._base_name:
+            return 0
+        return self._max_number
+
+    def __getitem__(self, index: int) -> str:
+        return self._to_name(self._ids[index])
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> t.Iterator[str]:
+        return (self._to_name(pod_id) for pod_id in self._ids)
+
+    def __contains__(self, pod_name: str) -> bool:
+        number = self._parse_number(pod_name)
+        if number is not None:
+            byte_index = number >> 3
+            return byte_index < len(self._numbers_bitmap) and bool(
+                self._numbers_bitmap[byte_index] & (1 << (number & 7))
+            )
+        # other names get their ids only when appended
+        return pod_name in self._other_names_ids
+
+
+class DurationsColumn:
+    """
+    Stores durations in array of doubles,
+    aggregates are updated on every append(Welford's algorithm for variance)
+    """
+
+    def __init__(self):
+        self._values = array("d")
+        self._total = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def append(self, value: float):
+        self._values.append(value)
+        self._total += value
+        self._min = min(self._min, value)
+        self._max = max(self._max, value)
+        delta = value - self._mean
+        self._mean += delta / len(self._values)
+        self._m2 += delta * (value - self._mean)
+
+    @property
+    def count(self) -> int:
+        return len(self._values)
+
+    @property
+    def total(self) -> float:
+        return self._total
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def min(self) -> t.Optional[float]:
+        return self._min if self._values else None
+
+    @property
+    def max(self) -> t.Optional[float]:
+        return self._max if self._values else None
+
+    @property
+    def variance(self) -> float:
+        if len(self._values) < 2:
+            return 0.0
+        return self._m2 / (len(self._values) - 1)
+
+    def percentile(self, fraction: float) -> t.Optional[float]:
+        """linear interpolation between closest ranks, sorts values"""
+        if not self._values:
+            return None
+        sorted_values = sorted(self._values)
+        position = (len(sorted_values) - 1) * fraction
+        lower = math.floor(position)
+        upper = math.ceil(position)
+        weight = position - lower
+        return (
+            sorted_values[lower] * (1 - weight)
+            + sorted_values[upper] * weight
+        )
+
+    def build_summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean if self._values else None,
+            "min": self.min,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+    def __getitem__(self, index: int) -> float:
+        return self._values[index]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self) -> t.Iterator[float]:
+        return iter(self._values)
+
+
+class PodMeasurements:
+    """pod name and duration columns of the same length"""
+
+    def __init__(self):
+        self._pods_names = PodNamesColumn()
+        self._durations = DurationsColumn()
+
+    @property
+    def durations(self) -> DurationsColumn:
+        return self._durations
+
+    def append(self, pod_name: str, duration: float):
+        self._pods_names.append(pod_name)
+        self._durations.append(duration)
+
+    def __len__(self) -> int:
+        return len(self._durations)
+
+    def __iter__(self) -> t.Iterator[t.Tuple[str, float]]:
+        return zip(self._pods_names, self._durations)
+
+
+def test_pod_names_column():
+    pods_names = PodNamesColumn()
+    # lookup does not choose base name
+    assert "other-pod-1" not in pods_names
+    for pod_name in ["test-pod-1", "test-pod-2", "test-pod-extra", "a-01"]:
+        pods_names.append(pod_name)
+    pods_names.append("test-pod-extra")
+
+    assert list(pods_names) == [
+        "test-pod-1",
+        "test-pod-2",
+        "test-pod-extra",
+        "a-01",
+        "test-pod-extra",
+    ]
+    assert "test-pod-2" in pods_names
+    assert "test-pod-3" not in pods_names
+    assert "test-pod-1000" not in pods_names
+    assert "a-01" in pods_names
+    assert pods_names.max_number("test-pod") == 2
+    assert pods_names._other_names == ["test-pod-extra", "a-01"]
+
+
+def test_durations_column():
+    durations = DurationsColumn()
+    assert durations.min is None and durations.mean == 0.0
+    for value in [2.0, 4.0, 4.0, 4.0, 5.0, 5.0, 7.0, 9.0]:
+        durations.append(value)
+
+    assert durations.count == 8
+    assert durations.total == 40.0
+    assert durations.mean == 5.0
+    assert (durations.min, durations.max) == (2.0, 9.0)
+    assert math.isclose(durations.variance, 32 / 7)
+    assert durations.percentile(0.5) == 4.5
+    assert durations.build_summary()["p90"] == 7.6
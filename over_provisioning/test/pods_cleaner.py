@@ -2,8 +2,10 @@ import typing as t
 
 from over_provisioning.kuber.pod_deleter import PodDeleter
 from over_provisioning.logger import get_logger
+from over_provisioning.tracing import get_tracer
 
 logger = get_logger()
+tracer = get_tracer()
 
 
 class PodsCleaner:
@@ -27,7 +29,8 @@ class PodsCleaner:
             logger.info(
                 f"Trying to cleanup the following pods: {str(self._pods_to_delete)}"
             )
-            self._pod_deleter.delete_many(self._pods_to_delete)
+            with tracer.span("cleanup_pods", pods=len(self._pods_to_delete)):
+                self._pod_deleter.delete_many(self._pods_to_delete)
             logger.info(
                 f"Successfully cleanup pods: {str(self._pods_to_delete)}"
             )
@@ -1,11 +1,17 @@
-import kubernetes
+import threading
 import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from over_provisioning.kuber.pod_creator import PodCreator
+from over_provisioning.kuber.pod_template import PodTemplate
 from over_provisioning.logger import get_logger
+from over_provisioning.test.pod_measurements import PodNamesColumn
 from over_provisioning.test.pod_waiter import PodWaiter
+from over_provisioning.timer import Timer
+from over_provisioning.tracing import get_tracer
 
 logger = get_logger()
+tracer = get_tracer()
 
 
 class PodCreationTimeHitsLimitError(Exception):
@@ -17,26 +23,59 @@ class PodCreationTimeHitsLimitError(Exception):
         return f"Pod creating: {self.pod_name} time hit the limit: {self.creation_time_limit}."
 
 
+class SpawnedPod(t.NamedTuple):
+    pod_name: str
+    is_running: bool
+    # time waited until pod is running or until time limit was hit
+    time_to_running: float
+
+
 class PodsSpawner:
     def __init__(
         self,
         pod_creator: PodCreator,
         pod_waiter: PodWaiter,
         pods_base_name: str,
-        pod_spec: kubernetes.client.V1PodSpec,
+        pod_template: PodTemplate,
     ):
         self._pod_creator = pod_creator
         self._pod_waiter = pod_waiter
         self._pods_base_name = pods_base_name
-        self._pod_spec = pod_spec
+        self._pod_template = pod_template
 
-        self._created_pods_names = []
+        self._created_pods_names = PodNamesColumn()
+        self._created_pods_lock = threading.Lock()
 
-    def _construct_pod_name(self, pod_name_suffix: str):
+    def construct_pod_name(self, pod_name_suffix: str):
         return f"{self._pods_base_name}-{pod_name_suffix}"
 
-    def get_created_pods(self):
-        return self._created_pods_names
+    def get_created_pods(self) -> t.List[str]:
+        return list(self._created_pods_names)
+
+    def is_created(self, pod_name: str) -> bool:
+        return pod_name in self._created_pods_names
+
+    def _add_created_pod(self, pod_name: str):
+        with self._created_pods_lock:
+            self._created_pods_names.append(pod_name)
+
+    def add_created_pods(self, pods_names: t.Iterable[str]):
+        """registers pods created by interrupted run"""
+        for pod_name in pods_names:
+            if not self.is_created(pod_name):
+                self._add_created_pod(pod_name)
+
+    def get_next_pod_index(self) -> int:
+        """index after the biggest numeric suffix of created pods"""
+        return self._created_pods_names.max_number(self._pods_base_name) + 1
+
+    def dump_state(self) -> dict:
+        return {"created_pods_names": self.get_created_pods()}
+
+    def restore_state(self, state: dict):
+        self._created_pods_names = PodNamesColumn()
+        for pod_name in state["created_pods_names"]:
+            self._created_pods_names.append(pod_name)
 
     def create_pod(
         self, pod_name_suffix: str, max_pod_creation_time: float
@@ -44,15 +83,20 @@ class PodsSpawner:
         """
         returns time waited until pod ready and created pod_name
         """
-        pod_name = self._construct_pod_name(pod_name_suffix)
+        pod_name = self.construct_pod_name(pod_name_suffix)
+        with tracer.span("spawn_pod", pod_name=pod_name):
+            return self._spawn_pod(pod_name, max_pod_creation_time)
 
+    def _spawn_pod(
+        self, pod_name: str, max_pod_creation_time: float
+    ) -> t.Tuple[str, float]:
         logger.info(f"Init pod creation. Pod name: {pod_name}")
         pod_creation_time = self._pod_creator.create_pod(
-            pod_name, self._pod_spec
+            pod_name, self._pod_template
         )
         logger.info(f"Pod creation time: {pod_creation_time}")
 
-        self._created_pods_names.append(pod_name)
+        self._add_created_pod(pod_name)
 
         (
             time_limit_not_hited,
@@ -64,3 +108,75 @@ class PodsSpawner:
             raise PodCreationTimeHitsLimitError(pod_name, max_pod_creation_time)
 
         return pod_name, pod_creation_time + waited_time
+
+    def _create_concurrently(
+        self,
+        create_pod: t.Callable[[str], t.Any],
+        pods_names_suffixes: t.List[str],
+        max_workers: int,
+    ) -> t.List[Future]:
+        """returns futures of completed pods creations"""
+        parent_span = tracer.current_span()
+
+        def create_pod_in_span(suffix: str):
+            with tracer.attached(parent_span):
+                return create_pod(suffix)
+
+        workers = min(max_workers, len(pods_names_suffixes))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return [
+                executor.submit(create_pod_in_span, suffix)
+                for suffix in pods_names_suffixes
+            ]
+
+    def create_pods(
+        self,
+        pods_names_suffixes: t.List[str],
+        max_pod_creation_time: float,
+        max_workers: int = 16,
+    ) -> t.List[t.Tuple[str, float]]:
+        """
+        creates pods concurrently, waits until all of them are ready,
+        returns created pods names with time waited until pod ready
+        """
+        if not pods_names_suffixes:
+            return []
+
+        futures = self._create_concurrently(
+            lambda suffix: self.create_pod(suffix, max_pod_creation_time),
+            pods_names_suffixes,
+            max_workers,
+        )
+        # result() reraises PodCreationTimeHitsLimitError
+        # only after all pods are processed
+        return [future.result() for future in futures]
+
+    def spawn_pods(
+        self,
+        pods_names_suffixes: t.List[str],
+        max_pod_creation_time: float,
+        max_workers: int = 64,
+    ) -> t.List[SpawnedPod]:
+        """
+        same as create_pods, but pods which hit time limit are
+        returned instead of raising error
+        """
+
+        def spawn_pod(suffix: str) -> SpawnedPod:
+            pod_name = self.construct_pod_name(suffix)
+            timer = Timer()
+            timer.start()
+            try:
+                _, time_to_running = self.create_pod(
+                    suffix, max_pod_creation_time
+                )
+                return SpawnedPod(pod_name, True, time_to_running)
+            except PodCreationTimeHitsLimitError:
+                return SpawnedPod(pod_name, False, timer.elapsed)
+
+        if not pods_names_suffixes:
+            return []
+        futures = self._create_concurrently(
+            spawn_pod, pods_names_suffixes, max_workers
+        )
+        return [future.result() for future in futures]
@@ -0,0 +1,120 @@
+import datetime
+import typing as t
+
+from kubernetes import client
+
+from over_provisioning.kuber.pods_lister import PodsLister
+from over_provisioning.test.pod_measurements import DurationsColumn
+
+
+class PodStartup(t.NamedTuple):
+    # from creation until pod is bound to node
+    scheduling_time: float
+    # from binding until containers are started: image pulling,
+    # volumes mounting and init containers
+    container_start_time: float
+
+
+def _get_scheduled_time(pod: client.V1Pod) -> t.Optional[float]:
+    for condition in pod.status.conditions or []:
+        if condition.type == "PodScheduled" and condition.status == "True":
+            return condition.last_transition_time.timestamp()
+    return None
+
+
+def _get_containers_started_time(pod: client.V1Pod) -> t.Optional[float]:
+    """the last started container, pod is not running before it"""
+    started_times = []
+    for status in pod.status.container_statuses or []:
+        if not status.state or not status.state.running:
+            return None
+        started_times.append(status.state.running.started_at.timestamp())
+    return max(started_times, default=None)
+
+
+def get_pod_startup(pod: client.V1Pod) -> t.Optional[PodStartup]:
+    """
+    timestamps of kubernetes have seconds precision,
+    None is returned for pods which are not running yet
+    """
+    if not pod.status:
+        return None
+    scheduled_time = _get_scheduled_time(pod)
+    started_time = _get_containers_started_time(pod)
+    if scheduled_time is None or started_time is None:
+        return None
+    return PodStartup(
+        scheduled_time - pod.metadata.creation_timestamp.timestamp(),
+        started_time - scheduled_time,
+    )
+
+
+class PodsStartupReporter:
+    """
+    Splits pod creation time of test pods into scheduling and containers
+    start(mostly image pulling) by pod conditions and container statuses,
+    so slow registry is not confused with slow scale-up. Pods are listed
+    once at the end of the test.
+    """
+
+    def __init__(
+        self, pods_lister: PodsLister, namespace: str, label_selector: str
+    ):
+        self._pods_lister = pods_lister
+        self._namespace = namespace
+        self._label_selector = label_selector
+
+    def build_report(self) -> dict:
+        scheduling_times = DurationsColumn()
+        container_start_times = DurationsColumn()
+        for pod in self._pods_lister.list_by_label_selector(
+            self._namespace, self._label_selector
+        ):
+            startup = get_pod_startup(pod)
+            if startup is None:
+                continue
+            scheduling_times.append(startup.scheduling_time)
+            container_start_times.append(startup.container_start_time)
+        return {
+            "scheduling_time": scheduling_times.build_summary(),
+            "container_start_time": container_start_times.build_summary(),
+        }
+
+
+def test_get_pod_startup():
+    def at(seconds: int) -> datetime.datetime:
+        return datetime.datetime(
+            2020, 1, 1, 0, 0, seconds, tzinfo=datetime.timezone.utc
+        )
+
+    def create_pod(running: bool) -> client.V1Pod:
+        state = client.V1ContainerState(
+            running=client.V1ContainerStateRunning(started_at=at(50))
+            if running
+            else None
+        )
+        return client.V1Pod(
+            metadata=client.V1ObjectMeta(creation_timestamp=at(0)),
+            status=client.V1PodStatus(
+                conditions=[
+                    client.V1PodCondition(
+                        type="PodScheduled",
+                        status="True",
+                        last_transition_time=at(30),
+                    )
+                ],
+                container_statuses=[
+                    client.V1ContainerStatus(
+                        name="test",
+                        image="nginx",
+                        image_id="",
+                        ready=running,
+                        restart_count=0,
+                        state=state,
+                    )
+                ],
+            ),
+        )
+
+    assert get_pod_startup(create_pod(True)) == PodStartup(30, 20)
+    assert get_pod_startup(create_pod(False)) is None
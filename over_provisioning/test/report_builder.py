@@ -1,14 +1,23 @@
 import typing as t
 
+from over_provisioning.test.calibration import net_of_baseline
+from over_provisioning.test.pod_measurements import PodMeasurements
+
 
 class NodeAssigning(t.NamedTuple):
     node_name: str
     timestamp: float
 
 
-class PodCreationReport(t.NamedTuple):
+class PodMeasurement(t.NamedTuple):
     pod_name: str
-    creation_time: float
+    kind: str
+    duration: float
+
+
+POD_CREATION_MEASUREMENT = "creation"
+EXTRA_POD_CREATION_MEASUREMENT = "extra_pod_creation"
+NODE_ASSIGNING_MEASUREMENT = "time_to_assign_node"
 
 
 class OverProvisioningPodReport(t.NamedTuple):
@@ -22,24 +31,122 @@ class NodesReport(t.NamedTuple):
     quantity_after_end: int
 
 
+class EnvironmentReport(t.NamedTuple):
+    setup_time: t.Optional[float]
+    teardown_time: t.Optional[float]
+
+
+class WaveTimes(t.NamedTuple):
+    started: float
+    # the first over provisioning pod of the wave is recreated
+    first_preemption: float
+    # all over provisioning pods of the wave are recreated
+    preempted: float
+
+
+def build_wave_report(
+    wave: int,
+    test_pods: int,
+    wave_times: WaveTimes,
+    extra_pod_creation_time: t.Optional[float],
+    pods_creation_time_map: t.Dict[str, float],
+    pods_node_assigning_map: t.Dict[str, NodeAssigning],
+    all_pods_assigned: bool,
+) -> dict:
+    """
+    scale-up lasts until the first recreated pod gets a node,
+    reassignment until the last one
+    """
+    assigning_timestamps = [
+        node_assigning.timestamp
+        for node_assigning in pods_node_assigning_map.values()
+    ]
+    times_to_assign_node = [
+        node_assigning.timestamp - pods_creation_time_map[pod_name]
+        for pod_name, node_assigning in pods_node_assigning_map.items()
+        if pod_name in pods_creation_time_map
+    ]
+    return {
+        "wave": wave,
+        "test_pods": test_pods,
+        "recreated_pods": len(pods_creation_time_map),
+        "time_to_first_preemption": (
+            wave_times.first_preemption - wave_times.started
+        ),
+        "preemption_time": wave_times.preempted - wave_times.first_preemption,
+        "extra_pod_creation_time": extra_pod_creation_time,
+        "scale_up_time": (
+            min(assigning_timestamps) - wave_times.preempted
+            if assigning_timestamps
+            else None
+        ),
+        "reassignment_time": max(times_to_assign_node, default=None),
+        "all_pods_assigned": all_pods_assigned,
+    }
+
+
 class ReportBuilder:
     def __init__(self):
-        self._pod_creation_reports: t.List[PodCreationReport] = []
+        self._pod_creation_reports = PodMeasurements()
         self._nodes_report: t.Optional[NodesReport] = NodesReport(None, None)
         self._extra_pod_creation_time: float = 0
+        self._environment_report = EnvironmentReport(None, None)
 
         self._op_pods_time_creation_map: t.Dict[str, float] = {}
         self._op_pods_node_assigning_map: t.Dict[str, NodeAssigning] = dict()
+        self._op_pools_report: t.Dict[str, dict] = {}
+        self._baseline_return_report: t.Optional[dict] = None
+        self._pods_startup_report: t.Optional[dict] = None
+        self._calibration_report: t.Optional[dict] = None
+        self._waves_reports: t.List[dict] = []
 
         self._errors: t.List[str] = []
 
+    def dump_state(self) -> dict:
+        return {
+            "pod_creation_reports": [
+                list(report) for report in self._pod_creation_reports
+            ],
+            "extra_pod_creation_time": self._extra_pod_creation_time,
+            "op_pods_time_creation_map": self._op_pods_time_creation_map,
+            "nodes_before_start": self._nodes_report.quantity_before_start,
+            "op_pods_node_assigning_map": {
+                pod_name: list(node_assigning)
+                for pod_name, node_assigning in (
+                    self._op_pods_node_assigning_map.items()
+                )
+            },
+            "waves_reports": self._waves_reports,
+            "errors": self._errors,
+        }
+
+    def restore_state(self, state: dict):
+        self._pod_creation_reports = PodMeasurements()
+        for pod_name, creation_time in state["pod_creation_reports"]:
+            self._pod_creation_reports.append(pod_name, creation_time)
+        self._extra_pod_creation_time = state["extra_pod_creation_time"]
+        self._op_pods_time_creation_map = dict(
+            state["op_pods_time_creation_map"]
+        )
+        # nodes are counted again after restore when it is unknown
+        self._nodes_report = NodesReport(
+            state.get("nodes_before_start"), None
+        )
+        # previous waves of interrupted run
+        self._op_pods_node_assigning_map = {
+            pod_name: NodeAssigning(*node_assigning)
+            for pod_name, node_assigning in state.get(
+                "op_pods_node_assigning_map", {}
+            ).items()
+        }
+        self._waves_reports = list(state.get("waves_reports", []))
+        self._errors = list(state["errors"])
+
     def add_error(self, error_message: str):
         self._errors.append(error_message)
 
     def add_pod_creation_report(self, pod_name: str, creation_time: float):
-        self._pod_creation_reports.append(
-            PodCreationReport(pod_name, creation_time)
-        )
+        self._pod_creation_reports.append(pod_name, creation_time)
 
     def set_op_pods_time_creation_map(
         self, time_creation_map: t.Dict[str, float]
@@ -51,6 +158,33 @@ class ReportBuilder:
     ):
         self._op_pods_node_assigning_map = node_assigning_time_map
 
+    def set_op_pools_report(self, pools_report: t.Dict[str, dict]):
+        """pools report contains over provisioning pods recreated in pool"""
+        self._op_pools_report = pools_report
+
+    def set_baseline_return_report(self, baseline_return_report: dict):
+        """scale-down after test pods were deleted"""
+        self._baseline_return_report = baseline_return_report
+
+    def set_pods_startup_report(self, pods_startup_report: dict):
+        """scheduling and containers start parts of test pods creation"""
+        self._pods_startup_report = pods_startup_report
+
+    def set_calibration_report(self, calibration_report: dict):
+        """costs measured before the test on idle nodes"""
+        self._calibration_report = calibration_report
+
+    def add_wave_report(self, wave_report: dict):
+        self._waves_reports.append(wave_report)
+
+    @property
+    def op_pods_node_assigning_map(self) -> t.Dict[str, NodeAssigning]:
+        return self._op_pods_node_assigning_map
+
+    @property
+    def nodes_before_start(self) -> t.Optional[int]:
+        return self._nodes_report.quantity_before_start
+
     def set_nodes_report(
         self, quantity_before_start: int, quantity_after_end: int
     ):
@@ -58,17 +192,18 @@ class ReportBuilder:
             quantity_before_start, quantity_after_end
         )
 
+    def set_environment_report(
+        self, setup_time: t.Optional[float], teardown_time: t.Optional[float]
+    ):
+        self._environment_report = EnvironmentReport(setup_time, teardown_time)
+
     def set_extra_pod_creation_time(self, value: float):
         self._extra_pod_creation_time = value
 
     def _calc_average_pod_creation_time(self) -> float:
-        quantity = len(self._pod_creation_reports)
-        if quantity == 0:
+        if len(self._pod_creation_reports) == 0:
             return 0
-        total_sum = sum(
-            [report.creation_time for report in self._pod_creation_reports]
-        )
-        return total_sum / quantity
+        return self._pod_creation_reports.durations.mean
 
     def _construct_over_provisioning(self) -> dict:
         result = dict()
@@ -87,14 +222,93 @@ class ReportBuilder:
                 )
         return result
 
+    def get_pod_measurements(self) -> t.Iterator[PodMeasurement]:
+        for pod_name, creation_time in self._pod_creation_reports:
+            yield PodMeasurement(
+                pod_name, POD_CREATION_MEASUREMENT, creation_time
+            )
+        if self._extra_pod_creation_time:
+            yield PodMeasurement(
+                "extra",
+                EXTRA_POD_CREATION_MEASUREMENT,
+                self._extra_pod_creation_time,
+            )
+        op_pods_reports = self._construct_over_provisioning()
+        for pod_name, pod_report in op_pods_reports.items():
+            if "time_to_assign_node" in pod_report:
+                yield PodMeasurement(
+                    pod_name,
+                    NODE_ASSIGNING_MEASUREMENT,
+                    pod_report["time_to_assign_node"],
+                )
+
+    def _construct_over_provisioning_pools(
+        self, over_provisioning_pods: t.Dict[str, dict]
+    ) -> t.Dict[str, dict]:
+        result = {}
+        for pool_name, pool_report in self._op_pools_report.items():
+            times_to_assign_node = [
+                over_provisioning_pods[pod_name]["time_to_assign_node"]
+                for pod_name in pool_report["recreated_pods"]
+                if "time_to_assign_node"
+                in over_provisioning_pods.get(pod_name, {})
+            ]
+            result[pool_name] = {
+                **pool_report,
+                "max_time_to_assign_node": max(
+                    times_to_assign_node, default=None
+                ),
+            }
+        return result
+
     def build_report(self) -> dict:
+        over_provisioning_pods = self._construct_over_provisioning()
+        report = self._build_report(over_provisioning_pods)
+        if self._op_pools_report:
+            report[
+                "over_provisioning_pools"
+            ] = self._construct_over_provisioning_pools(over_provisioning_pods)
+        if self._baseline_return_report:
+            report["return_to_baseline"] = self._baseline_return_report
+        if self._pods_startup_report:
+            report["pods_startup"] = self._pods_startup_report
+        if self._waves_reports:
+            report["waves"] = self._waves_reports
+        if self._calibration_report:
+            report["calibration"] = self._build_calibration_report(report)
+        return report
+
+    def _build_calibration_report(self, report: dict) -> dict:
+        """raw results are kept, net results are added next to them"""
+        baseline_time_to_running = self._calibration_report[
+            "time_to_running"
+        ]["p50"]
+        return {
+            **self._calibration_report,
+            "net_average_pod_creation_time": net_of_baseline(
+                report["average_pod_creation_time"]
+                if len(self._pod_creation_reports)
+                else None,
+                baseline_time_to_running,
+            ),
+            "net_extra_pod_creation_time": net_of_baseline(
+                self._extra_pod_creation_time or None,
+                baseline_time_to_running,
+            ),
+        }
+
+    def _build_report(self, over_provisioning_pods: t.Dict[str, dict]) -> dict:
         return {
             "nodes_before_start": self._nodes_report.quantity_before_start,
             "nodes_after_end": self._nodes_report.quantity_after_end,
             "amount_of_created_pods": len(self._pod_creation_reports),
             "average_pod_creation_time": self._calc_average_pod_creation_time(),
             "extra_pod_creation_time": self._extra_pod_creation_time,
-            "over_provisioning_pods": self._construct_over_provisioning(),
+            "over_provisioning_pods": over_provisioning_pods,
+            "environment_setup_time": self._environment_report.setup_time,
+            "environment_teardown_time": (
+                self._environment_report.teardown_time
+            ),
             "errors": self._errors,
         }
 
@@ -130,6 +344,34 @@ def test_build_report():
                 "node_assigning_time": 150,
             },
         },
+        "environment_setup_time": None,
+        "environment_teardown_time": None,
         "errors": [],
     }
     assert expected_result == result
+
+
+def test_build_wave_report():
+    report = build_wave_report(
+        2,
+        5,
+        WaveTimes(100, 110, 130),
+        3,
+        {"op-1": 112, "op-2": 130},
+        {
+            "op-1": NodeAssigning("node-1", 190),
+            "op-2": NodeAssigning("node-2", 200),
+        },
+        True,
+    )
+    assert report["time_to_first_preemption"] == 10
+    assert report["preemption_time"] == 20
+    assert report["scale_up_time"] == 60
+    assert report["reassignment_time"] == 78
+    assert report["recreated_pods"] == 2
+
+    report = build_wave_report(1, 1, WaveTimes(0, 0, 0), None, {}, {}, False)
+    assert (report["scale_up_time"], report["reassignment_time"]) == (
+        None,
+        None,
+    )
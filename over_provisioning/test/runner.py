@@ -3,11 +3,19 @@ import typing as t
 from over_provisioning.environment.setuper import EnvironmentSetuper
 from over_provisioning.kuber.nodes_finder import NodesFinder
 from over_provisioning.logger import get_logger
+from over_provisioning.test.baseline_waiter import BaselineReturnWaiter
+from over_provisioning.test.calibration import BaselineCalibrator
 from over_provisioning.test.pod_creating_loop import PodCreatingLoop
 from over_provisioning.test.pods_cleaner import PodsCleaner
-from over_provisioning.test.report_builder import ReportBuilder
+from over_provisioning.test.pods_startup import PodsStartupReporter
+from over_provisioning.test.report_builder import (
+    PodMeasurement,
+    ReportBuilder,
+)
+from over_provisioning.tracing import get_tracer
 
 logger = get_logger()
+tracer = get_tracer()
 
 
 class OneOverProvisioningPodTest:
@@ -18,36 +26,75 @@ class OneOverProvisioningPodTest:
         environment_setuper: EnvironmentSetuper,
         pod_cleaner: PodsCleaner,
         report_builder: ReportBuilder,
+        baseline_return_waiter: BaselineReturnWaiter = None,
+        pods_startup_reporter: PodsStartupReporter = None,
+        calibrator: BaselineCalibrator = None,
     ):
         self._pod_creating_loop = pod_creating_loop
         self._nodes_finder = nodes_finder
         self._environment_setuper = environment_setuper
         self._pods_cleaner = pod_cleaner
         self._report_builder = report_builder
+        self._baseline_return_waiter = baseline_return_waiter
+        self._pods_startup_reporter = pods_startup_reporter
+        self._calibrator = calibrator
+
+    def _count_nodes(self) -> int:
+        return len(self._nodes_finder.find_by_label_selector())
+
+    def get_pod_measurements(self) -> t.Iterator[PodMeasurement]:
+        return self._report_builder.get_pod_measurements()
 
     def run(
-        self, max_pod_creation_time_in_seconds: float
+        self, max_pod_creation_time_in_seconds: float, resume: bool = False
     ) -> t.Tuple[bool, dict]:
+        with tracer.span("test", resume=resume):
+            return self._run(max_pod_creation_time_in_seconds, resume)
+
+    def _run(
+        self, max_pod_creation_time_in_seconds: float, resume: bool
+    ) -> t.Tuple[bool, dict]:
+        test_result = False
+        # baseline of resumed test is unknown, cluster is already scaled up
+        baseline_return_waiter = (
+            None if resume else self._baseline_return_waiter
+        )
         with self._environment_setuper as env_created_successfully:
             if env_created_successfully:
+                # calibration pods of resumed test would run on nodes
+                # which are not idle
+                if self._calibrator and not resume:
+                    self._report_builder.set_calibration_report(
+                        self._calibrator.calibrate()
+                    )
+                if baseline_return_waiter:
+                    baseline_return_waiter.set_baseline()
                 with self._pods_cleaner as pods_cleaner:
-                    initial_amount_of_nodes = len(
-                        self._nodes_finder.find_by_label_selector()
+                    if resume:
+                        # initial amount of nodes is restored from checkpoint
+                        test_result = self._pod_creating_loop.resume(
+                            max_pod_creation_time_in_seconds
+                        )
+                    else:
+                        self._report_builder.set_nodes_report(
+                            self._count_nodes(), None
+                        )
+                        test_result = self._pod_creating_loop.run(
+                            max_pod_creation_time_in_seconds
+                        )
+                    # None when checkpoint has no nodes, cluster could
+                    # already scale up, so they are not counted again
+                    initial_amount_of_nodes = (
+                        self._report_builder.nodes_before_start
                     )
                     logger.info(
                         f"Initial amount of nodes: {initial_amount_of_nodes}"
                     )
-
-                    test_result = self._pod_creating_loop.run(
-                        max_pod_creation_time_in_seconds
-                    )
                     pods_cleaner.set_pods_to_delete(
                         self._pod_creating_loop.get_created_pods()
                     )
 
-                    amount_of_nodes_after_test = len(
-                        self._nodes_finder.find_by_label_selector()
-                    )
+                    amount_of_nodes_after_test = self._count_nodes()
                     logger.info(
                         f"Amount of nodes after the test: {amount_of_nodes_after_test}"
                     )
@@ -55,6 +102,21 @@ class OneOverProvisioningPodTest:
                     self._report_builder.set_nodes_report(
                         initial_amount_of_nodes, amount_of_nodes_after_test
                     )
+                    # test pods are still there, cleaner deletes them
+                    if self._pods_startup_reporter:
+                        self._report_builder.set_pods_startup_report(
+                            self._pods_startup_reporter.build_report()
+                        )
+
+                # test pods are deleted, cluster can scale down
+                if baseline_return_waiter:
+                    self._report_builder.set_baseline_return_report(
+                        baseline_return_waiter.wait()
+                    )
 
-                    return test_result, self._report_builder.build_report()
-        return False, self._report_builder.build_report()
+        # report is built after environment is destroyed to include teardown
+        self._report_builder.set_environment_report(
+            self._environment_setuper.create_time,
+            self._environment_setuper.destroy_time,
+        )
+        return test_result, self._report_builder.build_report()
@@ -0,0 +1,317 @@
+import csv
+import io
+import json
+import os
+import time
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+from over_provisioning.environment.setuper import EnvironmentSetuper
+from over_provisioning.kuber.nodes_finder import NodesFinder
+from over_provisioning.kuber.pod_creator import PodCreator
+from over_provisioning.kuber.pod_template import (
+    TEST_POD_LABEL_KEY,
+    TEST_POD_LABEL_VALUE,
+    PodTemplate,
+)
+from over_provisioning.kuber.pods_lister import PodsLister
+from over_provisioning.logger import get_logger
+from over_provisioning.test.open_loop import (
+    RUNNING_STATE,
+    InFlightPod,
+    advance_in_flight_pods,
+    read_pods_phases,
+)
+from over_provisioning.test.pod_measurements import DurationsColumn
+from over_provisioning.test.pods_cleaner import PodsCleaner
+from over_provisioning.test.report_builder import ReportBuilder
+from over_provisioning.timer import Timer
+from over_provisioning.tracing import get_tracer
+
+logger = get_logger()
+tracer = get_tracer()
+
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+
+class TraceArrival(t.NamedTuple):
+    # seconds from the start of the trace
+    offset: float
+    # pod size profile, default pod template is used when it is empty
+    profile: t.Optional[str]
+
+
+def parse_arrival_trace(
+    lines: t.Iterable[str], is_ndjson: bool
+) -> t.List[TraceArrival]:
+    """
+    CSV has header with "offset" and optional "profile" columns,
+    NDJSON has one {"offset": 1.5, "profile": "small"} object per line
+    """
+    if is_ndjson:
+        rows = [json.loads(line) for line in lines if line.strip()]
+    else:
+        rows = list(csv.DictReader(lines))
+
+    arrivals = []
+    for row_number, row in enumerate(rows, 1):
+        try:
+            offset = float(row["offset"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(
+                f"Wrong arrival trace row {row_number}: {row},"
+                f" offset in seconds is expected"
+            )
+        if offset < 0:
+            raise ValueError(
+                f"Wrong arrival trace row {row_number}: {row},"
+                f" offset can not be negative"
+            )
+        arrivals.append(TraceArrival(offset, row.get("profile") or None))
+    # logs are not always ordered by spawn time
+    arrivals.sort(key=lambda arrival: arrival.offset)
+    return arrivals
+
+
+def load_arrival_trace(file_path: str) -> t.List[TraceArrival]:
+    _, extension = os.path.splitext(file_path)
+    with open(file_path, newline="") as f:
+        return parse_arrival_trace(f, extension in NDJSON_EXTENSIONS)
+
+
+class ReplayedArrival:
+    __slots__ = ("arrival", "pod", "request_start_time")
+
+    def __init__(self, arrival: TraceArrival, pod: InFlightPod):
+        self.arrival = arrival
+        self.pod = pod
+        # set from creation thread
+        self.request_start_time: t.Optional[float] = None
+
+    @property
+    def lateness(self) -> t.Optional[float]:
+        """how late creation request was sent comparing to trace"""
+        if self.request_start_time is None:
+            return None
+        return self.request_start_time - self.pod.arrival_time
+
+    def to_dict(self, time_compression: float) -> dict:
+        return {
+            "pod_name": self.pod.name,
+            "profile": self.arrival.profile,
+            "offset": self.arrival.offset,
+            "scheduled_offset": self.arrival.offset / time_compression,
+            "lateness": self.lateness,
+            "state": self.pod.state,
+            "time_to_running": (
+                self.pod.time_to_running
+                if self.pod.state == RUNNING_STATE
+                else None
+            ),
+        }
+
+
+class TraceReplayTest:
+    """
+    Replays arrivals of the production trace against the cluster.
+    Every creation request is scheduled at absolute deadline
+    (trace offset divided by time compression) and sent from thread pool,
+    so slow API calls do not shift next arrivals, remaining delay
+    is reported as lateness of every arrival.
+    Pods of all profiles are advanced by one pods list call per tick.
+    """
+
+    def __init__(
+        self,
+        pod_creator: PodCreator,
+        pods_lister: PodsLister,
+        nodes_finder: NodesFinder,
+        pod_template: PodTemplate,
+        profile_templates: t.Dict[str, PodTemplate],
+        environment_setuper: EnvironmentSetuper,
+        pods_cleaner: PodsCleaner,
+        report_builder: ReportBuilder,
+        namespace: str,
+        time_compression: float = 1,
+        tick_interval: float = 1,
+        max_workers: int = 16,
+    ):
+        self._pod_creator = pod_creator
+        self._pods_lister = pods_lister
+        self._nodes_finder = nodes_finder
+        self._pod_template = pod_template
+        self._profile_templates = profile_templates
+        self._environment_setuper = environment_setuper
+        self._pods_cleaner = pods_cleaner
+        self._report_builder = report_builder
+        self._namespace = namespace
+        self._time_compression = time_compression
+        self._tick_interval = tick_interval
+        self._max_workers = max_workers
+
+    def _get_template(self, arrival: TraceArrival) -> PodTemplate:
+        if arrival.profile is None:
+            return self._pod_template
+        return self._profile_templates[arrival.profile]
+
+    def _create_pod(self, replayed: ReplayedArrival):
+        replayed.request_start_time = Timer.now()
+        return self._pod_creator.create_pod(
+            replayed.pod.name, self._get_template(replayed.arrival)
+        )
+
+    def _submit(
+        self,
+        number: int,
+        arrival: TraceArrival,
+        start_time: float,
+        executor: ThreadPoolExecutor,
+    ) -> ReplayedArrival:
+        replayed = ReplayedArrival(
+            arrival,
+            InFlightPod(
+                f"test-pod-replay-{number}",
+                start_time + arrival.offset / self._time_compression,
+                None,
+            ),
+        )
+        replayed.pod.creation = executor.submit(self._create_pod, replayed)
+        return replayed
+
+    def _finish(self, replayed: ReplayedArrival):
+        pod = replayed.pod
+        if pod.state == RUNNING_STATE:
+            self._report_builder.add_pod_creation_report(
+                pod.name, pod.time_to_running
+            )
+        else:
+            self._report_builder.add_error(
+                f"Pod: {pod.name} of trace offset: {replayed.arrival.offset}"
+                f" is {pod.state}."
+            )
+
+    def _replay(
+        self,
+        arrivals: t.List[TraceArrival],
+        max_pod_creation_time: float,
+        executor: ThreadPoolExecutor,
+    ) -> t.List[ReplayedArrival]:
+        replayed_arrivals: t.List[ReplayedArrival] = []
+        in_flight: t.Dict[str, InFlightPod] = {}
+        replayed_by_name: t.Dict[str, ReplayedArrival] = {}
+        created_pods: t.List[str] = []
+        # pods which are still being created are deleted too,
+        # pods which failed to be created are skipped by deleter
+        self._pods_cleaner.set_pods_to_delete(created_pods)
+        label_selector = f"{TEST_POD_LABEL_KEY}={TEST_POD_LABEL_VALUE}"
+
+        start_time = Timer.now()
+        next_index = 0
+        while next_index < len(arrivals) or in_flight:
+            now = Timer.now()
+            while next_index < len(arrivals):
+                arrival = arrivals[next_index]
+                deadline = start_time + arrival.offset / self._time_compression
+                if deadline > now:
+                    break
+                next_index += 1
+                replayed = self._submit(
+                    next_index, arrival, start_time, executor
+                )
+                created_pods.append(replayed.pod.name)
+                replayed_arrivals.append(replayed)
+                replayed_by_name[replayed.pod.name] = replayed
+                in_flight[replayed.pod.name] = replayed.pod
+
+            pods_phases = (
+                read_pods_phases(
+                    self._pods_lister, self._namespace, label_selector
+                )
+                if in_flight
+                else {}
+            )
+            for pod in advance_in_flight_pods(
+                in_flight, pods_phases, Timer.now(), max_pod_creation_time
+            ):
+                self._finish(replayed_by_name[pod.name])
+
+            next_tick = Timer.now() + self._tick_interval
+            if next_index < len(arrivals):
+                next_deadline = (
+                    start_time
+                    + arrivals[next_index].offset / self._time_compression
+                )
+                next_tick = min(next_tick, next_deadline)
+            time.sleep(max(next_tick - Timer.now(), 0))
+        return replayed_arrivals
+
+    def run(
+        self, arrivals: t.List[TraceArrival], max_pod_creation_time: float
+    ) -> t.Tuple[bool, dict]:
+        replayed_arrivals: t.List[ReplayedArrival] = []
+        with self._environment_setuper as env_created_successfully:
+            if env_created_successfully:
+                nodes_before_start = len(
+                    self._nodes_finder.find_by_label_selector()
+                )
+                with self._pods_cleaner, ThreadPoolExecutor(
+                    max_workers=self._max_workers
+                ) as executor, tracer.span(
+                    "trace_replay", arrivals=len(arrivals)
+                ):
+                    logger.info(
+                        f"Replaying {len(arrivals)} arrivals with time"
+                        f" compression: {self._time_compression}"
+                    )
+                    replayed_arrivals = self._replay(
+                        arrivals, max_pod_creation_time, executor
+                    )
+                self._report_builder.set_nodes_report(
+                    nodes_before_start,
+                    len(self._nodes_finder.find_by_label_selector()),
+                )
+        self._report_builder.set_environment_report(
+            self._environment_setuper.create_time,
+            self._environment_setuper.destroy_time,
+        )
+
+        lateness = DurationsColumn()
+        for replayed in replayed_arrivals:
+            if replayed.lateness is not None:
+                lateness.append(replayed.lateness)
+        report = self._report_builder.build_report()
+        report["trace_replay"] = {
+            "time_compression": self._time_compression,
+            "amount_of_arrivals": len(replayed_arrivals),
+            "lateness": lateness.build_summary(),
+            "arrivals": [
+                replayed.to_dict(self._time_compression)
+                for replayed in replayed_arrivals
+            ],
+        }
+        passed = bool(replayed_arrivals) and all(
+            replayed.pod.state == RUNNING_STATE
+            for replayed in replayed_arrivals
+        )
+        return passed, report
+
+
+def test_parse_arrival_trace():
+    csv_trace = io.StringIO("offset,profile\n12.5,large\n0,small\n3,\n")
+    assert parse_arrival_trace(csv_trace, is_ndjson=False) == [
+        TraceArrival(0.0, "small"),
+        TraceArrival(3.0, None),
+        TraceArrival(12.5, "large"),
+    ]
+
+    ndjson_trace = ['{"offset": 2, "profile": "medium"}', "", '{"offset": 1}']
+    assert parse_arrival_trace(ndjson_trace, is_ndjson=True) == [
+        TraceArrival(1.0, None),
+        TraceArrival(2.0, "medium"),
+    ]
+
+    try:
+        parse_arrival_trace(["timestamp\n", "1\n"], is_ndjson=False)
+        assert False, "ValueError expected"
+    except ValueError:
+        pass
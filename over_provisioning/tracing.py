@@ -0,0 +1,280 @@
+import contextlib
+import json
+import os
+import random
+import threading
+import typing as t
+
+from over_provisioning.kuber.api_calls import ApiCallsTracker
+from over_provisioning.logger import get_logger
+from over_provisioning.timer import Timer
+
+logger = get_logger()
+
+CHROME_TRACE_FORMAT = "chrome"
+OTLP_JSON_FORMAT = "otlp"
+
+
+class Span:
+    def __init__(
+        self,
+        name: str,
+        parent: t.Optional["Span"],
+        attributes: t.Dict[str, t.Any],
+    ):
+        self.name = name
+        self.parent = parent
+        self.attributes = attributes
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.thread_id = threading.get_ident()
+        self.start_time = Timer.now()
+        self.end_time: t.Optional[float] = None
+
+    def set_attribute(self, key: str, value: t.Any):
+        self.attributes[key] = value
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: t.Any):
+        pass
+
+
+class Tracer:
+    """
+    Collects nested spans, disabled by default:
+        >>> tracer = get_tracer()
+        >>> with tracer.span("create_pod", pod_name="test-pod-1") as span:
+        >>>     span.set_attribute("node", node_name)
+    Every span gets "api_calls" attribute with amount of API calls
+    made while span was open(in all threads).
+    """
+
+    def __init__(self):
+        self._enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._spans: t.List[Span] = []
+        self._trace_id = ""
+        self._api_calls_tracker: t.Optional[ApiCallsTracker] = None
+        self._file_path: t.Optional[str] = None
+        self._trace_format = CHROME_TRACE_FORMAT
+        self._flushes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def enable(
+        self,
+        api_calls_tracker: ApiCallsTracker = None,
+        file_path: str = None,
+        trace_format: str = CHROME_TRACE_FORMAT,
+    ):
+        """file path is used by flush"""
+        self._enabled = True
+        self._spans = []
+        self._trace_id = f"{random.getrandbits(128):032x}"
+        self._api_calls_tracker = api_calls_tracker
+        self._file_path = file_path
+        self._trace_format = trace_format
+        self._flushes = 0
+
+    def disable(self):
+        self._enabled = False
+
+    def _get_stack(self) -> t.List[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _get_api_calls_count(self) -> int:
+        if self._api_calls_tracker is None:
+            return 0
+        return self._api_calls_tracker.calls_count
+
+    @contextlib.contextmanager
+    def span(self, name: str, parent: Span = None, **attributes):
+        """
+        parent is taken from current thread,
+        pass it explicitly for spans opened in worker threads
+        """
+        if not self._enabled:
+            yield _NoopSpan()
+            return
+
+        stack = self._get_stack()
+        if parent is None and stack:
+            parent = stack[-1]
+        span = Span(name, parent, attributes)
+        api_calls_count = self._get_api_calls_count()
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            stack.pop()
+            span.end_time = Timer.now()
+            span.set_attribute(
+                "api_calls", self._get_api_calls_count() - api_calls_count
+            )
+            with self._lock:
+                self._spans.append(span)
+
+    @contextlib.contextmanager
+    def attached(self, span: t.Optional[Span]):
+        """makes span opened in other thread parent of spans in this one"""
+        if not self._enabled or span is None:
+            yield
+            return
+        stack = self._get_stack()
+        stack.append(span)
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    def current_span(self) -> t.Optional[Span]:
+        stack = self._get_stack()
+        return stack[-1] if stack else None
+
+    def _to_chrome_trace(self) -> dict:
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": span.name,
+                    "cat": "over_provisioning",
+                    "ph": "X",
+                    "ts": span.start_time * 1e6,
+                    "dur": (span.end_time - span.start_time) * 1e6,
+                    "pid": pid,
+                    "tid": span.thread_id,
+                    "args": span.attributes,
+                }
+                for span in self._spans
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    @staticmethod
+    def _to_otlp_value(value: t.Any) -> dict:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def _to_otlp_json(self) -> dict:
+        spans = [
+            {
+                "traceId": self._trace_id,
+                "spanId": span.span_id,
+                "parentSpanId": span.parent.span_id if span.parent else "",
+                "name": span.name,
+                "kind": 1,  # internal
+                "startTimeUnixNano": str(int(span.start_time * 1e9)),
+                "endTimeUnixNano": str(int(span.end_time * 1e9)),
+                "attributes": [
+                    {"key": key, "value": self._to_otlp_value(value)}
+                    for key, value in span.attributes.items()
+                ],
+            }
+            for span in self._spans
+        ]
+        service_name = {
+            "key": "service.name",
+            "value": {"stringValue": "over-provisioning-test"},
+        }
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [service_name]},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "over_provisioning"},
+                            "spans": spans,
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export(self, file_path: str, trace_format: str = CHROME_TRACE_FORMAT):
+        with self._lock:
+            if trace_format == OTLP_JSON_FORMAT:
+                trace = self._to_otlp_json()
+            else:
+                trace = self._to_chrome_trace()
+        with open(file_path, "w") as f:
+            json.dump(trace, f, default=str)
+        logger.info(f"Trace with {len(self._spans)} spans saved: {file_path}")
+
+    def flush(self):
+        """
+        exports spans collected so far into "{file name}-{N}{extension}"
+        and forgets them, so daemon does not keep spans of all runs
+        """
+        if not self._enabled or not self._file_path:
+            return
+        self._flushes += 1
+        root, extension = os.path.splitext(self._file_path)
+        self.export(f"{root}-{self._flushes}{extension}", self._trace_format)
+        with self._lock:
+            self._spans = []
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+@contextlib.contextmanager
+def tracing(file_path: t.Optional[str], trace_format: str):
+    """enables tracer for the wrapped code and exports spans at the end"""
+    if not file_path:
+        yield
+        return
+
+    api_calls_tracker = ApiCallsTracker()
+    api_calls_tracker.install()
+    _tracer.enable(api_calls_tracker, file_path, trace_format)
+    try:
+        yield
+    finally:
+        _tracer.disable()
+        api_calls_tracker.uninstall()
+        _tracer.export(file_path, trace_format)
+
+
+def test_tracer_nested_spans():
+    tracer = Tracer()
+    tracer.enable()
+    with tracer.span("test") as test_span:
+        with tracer.span("create_pod", pod_name="test-pod-1") as span:
+            span.set_attribute("node", "node_1")
+
+    create_pod_span, _ = tracer._spans
+    assert create_pod_span.parent is test_span
+    assert create_pod_span.attributes == {
+        "pod_name": "test-pod-1",
+        "node": "node_1",
+        "api_calls": 0,
+    }
+    events = tracer._to_chrome_trace()["traceEvents"]
+    assert [event["name"] for event in events] == ["create_pod", "test"]
+
+
+def test_tracer_flush(tmp_path):
+    file_path = str(tmp_path / "trace.json")
+    tracer = Tracer()
+    tracer.enable(file_path=file_path)
+    with tracer.span("test"):
+        pass
+    tracer.flush()
+
+    assert tracer._spans == []
+    with open(str(tmp_path / "trace-1.json")) as f:
+        assert len(json.load(f)["traceEvents"]) == 1